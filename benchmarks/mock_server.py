@@ -0,0 +1,315 @@
+"""Local OpenAI-compatible stub server for benchmarks and offline development.
+
+The server answers ``POST /v1/chat/completions`` by replaying recorded
+itinerary responses (``fixtures/recorded_itineraries.json``), shaped to the
+request: a whole itinerary with the requested sections and one activity per
+trip day, or a single section for the parallel-sections prompts. Streaming
+(SSE) and the ``usage`` block are supported.
+
+Latency, generation speed and failures are configurable: a fixed time to
+first token, a token rate for the rest of the answer, and random 500 errors,
+429 rate limits (with ``retry-after-ms``) and truncated (malformed) JSON.
+
+Run it standalone and point the app at it::
+
+    python -m benchmarks.mock_server --port 8765 --latency 0.3 --token-rate 300
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run travel_assistant_openai.py
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "recorded_itineraries.json")
+
+_DURATION_PATTERN = re.compile(r"Duration:\s*(\d+)\s*days")
+_DAYS_PATTERN = re.compile(r"days (\d+) to (\d+)")
+_SECTION_TASKS = (
+    ("Recommend the best flight", "flights"),
+    ("Recommend one real hotel", "hotel"),
+    ("Summarize the user's requirements", "overview"),
+    ("Recommend the best way to travel", "transport"),
+)
+_OVERVIEW_KEYS = ("user_preferences_summary", "analysis_reasoning", "additional_suggestions",
+                  "daily_food_budget", "transportation_local")
+_CHUNK_CHARACTERS = 40
+
+
+def load_recordings(path=FIXTURES_PATH):
+    """Load the recorded itinerary documents replayed by the server"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _activities_for_days(recording, first_day, last_day):
+    """Replay the recorded activities, renumbered to cover ``first_day``..``last_day``"""
+    recorded = itertools.cycle(recording["activities"])
+    return [dict(next(recorded), day=day) for day in range(first_day, last_day + 1)]
+
+
+def _transport_for(recording):
+    """Replay the recorded outbound flight as the answer to a multi-city transport hop"""
+    flights = recording["flights"]
+    return {
+        "mode": "Flight",
+        "carrier": flights["airline"],
+        "route": flights["route"],
+        "date": flights["departure_date"],
+        "departure_time": flights["departure_time"],
+        "arrival_time": flights["arrival_time"],
+        "price": flights["price"],
+        "duration": flights["duration"],
+        "booking_tips": flights["booking_tips"],
+    }
+
+
+def _requested_keys(system_message):
+    """Return the top-level keys of the JSON format in a whole-itinerary system prompt"""
+    start = system_message.find("{")
+    try:
+        return list(json.loads(system_message[start:]))
+    except ValueError:
+        return None
+
+
+def build_answer(recording, messages):
+    """Shape a recorded itinerary into the answer to a chat request"""
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+    if "**Task:**" in user:
+        for marker, section in _SECTION_TASKS:
+            if marker in user:
+                if section == "overview":
+                    return {key: recording[key] for key in _OVERVIEW_KEYS}
+                if section == "transport":
+                    return {"transport": _transport_for(recording)}
+                return {section: recording[section]}
+        days = _DAYS_PATTERN.search(user)
+        first_day, last_day = (int(days.group(1)), int(days.group(2))) if days else (1, 1)
+        return {"activities": _activities_for_days(recording, first_day, last_day)}
+
+    duration = _DURATION_PATTERN.search(user)
+    answer = dict(recording)
+    answer["activities"] = _activities_for_days(recording, 1, max(int(duration.group(1)) if duration else 1, 1))
+    keys = _requested_keys(system)
+    if keys:
+        answer = {key: answer[key] for key in keys if key in answer}
+    return answer
+
+
+class MockConfig:
+    """Latency and fault-injection settings of the stub server"""
+
+    def __init__(self, latency=0.2, token_rate=400.0, error_rate=0.0, rate_limit_rate=0.0,
+                 malformed_rate=0.0, retry_after_ms=50, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after_ms = retry_after_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self, rate):
+        """Return True with probability ``rate``"""
+        with self.lock:
+            return self.random.random() < rate
+
+    def fraction(self, low, high):
+        with self.lock:
+            return self.random.uniform(low, high)
+
+
+class MockLLMServer:
+    """OpenAI-compatible chat completions stub running on a background thread"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0, recordings=None):
+        self.config = config or MockConfig()
+        self.recordings = recordings or load_recordings()
+        self._next_recording = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0,
+                       "streamed": 0, "completion_tokens": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        """Return counters of requests served and faults injected"""
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def respond(self, body):
+        """Return ``(status, headers, content)`` for a chat request, applying fault injection"""
+        config = self.config
+        self._bump("requests")
+        if config.roll(config.rate_limit_rate):
+            self._bump("rate_limited")
+            return 429, {"retry-after-ms": str(config.retry_after_ms)}, "Rate limit reached"
+        if config.roll(config.error_rate):
+            self._bump("errors")
+            return 500, {}, "Internal server error"
+
+        recording = self.recordings[next(self._next_recording) % len(self.recordings)]
+        content = json.dumps(build_answer(recording, body.get("messages", [])), ensure_ascii=False)
+        if config.roll(config.malformed_rate):
+            self._bump("malformed")
+            content = content[:int(len(content) * config.fraction(0.5, 0.95))]
+        return 200, {}, content
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=()):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in dict(headers).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                time.sleep(server.config.latency)
+                status, headers, content = server.respond(body)
+                if status != 200:
+                    self._send_json(status, {"error": {"message": content, "type": "mock_error"}}, headers)
+                    return
+
+                completion_tokens = max(1, len(content) // 4)
+                prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens}
+                server._bump("completion_tokens", completion_tokens)
+                seconds_per_char = 1.0 / (server.config.token_rate * 4) if server.config.token_rate else 0.0
+                model = body.get("model", "mock")
+                if body.get("stream"):
+                    server._bump("streamed")
+                    self._stream(content, model, usage, seconds_per_char, body)
+                    return
+                time.sleep(len(content) * seconds_per_char)
+                self._send_json(200, {
+                    "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                    "model": model, "usage": usage,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                })
+
+            def _stream(self, content, model, usage, seconds_per_char, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+                def send(payload):
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                         "created": int(time.time()), "model": model}
+                try:
+                    for start in range(0, len(content), _CHUNK_CHARACTERS):
+                        piece = content[start:start + _CHUNK_CHARACTERS]
+                        time.sleep(len(piece) * seconds_per_char)
+                        send(dict(chunk, choices=[{"index": 0, "finish_reason": None,
+                                                   "delta": {"content": piece}}]))
+                    send(dict(chunk, choices=[{"index": 0, "finish_reason": "stop", "delta": {}}]))
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        send(dict(chunk, choices=[], usage=usage))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client closed the stream early (e.g. a cancelled prefetch)
+                    pass
+
+        return Handler
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_server",
+                                     description="Run the OpenAI-compatible benchmark stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    return parser
+
+
+def add_mock_arguments(parser):
+    """Add the latency and fault-injection options shared with the benchmark runner"""
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=400.0,
+                        help="Completion tokens generated per second (0 for instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of answers truncated into malformed JSON")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for fault injection")
+
+
+def config_from_args(args):
+    return MockConfig(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+                      rate_limit_rate=args.rate_limit_rate, malformed_rate=args.malformed_rate,
+                      seed=args.seed)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = MockLLMServer(config_from_args(args), args.host, args.port).start()
+    print(f"Mock OpenAI server listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
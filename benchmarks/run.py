@@ -0,0 +1,269 @@
+"""Offline benchmark and load-test suite for itinerary generation.
+
+Every run starts a local ``MockLLMServer`` (see ``benchmarks.mock_server``),
+so no API key or network access is needed. It measures:
+
+* end-to-end latency percentiles and throughput of the chosen generation
+  path for each number of concurrent sessions,
+* parse-failure, error and section-error rates under the injected faults,
+* peak Python memory (tracemalloc) and process RSS while generating,
+* the time to render the results page for itineraries of several lengths.
+
+Results are written as JSON for regression tracking::
+
+    python -m benchmarks.run --sessions 1,4,16 --requests 32 -o bench.json
+    python -m benchmarks.run --mode stream --malformed-rate 0.2 --rate-limit-rate 0.05
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.mock_server import MockLLMServer, add_mock_arguments, config_from_args
+from travel_core.client import LLMClient
+from travel_core.generator import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    generate_sectioned_itinerary,
+    generate_travel_itinerary,
+    preferences_from_record,
+    stream_travel_itinerary,
+)
+from travel_core.streaming import ITINERARY_COMPLETE
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "travel_assistant_openai.py")
+
+_DESTINATIONS = ("Paris", "Tokyo", "Rome", "Lisbon", "Mexico City", "Seoul", "Barcelona", "Cape Town")
+_ORIGINS = ("New York", "Los Angeles", "Chicago", "Toronto")
+_INTERESTS = ("Art & Museums", "Food & Dining", "Historical Sites", "Local Culture", "Nightlife & Entertainment")
+
+
+def percentiles(values):
+    """Summarize a list of durations in seconds"""
+    if not values:
+        return None
+    values = np.asarray(values, dtype=float)
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {
+        "count": int(values.size), "mean": round(float(values.mean()), 4), "p50": round(float(p50), 4),
+        "p90": round(float(p90), 4), "p95": round(float(p95), 4), "p99": round(float(p99), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def bench_preferences(position, duration=5):
+    """Return distinct, realistic preferences for request ``position`` (no two share a cache key)"""
+    start_date = datetime.date(2030, 1, 1) + datetime.timedelta(days=position)
+    return preferences_from_record({
+        "destination": _DESTINATIONS[position % len(_DESTINATIONS)],
+        "origin": _ORIGINS[position % len(_ORIGINS)],
+        "start_date": start_date.isoformat(),
+        "duration": duration,
+        "travelers": 1 + position % 3,
+        "interests": list(_INTERESTS[position % 3:position % 3 + 2]),
+    })
+
+
+def generate_once(mode, preferences, client, model=DEFAULT_MODEL):
+    """Generate one itinerary; return ``(itinerary, seconds_to_first_event_or_None)``"""
+    if mode == "sectioned":
+        return generate_sectioned_itinerary(preferences, model, DEFAULT_TEMPERATURE, client=client), None
+    if mode == "stream":
+        started = time.perf_counter()
+        first_event = None
+        itinerary = None
+        for event in stream_travel_itinerary(preferences, model, DEFAULT_TEMPERATURE, client=client):
+            if first_event is None:
+                first_event = time.perf_counter() - started
+            if event.key == ITINERARY_COMPLETE:
+                itinerary = event.value
+        return itinerary, first_event
+    return generate_travel_itinerary(preferences, model, DEFAULT_TEMPERATURE, client=client), None
+
+
+def _make_client(server, sessions):
+    return LLMClient(api_key="benchmark", base_url=server.base_url, max_connections=max(10, sessions * 4),
+                     backoff_base=0.05, backoff_max=1.0)
+
+
+def run_load(server, mode, sessions, requests, duration=5, model=DEFAULT_MODEL):
+    """Run ``requests`` generations with ``sessions`` concurrent callers and summarize them"""
+    server.reset_stats()
+    client = _make_client(server, sessions)
+    latencies, first_events = [], []
+    outcomes = {"ok": 0, "errors": 0, "parse_failures": 0, "section_errors": 0}
+
+    def one(position):
+        started = time.perf_counter()
+        itinerary, first_event = generate_once(mode, bench_preferences(position, duration), client, model)
+        return itinerary, time.perf_counter() - started, first_event
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        for itinerary, elapsed, first_event in executor.map(one, range(requests)):
+            latencies.append(elapsed)
+            if first_event is not None:
+                first_events.append(first_event)
+            if "error" in itinerary:
+                outcomes["errors"] += 1
+                if itinerary.get("error", "").startswith("Could not parse"):
+                    outcomes["parse_failures"] += 1
+            else:
+                outcomes["ok"] += 1
+                if itinerary.get("section_errors"):
+                    outcomes["section_errors"] += 1
+    wall = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "requests": requests,
+        "trip_days": duration,
+        "wall_seconds": round(wall, 4),
+        "throughput_per_second": round(requests / wall, 4) if wall else None,
+        "latency_seconds": percentiles(latencies),
+        "first_event_seconds": percentiles(first_events),
+        **outcomes,
+        "error_rate": round(outcomes["errors"] / requests, 4),
+        "parse_failure_rate": round(outcomes["parse_failures"] / requests, 4),
+        "server": server.stats(),
+        "client": client.stats(),
+    }
+
+
+def _max_rss_kib():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_memory(server, mode, requests, duration=5, model=DEFAULT_MODEL):
+    """Measure peak traced Python allocations for sequential generations"""
+    client = _make_client(server, 1)
+    tracemalloc.start()
+    try:
+        for position in range(requests):
+            generate_once(mode, bench_preferences(10_000 + position, duration), client, model)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "traced_current_kib": current // 1024,
+        "traced_peak_kib": peak // 1024,
+        "max_rss_kib": _max_rss_kib(),
+    }
+
+
+def run_rendering(server, days_list, runs):
+    """Time full reruns of the Streamlit results page with a generated itinerary in session state"""
+    from streamlit.testing.v1 import AppTest
+
+    client = _make_client(server, 1)
+    results = []
+    for days in days_list:
+        preferences = bench_preferences(20_000 + days, days)
+        itinerary, _ = generate_once("single", preferences, client)
+        app = AppTest.from_file(APP_PATH, default_timeout=60)
+        app.session_state["preferences_collected"] = True
+        app.session_state["user_preferences"] = preferences
+        app.session_state["ai_recommendations"] = itinerary
+        app.run()  # warm-up: imports and cached resources
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - started)
+        results.append({
+            "trip_days": days,
+            "activities": len(itinerary.get("activities", [])),
+            "exceptions": len(app.exception),
+            "render_seconds": percentiles(timings),
+        })
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP_PATH), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark itinerary generation against a local mock server.")
+    parser.add_argument("--mode", choices=["single", "sectioned", "stream"], default="single",
+                        help="Generation path to benchmark")
+    parser.add_argument("--sessions", type=_int_list, default=[1, 4, 16],
+                        help="Comma-separated concurrent session counts (default: 1,4,16)")
+    parser.add_argument("--requests", type=int, default=32, help="Generations per session count")
+    parser.add_argument("--trip-days", type=int, default=5, help="Trip length of the generated itineraries")
+    parser.add_argument("--memory-requests", type=int, default=8,
+                        help="Sequential generations traced for memory (0 to skip)")
+    parser.add_argument("--render-days", type=_int_list, default=[3, 7, 14],
+                        help="Trip lengths for the rendering benchmark (empty to skip)")
+    parser.add_argument("--render-runs", type=int, default=5, help="Timed reruns per rendered itinerary")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("-o", "--output", default="-", help="JSON results file (default: stdout)")
+    add_mock_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+    }
+    with MockLLMServer(config_from_args(args)) as server:
+        results["load"] = []
+        for sessions in args.sessions:
+            summary = run_load(server, args.mode, max(1, sessions), args.requests, args.trip_days, args.model)
+            results["load"].append(summary)
+            latency = summary["latency_seconds"] or {}
+            print(f"{args.mode} x{sessions}: p50 {latency.get('p50')}s p99 {latency.get('p99')}s, "
+                  f"{summary['throughput_per_second']}/s, errors {summary['error_rate']:.1%}, "
+                  f"parse failures {summary['parse_failure_rate']:.1%}", file=sys.stderr)
+        if args.memory_requests:
+            results["memory"] = run_memory(server, args.mode, args.memory_requests, args.trip_days, args.model)
+            print(f"memory: peak {results['memory']['traced_peak_kib']} KiB traced", file=sys.stderr)
+        if args.render_days:
+            results["rendering"] = run_rendering(server, args.render_days, args.render_runs)
+            for row in results["rendering"]:
+                print(f"render {row['trip_days']} days: p50 {row['render_seconds']['p50']}s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
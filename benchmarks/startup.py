@@ -0,0 +1,145 @@
+"""Cold-start benchmark: import time of the core and the page, and first-render latency.
+
+Every measurement runs in a fresh interpreter, so nothing is imported or
+cached beforehand, as in a newly started container:
+
+* the import time of ``travel_core``, the generator, the Streamlit-free
+  request path (``travel_core.planner``) and the page components
+  (``travel_ui``), with the heavy dependencies each of them pulled in,
+* the latency of the first render of the page (script imports plus the first
+  run, through Streamlit's ``AppTest``) and of a warm rerun.
+
+The import of ``travel_core.planner`` has a budget; the run exits with status
+1 when its median exceeds it or when it pulls in Streamlit, pandas or the
+OpenAI SDK::
+
+    python -m benchmarks.startup --runs 5 -o startup.json
+    python -m benchmarks.startup --import-budget-ms 100
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmarks.run import APP_PATH, _git_commit, percentiles
+
+ROOT = os.path.dirname(APP_PATH)
+IMPORTED_MODULES = ("travel_core", "travel_core.generator", "travel_core.planner", "travel_ui")
+BUDGETED_MODULE = "travel_core.planner"
+HEAVY_MODULES = ("streamlit", "pandas", "numpy", "openai")
+DEFAULT_IMPORT_BUDGET_MS = float(os.environ.get("TRAVEL_IMPORT_BUDGET_MS", 150))
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+_RENDER_SCRIPT = """
+import json, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=60)
+started = time.perf_counter()
+app.run()
+first = time.perf_counter() - started
+started = time.perf_counter()
+app.run()
+rerun = time.perf_counter() - started
+print(json.dumps({{"first_render": first, "rerun": rerun, "exceptions": len(app.exception)}}))
+"""
+
+
+def _run_fresh(code):
+    """Run ``code`` in a new interpreter from the repository root and return its JSON output"""
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT,
+                               timeout=300, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module, runs):
+    """Import ``module`` in ``runs`` fresh interpreters; return its timings and heavy dependencies"""
+    samples = [_run_fresh(_IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)) for _ in range(runs)]
+    return {
+        "module": module,
+        "import_seconds": percentiles([sample["seconds"] for sample in samples]),
+        "heavy_modules": samples[-1]["heavy"],
+    }
+
+
+def measure_first_render(runs):
+    """Time the first render of the page in ``runs`` fresh interpreters, plus a warm rerun each"""
+    samples = [_run_fresh(_RENDER_SCRIPT.format(app=APP_PATH)) for _ in range(runs)]
+    return {
+        "first_render_seconds": percentiles([sample["first_render"] for sample in samples]),
+        "rerun_seconds": percentiles([sample["rerun"] for sample in samples]),
+        "exceptions": max(sample["exceptions"] for sample in samples),
+    }
+
+
+def check_budget(imports, budget_ms):
+    """Return the budget violations of the Streamlit-free request path"""
+    row = next(row for row in imports if row["module"] == BUDGETED_MODULE)
+    problems = []
+    p50_ms = row["import_seconds"]["p50"] * 1000
+    if p50_ms > budget_ms:
+        problems.append(f"importing {BUDGETED_MODULE} took {p50_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    eager = [name for name in row["heavy_modules"] if name != "numpy"]
+    if eager:
+        problems.append(f"importing {BUDGETED_MODULE} loaded {', '.join(eager)}")
+    return problems
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure cold-start import time and first-render latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help=f"Median import budget of {BUDGETED_MODULE} (default: TRAVEL_IMPORT_BUDGET_MS or 150)")
+    parser.add_argument("--skip-render", action="store_true", help="Only measure imports")
+    parser.add_argument("-o", "--output", default="-", help="JSON results file (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    runs = max(1, args.runs)
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "imports": [],
+    }
+    for module in IMPORTED_MODULES:
+        row = measure_import(module, runs)
+        results["imports"].append(row)
+        print(f"import {module}: p50 {row['import_seconds']['p50'] * 1000:.0f} ms"
+              f" ({', '.join(row['heavy_modules']) or 'no heavy dependencies'})", file=sys.stderr)
+    if not args.skip_render:
+        results["rendering"] = measure_first_render(runs)
+        print(f"first render: p50 {results['rendering']['first_render_seconds']['p50'] * 1000:.0f} ms, "
+              f"rerun p50 {results['rendering']['rerun_seconds']['p50'] * 1000:.0f} ms", file=sys.stderr)
+    results["budget"] = {"module": BUDGETED_MODULE, "import_budget_ms": args.import_budget_ms,
+                         "violations": check_budget(results["imports"], args.import_budget_ms)}
+    for problem in results["budget"]["violations"]:
+        print(f"over budget: {problem}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    return 1 if results["budget"]["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.mock_server import build_answer, load_recordings
+
+
+@pytest.fixture
+def make_preferences():
+    """Factory for a complete trip request; keyword arguments replace single fields"""
+    def make(**overrides):
+        prefs = {
+            "destination": "Paris",
+            "origin": "New York",
+            "start_date": datetime.date(2030, 5, 10),
+            "end_date": datetime.date(2030, 5, 13),
+            "duration": 3,
+            "flight_budget": 800,
+            "hotel_budget": 150,
+            "travelers": 1,
+            "accommodation_type": "Hotel",
+            "location_preference": "",
+            "interests": ["Food & Dining"],
+            "model_choice": "gpt-4.1-mini",
+            "creativity_level": 0.7,
+        }
+        prefs.update(overrides)
+        return prefs
+    return make
+
+
+class FakeOpenAI:
+    """Stands in for the OpenAI SDK client, answering from the mock server's recorded itineraries.
+
+    ``tweak(request, answer)``, when set, may change the answer to a request.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.requests = []
+        self.tweak = None
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        answer = build_answer(self.recording, kwargs["messages"])
+        if self.tweak is not None:
+            answer = self.tweak(kwargs, answer)
+        content = json.dumps(answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.fixture
+def fake_openai():
+    return FakeOpenAI(load_recordings()[0])
@@ -0,0 +1,75 @@
+import io
+import json
+
+import pytest
+
+from travel_core import batch
+from travel_core.batch import completed_ids, main, run_batch
+from travel_core.generator import DEFAULT_TEMPERATURE, preferences_from_record
+
+
+def test_record_fields_fall_back_to_the_app_defaults():
+    preferences = preferences_from_record({"destination": "Paris", "origin": "Boston", "start_date": "2030-05-10",
+                                           "interests": "Food & Dining; Art & Museums"})
+
+    assert preferences["duration"] == 5
+    assert preferences["interests"] == ["Food & Dining", "Art & Museums"]
+    assert preferences["creativity_level"] == DEFAULT_TEMPERATURE
+
+
+@pytest.mark.parametrize("value, expected", [(0, 0.0), ("0", 0.0), (0.0, 0.0), ("", DEFAULT_TEMPERATURE),
+                                             (None, DEFAULT_TEMPERATURE), ("0.3", 0.3)])
+def test_zero_creativity_is_kept(value, expected):
+    record = {"destination": "Paris", "origin": "Boston", "creativity_level": value}
+
+    assert preferences_from_record(record)["creativity_level"] == expected
+
+
+def test_invalid_records_are_reported_not_raised():
+    with pytest.raises(ValueError, match="origin"):
+        preferences_from_record({"destination": "Paris"})
+
+    output = io.StringIO()
+    summary = run_batch([{"destination": "Paris"}], output)
+
+    assert summary["invalid"] == 1
+    assert json.loads(output.getvalue())["status"] == "invalid"
+
+
+def test_an_unexpected_failure_does_not_stop_the_run(monkeypatch, fake_openai):
+    generate_one = batch._generate_one
+
+    def flaky(position, record, *args):
+        if record["id"] == "boom":
+            raise RuntimeError("worker crashed")
+        return generate_one(position, record, *args)
+
+    monkeypatch.setattr(batch, "_generate_one", flaky)
+    records = [{"id": "boom", "destination": "Paris", "origin": "Boston"},
+               {"id": "fine", "destination": "Rome", "origin": "Boston"}]
+    output = io.StringIO()
+
+    summary = run_batch(records, output, client=fake_openai, concurrency=1)
+
+    rows = {row["id"]: row for row in map(json.loads, output.getvalue().splitlines())}
+    assert summary["error"] == 1 and summary["ok"] == 1 and summary["total"] == 2
+    assert rows["boom"]["error"] == "RuntimeError: worker crashed"
+    assert rows["fine"]["status"] == "ok"
+
+
+def test_rerunning_into_the_same_output_resumes(tmp_path, monkeypatch, fake_openai):
+    records = tmp_path / "routes.jsonl"
+    records.write_text("\n".join(json.dumps({"id": name, "destination": name, "origin": "Boston"})
+                                 for name in ("Paris", "Rome", "Lisbon")) + "\n")
+    output = tmp_path / "itineraries.jsonl"
+    output.write_text(json.dumps({"id": "Paris", "status": "ok"}) + "\n"
+                      + json.dumps({"id": "Rome", "status": "error"}) + "\n"
+                      + '{"id": "Lisbon", "status": "o')
+    monkeypatch.setattr(batch.LLMClient, "from_env", classmethod(lambda cls, **kwargs: fake_openai))
+
+    assert completed_ids(str(output)) == {"Paris"}
+    assert main([str(records), "-o", str(output), "--no-cache", "--index", str(tmp_path / "none.sqlite3")]) == 0
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()[3:]]
+    assert sorted(row["id"] for row in rows) == ["Lisbon", "Rome"]
+    assert completed_ids(str(output)) == {"Paris", "Rome", "Lisbon"}
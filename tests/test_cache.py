@@ -0,0 +1,61 @@
+from travel_core.cache import ItineraryCache, itinerary_cache_key
+from travel_core.generator import generate_travel_itinerary
+
+
+def test_key_ignores_formatting_and_interest_order(make_preferences):
+    key = itinerary_cache_key(make_preferences(interests=["Food & Dining", "Art & Museums"]), "gpt-4.1-mini", 0.7)
+    same = make_preferences(destination="  paris ", interests=["Art & Museums", "Food & Dining"])
+
+    assert itinerary_cache_key(same, "gpt-4.1-mini", 0.70) == key
+    assert itinerary_cache_key(make_preferences(duration=4), "gpt-4.1-mini", 0.7) != key
+
+
+def test_key_uses_the_model_and_temperature_passed_in(make_preferences):
+    key = itinerary_cache_key(make_preferences(), "gpt-4.1-mini", 0.7)
+
+    assert itinerary_cache_key(make_preferences(model_choice="gpt-4o", creativity_level=0.1),
+                               "gpt-4.1-mini", 0.7) == key
+    assert itinerary_cache_key(make_preferences(), "gpt-4o", 0.7) != key
+    assert itinerary_cache_key(make_preferences(), "gpt-4.1-mini", 0.2) != key
+
+
+def test_entries_survive_a_restart_on_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ItineraryCache(path).set("key", {"hotel": {"name": "Caron"}})
+
+    cache = ItineraryCache(path)
+    assert cache.get("key") == {"hotel": {"name": "Caron"}}
+    assert cache.get("key") == {"hotel": {"name": "Caron"}}
+    assert cache.stats()["disk_hits"] == 1 and cache.stats()["memory_hits"] == 1
+
+
+def test_callers_get_copies():
+    cache = ItineraryCache(None)
+    cache.set("key", {"activities": []})
+    cache.get("key")["activities"].append("Louvre")
+
+    assert cache.get("key") == {"activities": []}
+
+
+def test_expired_and_evicted_entries_are_misses(tmp_path):
+    expired = ItineraryCache(str(tmp_path / "expired.sqlite3"), ttl_seconds=-1)
+    expired.set("key", {})
+    assert expired.get("key") is None
+
+    small = ItineraryCache(None, max_memory_entries=2)
+    for key in ("a", "b", "c"):
+        small.set(key, {})
+    assert small.get("a") is None
+    assert small.stats()["evictions"] == 1
+
+
+def test_a_repeated_request_skips_the_completion(make_preferences, fake_openai):
+    cache = ItineraryCache(None)
+    first = generate_travel_itinerary(make_preferences(), "gpt-4.1-mini", client=fake_openai, cache=cache)
+    calls = len(fake_openai.requests)
+
+    again = generate_travel_itinerary(make_preferences(), "gpt-4.1-mini", client=fake_openai, cache=cache)
+
+    assert "error" not in first
+    assert again == first
+    assert len(fake_openai.requests) == calls
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from travel_core.client import LLMClient
+
+
+def test_from_env_falls_back_to_environment_for_none_limits(monkeypatch):
+    monkeypatch.setenv("OPENAI_RPM", "500")
+    monkeypatch.setenv("OPENAI_TPM", "200000")
+    client = LLMClient.from_env("test-key", requests_per_minute=None, tokens_per_minute=None, sdk_client=object())
+    assert client.limiter.requests is not None and client.limiter.requests.capacity == 500
+    assert client.limiter.tokens is not None and client.limiter.tokens.capacity == 200000
+
+
+def test_from_env_prefers_explicit_limits(monkeypatch):
+    monkeypatch.setenv("OPENAI_RPM", "500")
+    client = LLMClient.from_env("test-key", requests_per_minute=60, sdk_client=object())
+    assert client.limiter.requests.capacity == 60
+
+
+def test_every_retry_waits_on_the_rate_limiter(fake_openai):
+    failures = iter([TimeoutError("read timed out"), TimeoutError("read timed out")])
+
+    class FlakyCompletions:
+        def create(self, **kwargs):
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return fake_openai.chat.completions.create(**kwargs)
+
+    class CountingLimiter:
+        acquired = 0
+
+        def acquire(self, tokens):
+            self.acquired += 1
+
+        def settle(self, estimated, actual):
+            pass
+
+    flaky = SimpleNamespace(chat=SimpleNamespace(completions=FlakyCompletions()))
+    client = LLMClient(sdk_client=flaky, max_retries=3, sleep=lambda delay: None)
+    client.limiter = CountingLimiter()
+
+    client.chat.completions.create(model="gpt-4.1-mini", messages=[{"role": "user", "content": "Paris"}])
+
+    assert client.limiter.acquired == 3
+    assert client.stats()["attempts"] == 3
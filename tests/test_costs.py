@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+import pytest
+
+from travel_core.costs import apply_cost_breakdown, budget_overruns, estimate_costs, parse_price
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("$650", Decimal("650.00")),
+    ("USD 1,200", Decimal("1200.00")),
+    ("$120-150 per night", Decimal("135.00")),
+    ("$20 to $30", Decimal("25.00")),
+    ("Free", Decimal("0.00")),
+    ("included in the pass", Decimal("0.00")),
+    (45.5, Decimal("45.50")),
+    ("Varies", None),
+    (None, None),
+])
+def test_parse_price(value, expected):
+    assert parse_price(value) == expected
+
+
+def itinerary():
+    return {
+        "flights": {"price": "$600"},
+        "hotel": {"price_per_night": "$140-160"},
+        "activities": [{"day": 1, "estimated_cost": "$25"}, {"day": 2, "estimated_cost": "Free"},
+                       {"day": 3, "estimated_cost": "about $40"}, "not an activity"],
+        "daily_food_budget": "$60",
+        "transportation_local": "$80",
+    }
+
+
+def test_totals_are_computed_locally(make_preferences):
+    costs = estimate_costs(itinerary(), make_preferences(travelers=2), "$60", "$80")
+
+    assert costs["flights_total"] == Decimal("1200.00")
+    assert costs["accommodation_total"] == Decimal("450.00")
+    assert costs["activities_estimated"] == Decimal("130.00")
+    assert costs["total_estimated"] == Decimal("1200") + 450 + 130 + 60 * 3 * 2 + 80
+
+
+def test_missing_hotel_rate_falls_back_to_the_nightly_budget(make_preferences):
+    costs = estimate_costs({"hotel": {"price_per_night": "Ask the front desk"}}, make_preferences())
+
+    assert costs["accommodation_total"] == Decimal("450.00")
+
+
+def test_flight_budget_covers_the_whole_party(make_preferences):
+    assert budget_overruns(itinerary(), make_preferences(travelers=1, flight_budget=800, hotel_budget=150)) == []
+
+    overruns = budget_overruns(itinerary(), make_preferences(travelers=2, flight_budget=1000, hotel_budget=120))
+
+    assert overruns == [
+        {"item": "flights", "budget": "$1,000", "estimate": "$1,200", "over_by": "$200"},
+        {"item": "hotel per night", "budget": "$120", "estimate": "$150", "over_by": "$30"},
+    ]
+
+
+def test_apply_cost_breakdown_moves_the_model_estimates_into_the_breakdown(make_preferences):
+    result = apply_cost_breakdown(itinerary(), make_preferences())
+
+    assert "daily_food_budget" not in result and "transportation_local" not in result
+    assert result["cost_breakdown"]["daily_food_budget"] == "$60"
+    assert result["cost_breakdown"]["total_estimated"] == "$1,375"
+    # Recomputing keeps the model's estimates from the existing breakdown
+    assert apply_cost_breakdown(result, make_preferences())["cost_breakdown"] == result["cost_breakdown"]
@@ -0,0 +1,16 @@
+from travel_core.destination_index import DestinationIndex
+
+
+def paris(*routes):
+    return {"destination": "Paris", "country": "France", "tips": ["Buy a Navigo pass"],
+            "routes": [{"origin": origin, "airlines": [airline], "typical_price": "$650"} for origin, airline in routes]}
+
+
+def test_reindexing_a_destination_drops_routes_it_no_longer_lists(tmp_path):
+    index = DestinationIndex(str(tmp_path / "destinations.sqlite3"))
+    index.upsert_destination(paris(("New York", "Air France"), ("Boston", "Delta")))
+
+    index.upsert_destination(paris(("New York", "United")))
+
+    assert index.lookup("Paris", origin="New York")["airlines"] == ["United"]
+    assert index.lookup("Paris", origin="Boston")["airlines"] == []
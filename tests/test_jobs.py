@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from travel_core.jobs import CANCELLED, DONE, FAILED, FINISHED_STATES, QUEUED, RUNNING, JobQueue, QueueFull
+
+
+def wait_for_state(queue, job_id, states, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.status(job_id)["state"] not in states:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+    return queue.status(job_id)
+
+
+def blocking_task(release, started=None):
+    def task(job):
+        if started is not None:
+            started.set()
+        release.wait(5)
+        return "blocked"
+    return task
+
+
+def test_result_and_progress_of_a_finished_job():
+    queue = JobQueue(max_workers=1)
+
+    def task(job):
+        job.report("Writing your itinerary...", sections=2)
+        return {"destination": "Paris"}
+
+    job_id = queue.submit(task, destination="Paris")
+    status = wait_for_state(queue, job_id, FINISHED_STATES)
+
+    assert status["state"] == DONE
+    assert status["progress"] == {"message": "Writing your itinerary...", "sections": 2}
+    assert status["destination"] == "Paris"
+    assert queue.result(job_id) == {"destination": "Paris"}
+
+
+def test_a_failed_task_records_its_error():
+    queue = JobQueue(max_workers=1)
+
+    def task(job):
+        raise ValueError("bad response")
+
+    job_id = queue.submit(task)
+    status = wait_for_state(queue, job_id, FINISHED_STATES)
+
+    assert status["state"] == FAILED
+    assert status["error"] == "ValueError: bad response"
+    assert queue.result(job_id) is None
+
+
+def test_submit_pushes_back_when_the_queue_is_full():
+    queue = JobQueue(max_workers=1, max_queued=1)
+    release = threading.Event()
+    started = threading.Event()
+    running = queue.submit(blocking_task(release, started))
+    started.wait(5)
+    waiting = queue.submit(blocking_task(release))
+
+    with pytest.raises(QueueFull):
+        queue.submit(blocking_task(release))
+
+    assert queue.status(waiting)["state"] == QUEUED
+    assert queue.status(waiting)["position"] == 1
+    assert queue.stats()["rejected"] == 1
+    release.set()
+    wait_for_state(queue, running, FINISHED_STATES)
+    wait_for_state(queue, waiting, FINISHED_STATES)
+    # Room again once the backlog drained
+    wait_for_state(queue, queue.submit(blocking_task(release)), FINISHED_STATES)
+
+
+def test_a_key_already_in_flight_returns_the_same_job():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    first = queue.submit(blocking_task(release), key="session:paris")
+
+    assert queue.submit(blocking_task(release), key="session:paris") == first
+    assert queue.stats()["deduplicated"] == 1
+    release.set()
+    wait_for_state(queue, first, FINISHED_STATES)
+    # Once finished, the same request starts a new job
+    assert queue.submit(blocking_task(release), key="session:paris") != first
+
+
+def test_cancel_drops_a_queued_job_before_it_runs():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+    ran = []
+    running = queue.submit(blocking_task(release, started))
+    started.wait(5)
+    queued = queue.submit(lambda job: ran.append(job.id), key="session:rome")
+
+    assert queue.cancel(queued)
+    assert queue.status(queued)["state"] == CANCELLED
+    # The cancelled key no longer blocks a new submission
+    assert queue.submit(lambda job: None, key="session:rome") != queued
+    release.set()
+    wait_for_state(queue, running, FINISHED_STATES)
+    assert ran == []
+
+
+def test_cancel_asks_a_running_job_to_stop_and_discards_its_result():
+    queue = JobQueue(max_workers=1)
+    started = threading.Event()
+
+    def task(job):
+        started.set()
+        job.cancelled.wait(5)
+        return "partial plan"
+
+    job_id = queue.submit(task)
+    started.wait(5)
+    assert queue.status(job_id)["state"] == RUNNING
+
+    assert queue.cancel(job_id)
+    status = wait_for_state(queue, job_id, FINISHED_STATES)
+    assert status["state"] == CANCELLED
+    assert queue.result(job_id) is None
+    assert not queue.cancel(job_id)
+    assert queue.cancel("unknown") is False
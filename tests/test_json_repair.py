@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from travel_core.json_repair import loads_tolerant, repair_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"flights": {"airline": "Air France"}, "activities": [{"day": 1}, {"day": 2',
+     {"flights": {"airline": "Air France"}, "activities": [{"day": 1}, {"day": 2}]}),
+    ('{"hotel": {"name": "Hôtel Car', {"hotel": {"name": "Hôtel Car"}}),
+    ('{"hotel": {"name": "Caron"}, "activities":', {"hotel": {"name": "Caron"}}),
+    ('{"hotel": {"name": "Caron"}, "activ', {"hotel": {"name": "Caron"}}),
+    ('{"tip": "end with a backslash \\', {"tip": "end with a backslash "}),
+    ('{"total": 12, "ok": tr', {"total": 12}),
+])
+def test_truncated_output_is_closed_at_the_last_complete_value(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_trailing_commas_are_removed():
+    text = '{"interests": ["Food", "Art",], "hotel": {"name": "Caron",},}'
+
+    assert json.loads(repair_json(text)) == {"interests": ["Food", "Art"], "hotel": {"name": "Caron"}}
+
+
+def test_unescaped_quotes_and_newlines_inside_strings():
+    text = '{"tip": "Say "merci" when\nentering shops", "day": 1}'
+
+    assert json.loads(repair_json(text)) == {"tip": 'Say "merci" when\nentering shops', "day": 1}
+
+
+def test_loads_tolerant_reports_whether_a_repair_was_needed():
+    assert loads_tolerant('Here is your plan: {"day": 1}') == ({"day": 1}, False)
+    assert loads_tolerant('```json\n{"day": 1,}\n```') == ({"day": 1}, True)
+
+
+def test_text_without_an_object_is_rejected():
+    with pytest.raises(ValueError):
+        loads_tolerant("Sorry, I cannot help with that.")
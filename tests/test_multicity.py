@@ -0,0 +1,85 @@
+import datetime
+
+import pytest
+
+from travel_core import batch
+from travel_core.generator import preferences_from_record
+from travel_core.multicity import generate_multi_city_itinerary, parse_legs, plan_legs
+
+
+def trip():
+    return preferences_from_record({"origin": "New York", "legs": "Paris:2|Rome:3", "start_date": "2030-05-10",
+                                    "flight_budget": 1500, "hotel_budget": 150})
+
+
+def test_parse_legs_reads_text_and_records():
+    assert parse_legs("Paris, 3\nRome: 4") == [{"destination": "Paris", "nights": 3},
+                                                {"destination": "Rome", "nights": 4}]
+    assert parse_legs([{"city": " Lisbon ", "nights": "2"}]) == [{"destination": "Lisbon", "nights": 2}]
+    with pytest.raises(ValueError):
+        parse_legs("Paris for a while")
+    with pytest.raises(ValueError):
+        parse_legs([{"destination": "Rome", "nights": 0}])
+
+
+def test_record_with_legs_spans_every_stop():
+    preferences = trip()
+
+    assert preferences["destination"] == "Paris → Rome"
+    assert preferences["duration"] == 5
+    assert preferences["end_date"] == datetime.date(2030, 5, 15)
+    with pytest.raises(ValueError):
+        preferences_from_record({"origin": "New York", "legs": "Paris:2"})
+
+
+def test_stops_are_scheduled_back_to_back():
+    legs = plan_legs(trip())
+
+    assert [(leg["start_date"].day, leg["end_date"].day, leg["first_day"], leg["last_day"]) for leg in legs] == [
+        (10, 12, 1, 2), (12, 15, 3, 5)]
+
+
+def test_itinerary_has_a_hotel_per_stop_and_transport_per_hop(fake_openai):
+    itinerary = generate_multi_city_itinerary(trip(), client=fake_openai)
+
+    assert "error" not in itinerary
+    assert [leg["destination"] for leg in itinerary["legs"]] == ["Paris", "Rome"]
+    assert all(leg["hotel"] for leg in itinerary["legs"])
+    assert [(hop["from"], hop["to"], hop["date"]) for hop in itinerary["transport"]] == [
+        ("New York", "Paris", "2030-05-10"), ("Paris", "Rome", "2030-05-12"), ("Rome", "New York", "2030-05-15")]
+    assert [(activity["day"], activity["destination"]) for activity in itinerary["activities"]] == [
+        (1, "Paris"), (2, "Paris"), (3, "Rome"), (4, "Rome"), (5, "Rome")]
+    # Each hop is offered an even share of the flight budget
+    hop_prompts = [request["messages"][-1]["content"] for request in fake_openai.requests
+                   if "Recommend the best way to travel" in request["messages"][-1]["content"]]
+    assert len(hop_prompts) == 3 and all("$500" in prompt for prompt in hop_prompts)
+    assert itinerary["cost_breakdown"]["accommodation_total"] == "$725"
+
+
+def test_failed_sections_are_reported_not_raised(fake_openai):
+    def no_rome_hotel(request, answer):
+        if "Rome" in request["messages"][-1]["content"] and "hotel" in answer:
+            return {}
+        return answer
+
+    fake_openai.tweak = no_rome_hotel
+
+    itinerary = generate_multi_city_itinerary(trip(), client=fake_openai)
+
+    assert itinerary["legs"][1]["hotel"] == {}
+    assert any(error.startswith("hotel failed") for error in itinerary["section_errors"])
+
+
+def test_batch_uses_the_section_worker_limit_for_multi_city_records(monkeypatch):
+    seen = {}
+
+    def fake_generate(preferences, model, temperature, max_workers, **kwargs):
+        seen["max_workers"] = max_workers
+        return {"activities": []}
+
+    monkeypatch.setattr(batch, "generate_multi_city_itinerary", fake_generate)
+
+    batch._generate_one(0, {"origin": "New York", "legs": "Paris:2|Rome:3"}, "single", "gpt-4.1-mini", 0.7,
+                        None, None, None, 2, None, None)
+
+    assert seen["max_workers"] == 2
@@ -0,0 +1,124 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from travel_core.jobs import DONE, JobQueue, QueueFull
+from travel_core.planner import plan_itinerary
+from travel_core.prefetch import Prefetcher, drain_stream
+from travel_core.streaming import ITINERARY_COMPLETE, StreamEvent
+from travel_core.tracing import Tracer
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_take_returns_the_running_prefetch():
+    prefetcher = Prefetcher(debounce_seconds=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def task(cancelled):
+        started.set()
+        release.wait(5)
+        return {"destination": "Paris"}
+
+    prefetcher.schedule("paris", task)
+    started.wait(5)
+
+    assert prefetcher.take("rome") is None
+    future = prefetcher.take("paris")
+    release.set()
+    assert future.result(5) == {"destination": "Paris"}
+    assert prefetcher.stats()["served"] == 1
+
+
+def test_take_during_the_debounce_period_cancels_the_prefetch():
+    prefetcher = Prefetcher(debounce_seconds=60)
+    ran = []
+    prefetcher.schedule("paris", ran.append)
+
+    assert prefetcher.take("paris") is None
+    assert prefetcher.take("paris") is None
+    assert ran == []
+    assert prefetcher.stats()["cancelled"] == 1
+
+
+def test_rescheduling_the_same_key_is_a_no_op():
+    prefetcher = Prefetcher(debounce_seconds=60)
+    prefetcher.schedule("paris", lambda cancelled: None)
+    prefetcher.schedule("paris", lambda cancelled: None)
+
+    assert prefetcher.stats()["scheduled"] == 1
+    prefetcher.cancel()
+
+
+def test_changed_inputs_cancel_the_running_prefetch():
+    prefetcher = Prefetcher(debounce_seconds=0)
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def task(cancelled):
+        started.set()
+        cancelled.wait(5)
+        stopped.set()
+
+    prefetcher.schedule("paris", task)
+    started.wait(5)
+    prefetcher.schedule("rome", lambda cancelled: "rome")
+
+    assert stopped.wait(5)
+    assert prefetcher.take("paris") is None
+    wait_until(lambda: prefetcher.take("rome") is not None)
+    assert prefetcher.take("rome").result(5) == "rome"
+    assert prefetcher.stats()["cancelled"] == 1
+
+
+def test_drain_stream_returns_the_final_itinerary():
+    events = iter([StreamEvent("flights", {}, False), StreamEvent(ITINERARY_COMPLETE, {"hotel": {}}, False)])
+    stream = (event for event in events)
+
+    assert drain_stream(stream, threading.Event()) == {"hotel": {}}
+
+
+def test_drain_stream_closes_the_stream_when_cancelled():
+    closed = []
+    cancelled = threading.Event()
+
+    def stream():
+        try:
+            yield StreamEvent("flights", {}, False)
+            cancelled.set()
+            yield StreamEvent("hotel", {}, False)
+            yield StreamEvent(ITINERARY_COMPLETE, {}, False)
+        finally:
+            closed.append(True)
+
+    assert drain_stream(stream(), cancelled) is None
+    assert closed == [True]
+
+
+def test_a_job_claims_the_prefetch_only_once_the_queue_accepts_it(make_preferences):
+    prefetcher = Prefetcher(debounce_seconds=0)
+    prefetcher.schedule("paris", lambda cancelled: {"destination": "Paris"})
+    wait_until(lambda: prefetcher.stats()["completed"] == 1)
+    task = partial(plan_itinerary, preferences=make_preferences(), previous_preferences=None,
+                   previous_recommendations=None, model="gpt-4.1-mini", temperature=0.7, trace_mode="single",
+                   auto_routing=False, parallel=False, max_workers=4, stream=False, replan=False, client=None,
+                   cache=None, index=None, flight=None, semantic=None, router=None, tracer=Tracer(),
+                   optimize_routes=False, prefetch=partial(prefetcher.take, "paris"))
+
+    with pytest.raises(QueueFull):
+        JobQueue(max_queued=0).submit(task)
+    assert prefetcher.stats()["served"] == 0
+
+    queue = JobQueue(max_workers=1)
+    job_id = queue.submit(task)
+    wait_until(lambda: queue.status(job_id)["state"] == DONE)
+    assert queue.result(job_id) == {"destination": "Paris"}
+    assert prefetcher.stats()["served"] == 1
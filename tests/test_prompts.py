@@ -0,0 +1,66 @@
+from travel_core.generator import generate_travel_itinerary
+from travel_core.prompts import (
+    FULL_SECTIONS,
+    MAX_MAX_TOKENS,
+    MIN_MAX_TOKENS,
+    TokenAccount,
+    build_itinerary_messages,
+    max_output_tokens,
+    max_tokens_for,
+    system_prompt,
+)
+
+
+def test_budget_grows_with_the_trip_length():
+    assert MIN_MAX_TOKENS <= max_tokens_for(2) < max_tokens_for(10) < max_tokens_for(30)
+    assert max_tokens_for(5, ("flights", "hotel")) == max_tokens_for(30, ("flights", "hotel"))
+
+
+def test_budget_stays_within_the_models_output_limit():
+    assert max_tokens_for(60, FULL_SECTIONS, "gpt-3.5-turbo") == 4096
+    assert max_tokens_for(90, FULL_SECTIONS, "gpt-4o-2024-08-06") == MAX_MAX_TOKENS
+    assert max_tokens_for(90, FULL_SECTIONS, "some-new-model") == MAX_MAX_TOKENS
+    assert max_tokens_for(3, FULL_SECTIONS, "gpt-3.5-turbo") == max_tokens_for(3)
+
+
+def test_longest_model_prefix_wins():
+    assert max_output_tokens("gpt-4") == 8192
+    assert max_output_tokens("gpt-4-turbo-2024-04-09") == 4096
+    assert max_output_tokens("gpt-4o-mini") == 16384
+
+
+def test_long_trip_on_a_small_model_is_not_over_budgeted(make_preferences, fake_openai):
+    preferences = make_preferences(duration=30, model_choice="gpt-3.5-turbo")
+
+    itinerary = generate_travel_itinerary(preferences, "gpt-3.5-turbo", client=fake_openai)
+
+    assert "error" not in itinerary
+    assert fake_openai.requests[0]["max_tokens"] == 4096
+
+
+def test_static_instructions_are_identical_across_requests(make_preferences):
+    paris = build_itinerary_messages(make_preferences())
+    rome = build_itinerary_messages(make_preferences(destination="Rome"), context="Known areas: Trastevere")
+
+    assert paris[0] == rome[0]
+    assert "Rome" in rome[1]["content"] and "Trastevere" in rome[1]["content"]
+    assert "additional_suggestions" not in system_prompt(("overview", "flights", "hotel", "activities"))
+
+
+def test_token_account_totals_requests_and_usage(make_preferences):
+    class Usage:
+        prompt_tokens = 500
+        completion_tokens = 1200
+        prompt_tokens_details = None
+
+    account = TokenAccount("gpt-4.1-mini")
+    estimated = account.record_request(build_itinerary_messages(make_preferences()), 1500)
+    account.record_usage(Usage())
+    account.record_usage(None)
+
+    usage = account.as_dict()
+    assert usage["requests"] == 1
+    assert usage["prompt_tokens_estimated"] == estimated > 0
+    assert usage["max_tokens_requested"] == 1500
+    assert usage["prompt_tokens"] == 500
+    assert usage["completion_tokens"] == 1200
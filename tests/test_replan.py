@@ -0,0 +1,48 @@
+from travel_core.replan import plan_replan, replan_itinerary
+
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = {}
+
+    def get(self, key):
+        return self.stored.get(key)
+
+    def set(self, key, value):
+        self.stored[key] = value
+
+
+def itinerary():
+    return {
+        "flights": {"airline": "Air France", "price": "$700"},
+        "hotel": {"name": "Hôtel Caron", "price_per_night": "$140"},
+        "activities": [{"day": day, "activity": f"Walk {day}"} for day in (1, 2, 3)],
+        "analysis_reasoning": "",
+        "semantic_match": {"similarity": 0.97},
+        "schedule": {"optimized": True, "moved": 2, "distance_km_before": 9.1, "distance_km_after": 4.2},
+    }
+
+
+def test_model_change_needs_full_regeneration(make_preferences):
+    assert plan_replan(itinerary(), make_preferences(), make_preferences(model_choice="gpt-4o")) is None
+
+
+def test_temperature_change_needs_full_regeneration(make_preferences):
+    assert plan_replan(itinerary(), make_preferences(), make_preferences(creativity_level=0.2)) is None
+
+
+def test_unchanged_plan_is_not_cached_under_a_new_key(make_preferences):
+    cache = RecordingCache()
+    replanned = replan_itinerary(itinerary(), make_preferences(), make_preferences(), cache=cache)
+    assert replanned["replanned"]["sections"] == []
+    assert cache.stored == {}
+
+
+def test_replanned_plan_drops_the_reuse_note(make_preferences):
+    replanned = replan_itinerary(itinerary(), make_preferences(), make_preferences())
+    assert "semantic_match" not in replanned
+
+
+def test_replanned_plan_drops_the_route_stats_of_the_old_schedule(make_preferences):
+    replanned = replan_itinerary(itinerary(), make_preferences(), make_preferences())
+    assert "schedule" not in replanned
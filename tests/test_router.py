@@ -0,0 +1,70 @@
+from travel_core.cache import ItineraryCache
+from travel_core.router import ModelRouter, estimate_cost, quality_problems
+
+CASCADE = ("gpt-4.1-mini", "gpt-4.1")
+
+
+def cheaper_hotel_from_the_strong_model(request, answer):
+    if request["model"] == "gpt-4.1" and "hotel" in answer:
+        answer["hotel"] = dict(answer["hotel"], price_per_night="$95")
+    return answer
+
+
+def test_a_good_first_answer_is_not_escalated(make_preferences, fake_openai):
+    router = ModelRouter(CASCADE)
+
+    itinerary = router.generate(make_preferences(), client=fake_openai)
+
+    assert [step["model"] for step in itinerary["routing"]["steps"]] == ["gpt-4.1-mini"]
+    assert itinerary["routing"]["unresolved"] == {}
+    assert {request["model"] for request in fake_openai.requests} == {"gpt-4.1-mini"}
+    assert router.stats()["escalation_rate"] == 0
+
+
+def test_only_the_failing_section_goes_to_the_stronger_model(make_preferences, fake_openai):
+    fake_openai.tweak = cheaper_hotel_from_the_strong_model
+    router = ModelRouter(CASCADE)
+
+    itinerary = router.generate(make_preferences(hotel_budget=100), client=fake_openai)
+
+    escalated = [request for request in fake_openai.requests if request["model"] == "gpt-4.1"]
+    assert len(escalated) == 1
+    assert "Recommend one real hotel" in escalated[0]["messages"][-1]["content"]
+    assert itinerary["hotel"]["price_per_night"] == "$95"
+    steps = itinerary["routing"]["steps"]
+    assert list(steps[0]["problems"]) == ["hotel"]
+    assert steps[1] == {"model": "gpt-4.1", "sections": ["hotel"], "problems": {}}
+    assert router.stats()["escalated"] == 1
+
+
+def test_unresolved_plans_are_not_cached(make_preferences, fake_openai):
+    cache = ItineraryCache(None)
+    router = ModelRouter(CASCADE)
+
+    itinerary = router.generate(make_preferences(hotel_budget=50), client=fake_openai, cache=cache)
+
+    assert "hotel" in itinerary["routing"]["unresolved"]
+    assert cache.stats()["stores"] == 0
+    assert router.stats()["unresolved"] == 1
+
+
+def test_days_beyond_the_trip_are_dropped_locally(make_preferences, fake_openai):
+    def extra_day(request, answer):
+        answer["activities"].append(dict(answer["activities"][0], day=9))
+        return answer
+
+    fake_openai.tweak = extra_day
+
+    itinerary = ModelRouter(CASCADE).generate(make_preferences(), client=fake_openai)
+
+    assert sorted(activity["day"] for activity in itinerary["activities"]) == [1, 2, 3]
+    assert itinerary["routing"]["steps"][0]["dropped_extra_days"] == 1
+    assert len(itinerary["routing"]["steps"]) == 1
+
+
+def test_quality_checks(make_preferences):
+    itinerary = {"error": "Error generating recommendations: timeout"}
+
+    assert quality_problems(itinerary, make_preferences()) == {"itinerary": itinerary["error"]}
+    assert estimate_cost("gpt-4.1-mini", 1_000_000, 1_000_000) == 2.0
+    assert estimate_cost("unknown-model", 10, 10) is None
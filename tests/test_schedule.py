@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from travel_core.schedule import (
+    Gazetteer,
+    distance_matrix,
+    optimize_itinerary,
+    parse_duration_hours,
+    place_tokens,
+    shortest_tour,
+)
+
+# Two clusters about 6 km apart: around the Louvre (west) and around Bastille/Nation (east)
+PLACES = [
+    ("Louvre", 48.8606, 2.3376),
+    ("Palais Royal", 48.8637, 2.3371),
+    ("Tuileries", 48.8635, 2.3275),
+    ("Place de la Bastille", 48.8532, 2.3692),
+    ("Nation", 48.8483, 2.3959),
+    ("Père Lachaise", 48.8614, 2.3933),
+    ("Hôtel Caron", 48.8553, 2.3610),
+]
+
+
+@pytest.mark.parametrize("value, hours", [
+    ("3 hours", 3.0), ("2-3 hrs", 2.5), ("90 minutes", 1.5), ("1h 30m", 1.5), ("Half day", 4.0),
+    (1.5, 1.5), ("a while", 2.0), (None, 2.0),
+])
+def test_parse_duration_hours(value, hours):
+    assert parse_duration_hours(value) == hours
+
+
+def test_gazetteer_matches_names_inside_longer_text():
+    gazetteer = Gazetteer(PLACES)
+
+    assert place_tokens("Musée d'Orsay") == ("musee", "d", "orsay")
+    assert gazetteer.locate("Pere-Lachaise") == (48.8614, 2.3933)
+    assert gazetteer.locate(None, "Sunset picnic at the Place de la Bastille") == (48.8532, 2.3692)
+    assert gazetteer.locate("Somewhere else") is None
+    assert Gazetteer().locate("Louvre") is None
+
+
+def test_distances_and_tour():
+    paris, london = (48.8566, 2.3522), (51.5074, -0.1278)
+    assert distance_matrix([paris, london])[0, 1] == pytest.approx(344, abs=2)
+
+    square = distance_matrix([(0, 0), (0, 1), (1, 0), (1, 1)])
+    tour = shortest_tour(square)
+    assert sorted(tour) == [0, 1, 2, 3]
+    length = sum(square[a, b] for a, b in zip(tour, np.roll(tour, -1)))
+    assert length == pytest.approx(4 * square[0, 1], rel=0.01)
+
+
+def activity(day, place, duration="2 hours"):
+    return {"day": day, "activity": f"Visit {place}", "location": place, "duration": duration}
+
+
+def zigzag_itinerary():
+    return {
+        "hotel": {"name": "Hôtel Caron"},
+        "activities": [activity(1, "Louvre"), activity(1, "Nation"), activity(1, "Tuileries"),
+                       activity(2, "Place de la Bastille"), activity(2, "Palais Royal"), activity(2, "Père Lachaise"),
+                       {"day": 2, "activity": "Cooking class", "location": "Somewhere unknown"}],
+    }
+
+
+def test_activities_are_regrouped_into_short_daily_routes(make_preferences):
+    itinerary = optimize_itinerary(zigzag_itinerary(), make_preferences(duration=2), gazetteer=Gazetteer(PLACES))
+
+    days = {}
+    for scheduled in itinerary["activities"]:
+        days.setdefault(scheduled["day"], set()).add(scheduled["location"])
+    west, east = {"Louvre", "Palais Royal", "Tuileries"}, {"Place de la Bastille", "Nation", "Père Lachaise"}
+    assert {frozenset(places - {"Somewhere unknown"}) for places in days.values()} == {frozenset(west),
+                                                                                     frozenset(east)}
+    # Activities that cannot be located keep the day the model gave them
+    assert "Somewhere unknown" in days[2]
+    schedule = itinerary["schedule"]
+    assert schedule["optimized"] and schedule["located"] == 6 and schedule["moved"] > 0
+    assert schedule["distance_km_after"] < schedule["distance_km_before"]
+
+
+def test_an_itinerary_that_cannot_be_improved_is_kept(make_preferences):
+    itinerary = {"hotel": {"name": "Hôtel Caron"},
+                 "activities": [activity(1, "Louvre"), activity(1, "Palais Royal"), activity(2, "Nation")]}
+
+    optimized = optimize_itinerary(itinerary, make_preferences(duration=2), gazetteer=Gazetteer(PLACES))
+
+    assert not optimized["schedule"]["optimized"]
+    assert [(a["day"], a["location"]) for a in optimized["activities"]] == [
+        (1, "Louvre"), (1, "Palais Royal"), (2, "Nation")]
+
+
+def test_multi_city_activities_never_change_city(make_preferences):
+    rome = [("Colosseum", 41.8902, 12.4922), ("Trastevere", 41.8897, 12.4694)]
+    itinerary = {
+        "legs": [{"destination": "Paris", "hotel": {"name": "Hôtel Caron"}}, {"destination": "Rome", "hotel": {}}],
+        "activities": [dict(activity(1, "Louvre"), destination="Paris"), dict(activity(1, "Nation"), destination="Paris"),
+                       dict(activity(2, "Colosseum"), destination="Rome"),
+                       dict(activity(2, "Trastevere"), destination="Rome")],
+    }
+
+    optimized = optimize_itinerary(itinerary, make_preferences(), gazetteer=Gazetteer(PLACES + rome))
+
+    assert [(a["day"], a["destination"]) for a in optimized["activities"]] == [
+        (1, "Paris"), (1, "Paris"), (2, "Rome"), (2, "Rome")]
+
+
+def test_errors_and_unknown_places_are_left_alone(make_preferences):
+    failed = {"error": "Error generating recommendations: timeout"}
+    unknown = {"activities": [activity(1, "Nowhere"), activity(2, "Elsewhere")]}
+
+    assert optimize_itinerary(failed, make_preferences(), gazetteer=Gazetteer(PLACES)) is failed
+    assert optimize_itinerary(unknown, make_preferences(), gazetteer=Gazetteer(PLACES)) is unknown
@@ -0,0 +1,45 @@
+import json
+
+from travel_core.generator import generate_sectioned_itinerary
+from travel_core.sectioned import SectionedItineraryEngine, build_section_messages
+
+
+
+def overview_schema(messages):
+    prompt = messages[-1]["content"]
+    return json.loads(prompt[prompt.index("Respond with JSON in this exact format:") + 39:])
+
+
+def test_overview_asks_for_suggestions_by_default(make_preferences):
+    schema = overview_schema(build_section_messages(make_preferences(), "overview"))
+
+    assert "additional_suggestions" in schema
+    assert "daily_food_budget" in schema
+
+
+def test_overview_leaves_out_suggestions_the_index_supplies(make_preferences):
+    prompts = []
+
+    def complete(messages, max_tokens):
+        prompts.append(messages)
+        return json.dumps({"user_preferences_summary": "Two travelers", "analysis_reasoning": "Central hotel"})
+
+    engine = SectionedItineraryEngine(complete, suggestions=False)
+    results, errors = engine.run_sections(make_preferences(), [("overview", None, None)])
+
+    schema = overview_schema(prompts[0])
+    assert errors == []
+    assert "additional_suggestions" not in schema
+    assert "transportation_local" in schema
+    assert "money-saving" not in prompts[0][-1]["content"].lower()
+
+
+def test_unexpected_failures_come_back_as_an_error(make_preferences, fake_openai):
+    class BrokenIndex:
+        def lookup(self, *args, **kwargs):
+            raise RuntimeError("database is locked")
+
+    itinerary = generate_sectioned_itinerary(make_preferences(), client=fake_openai, index=BrokenIndex())
+
+    assert itinerary == {"error": "Error generating recommendations: database is locked"}
+    assert fake_openai.requests == []
@@ -0,0 +1,49 @@
+import datetime
+from functools import partial
+
+import pytest
+
+from travel_core.semantic_cache import SemanticCache
+
+MODEL = "gpt-4.1-mini"
+INTERESTS = ["Art & Museums", "Food & Dining", "Historical Sites", "Nature & Outdoors",
+             "Nightlife & Entertainment", "Shopping", "Adventure Sports", "Local Culture"]
+
+
+@pytest.fixture
+def preferences(make_preferences):
+    return partial(make_preferences, duration=5, end_date=datetime.date(2030, 5, 15), travelers=2,
+                   hotel_budget=400, location_preference="near the old town and museums", interests=INTERESTS)
+
+
+def itinerary():
+    return {"flights": {"price": "$780", "departure_date": "2030-05-10", "return_date": "2030-05-15"},
+            "hotel": {"price_per_night": "$390"}, "activities": []}
+
+
+@pytest.fixture
+def filled_cache(preferences):
+    cache = SemanticCache()
+    cache.add(preferences(), MODEL, 0.7, itinerary())
+    return cache
+
+
+def test_near_identical_request_is_reused(filled_cache, preferences):
+    reused, similarity = filled_cache.lookup(preferences(hotel_budget=425, origin="NYC"), MODEL, 0.7)
+    assert reused is not None
+    assert similarity >= 0.92
+
+
+def test_hotel_budget_change_is_not_outweighed_by_long_interest_list(filled_cache, preferences):
+    reused, _ = filled_cache.lookup(preferences(hotel_budget=100), MODEL, 0.7)
+    assert reused is None
+
+
+def test_flight_budget_change_is_not_outweighed_by_long_interest_list(filled_cache, preferences):
+    reused, _ = filled_cache.lookup(preferences(flight_budget=3000), MODEL, 0.7)
+    assert reused is None
+
+
+def test_travel_month_must_be_close(filled_cache, preferences):
+    assert filled_cache.lookup(preferences(start_date=datetime.date(2030, 6, 2)), MODEL, 0.7)[0] is not None
+    assert filled_cache.lookup(preferences(start_date=datetime.date(2030, 9, 10)), MODEL, 0.7)[0] is None
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from travel_core.singleflight import SingleFlight
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def run_in_thread(fn, results, name):
+    def target():
+        try:
+            results[name] = fn()
+        except Exception as e:
+            results[name] = e
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def generate():
+        executions.append(1)
+        release.wait(5)
+        return {"destination": "Paris", "activities": []}
+
+    results = {}
+    leader = run_in_thread(lambda: flight.do("paris", generate), results, "leader")
+    wait_until(lambda: flight.stats()["in_flight"] == 1)
+    followers = [run_in_thread(lambda: flight.do("paris", generate), results, f"follower{n}") for n in range(3)]
+    wait_until(lambda: flight.stats()["coalesced"] == 3)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert executions == [1]
+    assert results["leader"] == ({"destination": "Paris", "activities": []}, False)
+    for n in range(3):
+        assert results[f"follower{n}"] == ({"destination": "Paris", "activities": []}, True)
+    # Followers get copies, so one session's edits never leak into another's plan
+    results["follower0"][0]["activities"].append("Louvre")
+    assert results["leader"][0]["activities"] == []
+    assert flight.stats() == {"calls": 4, "executions": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_the_leaders_error_reaches_every_follower():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def generate():
+        started.set()
+        release.wait(5)
+        raise ValueError("rate limited")
+
+    results = {}
+    leader = run_in_thread(lambda: flight.do("paris", generate), results, "leader")
+    started.wait(5)
+    call, is_leader = flight.begin("paris")
+    release.set()
+    leader.join(5)
+
+    assert not is_leader
+    assert isinstance(results["leader"], ValueError)
+    with pytest.raises(ValueError, match="rate limited"):
+        call.wait(5)
+
+
+def test_a_finished_call_is_not_reused():
+    flight = SingleFlight()
+
+    assert flight.do("paris", lambda: 1) == (1, False)
+    assert flight.do("paris", lambda: 2) == (2, False)
+    assert flight.stats()["executions"] == 2
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    _, first_leads = flight.begin("paris")
+    _, second_leads = flight.begin("rome")
+
+    assert first_leads and second_leads
+    assert flight.stats()["in_flight"] == 2
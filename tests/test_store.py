@@ -0,0 +1,49 @@
+import datetime
+import sqlite3
+from functools import partial
+
+import pytest
+
+from travel_core.store import ItineraryStore, total_budget
+
+
+@pytest.fixture
+def preferences(make_preferences):
+    return partial(make_preferences, destination="Lisbon", origin="Boston", start_date=datetime.date(2030, 6, 1),
+                   end_date=datetime.date(2030, 6, 5), duration=4, flight_budget=1200, hotel_budget=100, travelers=3)
+
+
+ITINERARY = {"destination": "Lisbon", "cost_breakdown": {"total_estimated": "$1,500"}}
+
+
+def test_total_budget_counts_the_flight_budget_once(preferences):
+    assert total_budget(preferences()) == 1200 + 100 * 4
+
+
+def test_search_by_budget_uses_the_party_flight_budget(tmp_path, preferences):
+    store = ItineraryStore(str(tmp_path / "plans.sqlite3"))
+    plan_id = store.save(preferences(), ITINERARY)
+
+    assert [plan["id"] for plan in store.search(max_budget=1600)] == [plan_id]
+    assert store.search(max_budget=1599) == []
+
+
+def test_reopening_the_store_corrects_totals_saved_per_traveler(tmp_path, preferences):
+    path = str(tmp_path / "plans.sqlite3")
+    plan_id = ItineraryStore(path).save(preferences(), ITINERARY)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE plans SET total_budget = 1200 * 3 + 100 * 4")
+        conn.execute("PRAGMA user_version = 0")
+
+    assert [plan["id"] for plan in ItineraryStore(path).search(max_budget=1600)] == [plan_id]
+
+
+def test_totals_are_only_corrected_once(tmp_path, preferences):
+    path = str(tmp_path / "plans.sqlite3")
+    ItineraryStore(path).save(preferences(), ITINERARY)
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE plans SET total_budget = 42")
+
+    ItineraryStore(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT total_budget FROM plans").fetchone()[0] == 42
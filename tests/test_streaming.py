@@ -0,0 +1,64 @@
+import json
+
+from travel_core.streaming import IncrementalJSONParser, StreamEvent
+
+ITINERARY = {
+    "flights": {"airline": "Air \"France\"", "note": "gate } B ] 12 \\ terminal 2"},
+    "activities": [
+        {"day": 1, "name": "Louvre {Denon wing}", "tip": "Say \"bonjour\""},
+        {"day": 2, "name": "Montmartre", "path": "C:\\trips\\paris"},
+    ],
+    "additional_suggestions": ["Buy a \"Navigo\" pass", "Tip: \\ is a backslash"],
+    "daily_food_budget": "$60",
+    "travelers": 2,
+}
+DOCUMENT = "```json\n" + json.dumps(ITINERARY, indent=2, ensure_ascii=False) + "\n```"
+
+EXPECTED = [
+    StreamEvent("flights", ITINERARY["flights"], False),
+    StreamEvent("activities", ITINERARY["activities"][0], True),
+    StreamEvent("activities", ITINERARY["activities"][1], True),
+    StreamEvent("activities", ITINERARY["activities"], False),
+    StreamEvent("additional_suggestions", ITINERARY["additional_suggestions"][0], True),
+    StreamEvent("additional_suggestions", ITINERARY["additional_suggestions"][1], True),
+    StreamEvent("additional_suggestions", ITINERARY["additional_suggestions"], False),
+    StreamEvent("daily_food_budget", "$60", False),
+    StreamEvent("travelers", 2, False),
+]
+
+
+def feed_chunks(chunks):
+    parser = IncrementalJSONParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+def test_whole_document():
+    assert feed_chunks([DOCUMENT]) == EXPECTED
+
+
+def test_one_character_at_a_time():
+    assert feed_chunks(list(DOCUMENT)) == EXPECTED
+
+
+def test_every_split_point():
+    # Covers splits inside strings, between a backslash and the character it escapes, and inside keys
+    for split in range(1, len(DOCUMENT)):
+        assert feed_chunks([DOCUMENT[:split], DOCUMENT[split:]]) == EXPECTED, split
+
+
+def test_sections_are_emitted_before_the_document_ends():
+    cut = DOCUMENT.index('"additional_suggestions"')
+
+    events = feed_chunks([DOCUMENT[:cut]])
+
+    assert [event.key for event in events if not event.item] == ["flights", "activities"]
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"travelers": 2}')
+
+    assert parser.feed(' {"travelers": 3}') == []
@@ -0,0 +1,105 @@
+import contextvars
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from travel_core.generator import generate_travel_itinerary
+from travel_core.tracing import JsonlSink, MemorySink, PrometheusSink, Tracer, add_span, current_trace, span
+
+
+def test_spans_are_no_ops_without_a_trace():
+    with span("prompt") as stage:
+        stage.set(tokens=10)
+    add_span("ttft", 0.0, 1.0)
+
+    assert current_trace() is None
+
+
+def test_nested_spans_and_token_usage_are_recorded():
+    memory = MemorySink()
+    tracer = Tracer([memory])
+    usage = SimpleNamespace(prompt_tokens=400, completion_tokens=900,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+
+    with tracer.trace("itinerary", mode="single") as trace:
+        with span("generation") as outer:
+            with span("completion", model="gpt-4.1-mini") as inner:
+                inner.record_usage(usage)
+        trace.set(status="ok")
+
+    record = tracer.recent()[0]
+    spans = {recorded["name"]: recorded for recorded in record["spans"]}
+    assert record["attributes"]["mode"] == "single"
+    assert spans["completion"]["parent_id"] == outer.id
+    assert set(record["stages_ms"]) == {"generation", "completion"}
+    assert record["tokens"] == {"prompt_tokens": 400, "completion_tokens": 900, "cached_prompt_tokens": 0}
+    assert current_trace() is None
+
+
+def test_a_failed_request_is_marked_and_still_exported():
+    memory = MemorySink()
+    tracer = Tracer([memory])
+
+    with pytest.raises(ValueError):
+        with tracer.trace("itinerary"):
+            with span("parse"):
+                raise ValueError("bad JSON")
+
+    record = memory.records()[0]
+    assert record["status"] == "error"
+    assert record["spans"][0]["error"] == "ValueError"
+
+
+def test_spans_from_worker_threads_join_the_trace():
+    tracer = Tracer([MemorySink()])
+    with tracer.trace("sectioned"):
+        def work():
+            with span("section", section="hotel"):
+                pass
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(work,))
+        thread.start()
+        thread.join()
+
+    assert [recorded["section"] for recorded in tracer.recent()[0]["spans"]] == ["hotel"]
+
+
+def test_a_broken_sink_never_breaks_generation():
+    class Broken:
+        def export(self, record):
+            raise OSError("disk full")
+
+    memory = MemorySink()
+    with Tracer([Broken(), memory]).trace("itinerary"):
+        pass
+
+    assert len(memory.records()) == 1
+
+
+def test_jsonl_and_prometheus_exports(tmp_path):
+    log = tmp_path / "traces" / "requests.jsonl"
+    metrics = tmp_path / "metrics.prom"
+    prometheus = PrometheusSink(str(metrics))
+    tracer = Tracer([JsonlSink(str(log)), prometheus])
+
+    for _ in range(2):
+        with tracer.trace("itinerary"):
+            add_span("completion", 0.0, 0.3, usage=SimpleNamespace(prompt_tokens=5, completion_tokens=7))
+
+    assert [json.loads(line)["name"] for line in log.read_text().splitlines()] == ["itinerary", "itinerary"]
+    text = metrics.read_text()
+    assert text == prometheus.render()
+    assert 'travel_stage_duration_seconds_bucket{trace="itinerary",stage="completion",le="0.5"} 2' in text
+    assert 'travel_traces_total{trace="itinerary",status="ok"} 2' in text
+    assert 'travel_tokens_total{kind="completion_tokens"} 14' in text
+
+
+def test_a_generation_records_its_stages(make_preferences, fake_openai):
+    tracer = Tracer([MemorySink()])
+
+    with tracer.trace("itinerary"):
+        generate_travel_itinerary(make_preferences(), "gpt-4.1-mini", client=fake_openai)
+
+    stages = tracer.recent()[0]["stages_ms"]
+    assert {"prompt", "completion", "parse", "costs"} <= set(stages)
@@ -0,0 +1,37 @@
+"""Streamlit-free building blocks for the AI Travel Assistant.
+
+The names below are imported lazily (PEP 562), so ``import travel_core`` is
+cheap and a submodule, with its dependencies, only loads when one of its
+names is first used.
+"""
+import importlib
+
+_EXPORTS = {
+    "ItineraryCache": "travel_core.cache",
+    "ItineraryStore": "travel_core.store",
+    "RateLimiter": "travel_core.ratelimit",
+    "build_itinerary_messages": "travel_core.generator",
+    "generate_sectioned_itinerary": "travel_core.generator",
+    "generate_travel_itinerary": "travel_core.generator",
+    "itinerary_cache_key": "travel_core.cache",
+    "normalize_preferences": "travel_core.cache",
+    "parse_itinerary_response": "travel_core.generator",
+    "preferences_from_record": "travel_core.generator",
+    "replan_itinerary": "travel_core.replan",
+    "stream_travel_itinerary": "travel_core.generator",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'travel_core' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
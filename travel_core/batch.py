@@ -0,0 +1,244 @@
+"""Bulk itinerary generation from a JSONL or CSV file of preference records.
+
+Usage::
+
+    python -m travel_core.batch routes.jsonl -o itineraries.jsonl \\
+        --concurrency 8 --rpm 500 --tpm 200000
+
+Each input record needs at least ``destination`` and ``origin``; multi-city
+records give ``legs`` (e.g. ``"Paris:3|Rome:4"``) instead of a destination and
+are always generated stop by stop in parallel. Every other field falls back
+to the app's defaults (see ``preferences_from_record``).
+Results are appended as JSONL in completion order as soon as each itinerary is
+ready, so long runs can be tailed. Rerunning into the same output file resumes
+the run: records whose ``id`` already has an ``ok`` row there are skipped
+(``--no-resume`` generates them again).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from travel_core.cache import DEFAULT_CACHE_PATH, ItineraryCache
+from travel_core.client import LLMClient
+from travel_core.destination_index import DEFAULT_INDEX_PATH, DestinationIndex
+from travel_core.generator import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    generate_sectioned_itinerary,
+    generate_travel_itinerary,
+    preferences_from_record,
+)
+from travel_core.multicity import generate_multi_city_itinerary
+from travel_core.semantic_cache import DEFAULT_SIMILARITY_THRESHOLD, SemanticCache
+from travel_core.singleflight import SingleFlight
+from travel_core.tracing import Tracer
+
+
+def read_records(path):
+    """Yield preference records from a ``.csv`` file or a JSONL file (``-`` for stdin)"""
+    if path == "-":
+        handle = sys.stdin
+    else:
+        handle = open(path, newline="", encoding="utf-8")
+    try:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def _generate_one(position, record, mode, model, temperature, client, cache, limiter, max_workers, index,
+                  flight, tracer=None, semantic=None):
+    """Generate a single record's itinerary and return its output row"""
+    started = time.perf_counter()
+    row = {"index": position, "id": record.get("id", position)}
+    try:
+        preferences = preferences_from_record(record)
+    except (KeyError, ValueError) as e:
+        row.update(status="invalid", error=str(e), elapsed_seconds=0.0)
+        return row
+
+    traced = tracer.trace("batch_itinerary", id=row["id"], mode=mode) if tracer is not None else nullcontext()
+    with traced as trace:
+        if preferences.get('legs'):
+            itinerary = generate_multi_city_itinerary(
+                preferences, model, temperature, max_workers=max_workers,
+                client=client, cache=cache, limiter=limiter, index=index, flight=flight, semantic=semantic
+            )
+        elif mode == "sectioned":
+            itinerary = generate_sectioned_itinerary(
+                preferences, model, temperature, max_workers=max_workers,
+                client=client, cache=cache, limiter=limiter, index=index, flight=flight, semantic=semantic
+            )
+        else:
+            itinerary = generate_travel_itinerary(
+                preferences, model, temperature, client=client, cache=cache, limiter=limiter, index=index,
+                flight=flight, semantic=semantic
+            )
+        if trace is not None:
+            trace.set(status="error" if "error" in itinerary else "ok")
+    row.update(
+        status="error" if "error" in itinerary else "ok",
+        preferences=preferences,
+        itinerary=itinerary,
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
+    return row
+
+
+def completed_ids(path):
+    """Return the ids of the records with an ``ok`` row in a previous run's output file"""
+    if path == "-" or not os.path.exists(path):
+        return set()
+    ids = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # A row cut short when the previous run was interrupted
+                continue
+            if isinstance(row, dict) and row.get("status") == "ok":
+                ids.add(row.get("id"))
+    return ids
+
+
+def _ends_mid_row(path):
+    """Return True when ``path`` ends with an unterminated row (the previous run was interrupted)"""
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def run_batch(records, output, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+              concurrency=4, mode="single", client=None, cache=None, limiter=None,
+              section_workers=4, index=None, flight=None, tracer=None, semantic=None, skip_ids=()):
+    """Generate itineraries for ``records`` concurrently, writing JSONL rows to ``output``.
+
+    At most ``concurrency`` records are in flight at once; ``limiter`` throttles
+    the underlying API calls and duplicate records in flight share one
+    generation. With a ``Tracer``, each record is exported as one trace; with a
+    ``SemanticCache``, records for near-identical trips reuse earlier itineraries.
+    Records whose id is in ``skip_ids`` are not generated again. A record that
+    fails unexpectedly gets an ``error`` row and the run goes on. Returns a
+    summary dict of counts and timings.
+    """
+    if flight is None:
+        flight = SingleFlight()
+    summary = {"ok": 0, "error": 0, "invalid": 0, "skipped": 0}
+    started = time.perf_counter()
+    records = iter(enumerate(records))
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    position, record = next(records)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if record.get("id", position) in skip_ids:
+                    summary["skipped"] += 1
+                    continue
+                future = executor.submit(
+                    _generate_one, position, record, mode, model, temperature,
+                    client, cache, limiter, section_workers, index, flight, tracer, semantic
+                )
+                pending[future] = (position, record.get("id", position))
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                position, record_id = pending.pop(future)
+                try:
+                    row = future.result()
+                except Exception as e:
+                    row = {"index": position, "id": record_id, "status": "error",
+                           "error": f"{type(e).__name__}: {e}"}
+                summary[row["status"]] += 1
+                output.write(json.dumps(row, default=str) + "\n")
+                output.flush()
+
+    summary["total"] = summary["ok"] + summary["error"] + summary["invalid"]
+    summary["coalesced"] = flight.stats()["coalesced"]
+    if semantic is not None:
+        summary["semantic"] = semantic.stats()
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def build_parser():
+    """Return the argument parser for the batch CLI"""
+    parser = argparse.ArgumentParser(
+        prog="python -m travel_core.batch",
+        description="Generate travel itineraries in bulk from a JSONL or CSV file of preferences.",
+    )
+    parser.add_argument("input", help="JSONL or CSV file of preference records ('-' for JSONL on stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"Model name (default: {DEFAULT_MODEL})")
+    parser.add_argument("--temperature", type=float, default=DEFAULT_TEMPERATURE)
+    parser.add_argument("--mode", choices=["single", "sectioned"], default="single",
+                        help="Generate each itinerary with one completion or as parallel sections")
+    parser.add_argument("--concurrency", type=int, default=4, help="Itineraries generated at once")
+    parser.add_argument("--section-workers", type=int, default=4,
+                        help="Parallel section requests per itinerary in sectioned mode and per multi-city record")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests-per-minute limit (default: $OPENAI_RPM)")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens-per-minute limit (default: $OPENAI_TPM)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Itinerary cache database path")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the itinerary cache")
+    parser.add_argument("--reuse-similar", action="store_true",
+                        help="Reuse itineraries of near-identical trips generated earlier in the batch")
+    parser.add_argument("--similarity-threshold", type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help=f"Cosine similarity needed to reuse an itinerary (default: {DEFAULT_SIMILARITY_THRESHOLD})")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH,
+                        help="Destination knowledge index path (used if it exists)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Generate records again even if the output file already has them")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    client = LLMClient.from_env(requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                                max_connections=max(args.concurrency * args.section_workers, 10))
+    cache = None if args.no_cache else ItineraryCache(args.cache)
+    index = DestinationIndex.open_existing(args.index)
+    semantic = SemanticCache(args.similarity_threshold) if args.reuse_similar else None
+
+    skip_ids = set() if args.no_resume else completed_ids(args.output)
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    if output is not sys.stdout and _ends_mid_row(args.output):
+        output.write("\n")
+    try:
+        summary = run_batch(
+            read_records(args.input), output,
+            model=args.model, temperature=args.temperature, concurrency=max(1, args.concurrency),
+            mode=args.mode, client=client, cache=cache,
+            section_workers=args.section_workers, index=index, tracer=Tracer.from_env(), semantic=semantic,
+            skip_ids=skip_ids,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary["error"] == 0 and summary["invalid"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Content-addressed itinerary cache.
+
+Itineraries are keyed by a SHA-256 hash of the normalized preferences plus the
+model and temperature used to generate them. Lookups go through a small
+in-process LRU tier first and fall back to an on-disk SQLite tier, so repeat
+plans for popular routes come back without another completion.
+"""
+import copy
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_PATH = os.environ.get(
+    "TRAVEL_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "travel_assistant", "itineraries.sqlite3"),
+)
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Keys that describe how a plan is generated rather than what is planned;
+# model and temperature are hashed explicitly instead.
+_NON_CONTENT_KEYS = {"model_choice", "creativity_level"}
+
+
+def _normalize_value(value):
+    """Normalize a single preference value into a canonical JSON-safe form"""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple)) and any(isinstance(item, dict) for item in value):
+        # Ordered records (e.g. the stops of a multi-city trip): order is content
+        return [_normalize_value(item) for item in value]
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_normalize_value(item) for item in value)
+    if isinstance(value, dict):
+        return {str(k): _normalize_value(v) for k, v in value.items()}
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def normalize_preferences(preferences):
+    """Return a canonical copy of the preferences dict suitable for hashing"""
+    return {
+        key: _normalize_value(value)
+        for key, value in preferences.items()
+        if key not in _NON_CONTENT_KEYS
+    }
+
+
+def itinerary_cache_key(preferences, model, temperature):
+    """Build the content-addressed cache key for a generation request"""
+    payload = {
+        "version": CACHE_VERSION,
+        "preferences": normalize_preferences(preferences),
+        "model": model,
+        "temperature": round(float(temperature), 3),
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ItineraryCache:
+    """Two-tier (memory LRU + SQLite) cache of generated itineraries"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_entries=128,
+                 max_disk_entries=5000, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS itineraries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_itineraries_accessed ON itineraries (accessed_at)"
+            )
+            self._conn.commit()
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, value, created_at):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key):
+        """Return a copy of the cached itinerary for ``key`` or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM itineraries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if self._expired(row[1], now):
+                        self._conn.execute("DELETE FROM itineraries WHERE key = ?", (key,))
+                        self._conn.commit()
+                    else:
+                        self._conn.execute(
+                            "UPDATE itineraries SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._conn.commit()
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self._stats["disk_hits"] += 1
+                        return copy.deepcopy(value)
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """Store an itinerary in both tiers"""
+        now = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["stores"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO itineraries (key, value, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, default=str), now, now),
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _evict_disk(self, now):
+        """Drop expired rows, then the least recently used rows over the size limit"""
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM itineraries WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+        if self.max_disk_entries is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM itineraries WHERE key IN ("
+                " SELECT key FROM itineraries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+
+    def clear(self):
+        """Remove every cached itinerary from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM itineraries")
+                self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and current tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute(
+                    "SELECT COUNT(*) FROM itineraries"
+                ).fetchone()[0]
+            else:
+                stats["disk_entries"] = 0
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,198 @@
+"""Shared, rate-limit-aware OpenAI client.
+
+``LLMClient`` wraps a single ``openai.OpenAI`` instance with a tuned
+keep-alive connection pool and adds what the bare SDK call lacks under
+concurrent load:
+
+* a token-bucket limiter sized to the account's requests/min and tokens/min,
+* retries with jittered exponential backoff on 429s, 5xx responses, timeouts
+  and connection errors (honouring ``Retry-After``),
+* a per-request deadline covering all attempts and backoff sleeps.
+
+It exposes the same ``client.chat.completions.create(**kwargs)`` call shape as
+the SDK, so it can be passed anywhere ``travel_core.generator`` takes a client.
+"""
+import os
+import random
+import threading
+import time
+
+from travel_core.ratelimit import RateLimiter, estimate_tokens
+from travel_core.tracing import span
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get("OPENAI_REQUEST_DEADLINE", 90))
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a request cannot complete within its deadline"""
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def is_retryable(error):
+    """Return True for rate limits, server errors, timeouts and connection failures"""
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                          openai.InternalServerError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS
+    return isinstance(error, TimeoutError)
+
+
+def retry_after_seconds(error):
+    """Return the server-suggested ``Retry-After`` delay in seconds, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **kwargs):
+        return self._client.create_chat_completion(**kwargs)
+
+
+class _Chat:
+    def __init__(self, client):
+        self.completions = _Completions(client)
+
+
+class LLMClient:
+    """Pooled OpenAI client with throttling, retries and per-request deadlines.
+
+    ``sdk_client`` may be passed to wrap an existing OpenAI-compatible client
+    (mainly for tests and benchmarks); otherwise one is created from
+    ``api_key``/``base_url`` with a dedicated keep-alive connection pool.
+    """
+
+    def __init__(self, api_key=None, base_url=None, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff_base=0.5, backoff_max=20.0,
+                 deadline=DEFAULT_DEADLINE_SECONDS, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections=DEFAULT_MAX_KEEPALIVE, sdk_client=None,
+                 sleep=time.sleep):
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "attempts": 0, "retries": 0, "failures": 0,
+                       "deadline_exceeded": 0, "throttled_seconds": 0.0}
+        self.chat = _Chat(self)
+        self._sdk = sdk_client or self._build_sdk_client(
+            api_key, base_url, max_connections, max_keepalive_connections
+        )
+
+    @classmethod
+    def from_env(cls, api_key=None, **kwargs):
+        """Create a client sized from the ``OPENAI_RPM``/``OPENAI_TPM`` environment variables.
+
+        Limits that are missing or None fall back to the environment.
+        """
+        for key, name in (("requests_per_minute", "OPENAI_RPM"), ("tokens_per_minute", "OPENAI_TPM")):
+            if kwargs.get(key) is None:
+                kwargs[key] = _env_int(name)
+        return cls(api_key=api_key, **kwargs)
+
+    @staticmethod
+    def _build_sdk_client(api_key, base_url, max_connections, max_keepalive_connections):
+        """Create an SDK client with its own keep-alive pool and SDK-level retries disabled"""
+        import openai
+        # Use the Limits class of whichever httpx flavour this SDK version ships with
+        limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=30.0,
+        )
+        return openai.OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=openai.DefaultHttpxClient(limits=limits),
+        )
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def backoff_delay(self, attempt, error=None):
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        suggested = retry_after_seconds(error) if error is not None else None
+        if suggested is not None:
+            delay = max(delay, min(suggested, self.backoff_max))
+        return delay
+
+    def create_chat_completion(self, deadline=None, **kwargs):
+        """Send a chat completion with throttling, retries and a deadline across all attempts"""
+        deadline = self.deadline if deadline is None else deadline
+        expires_at = time.monotonic() + deadline if deadline else None
+        estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        self._bump("requests")
+
+        attempt = 0
+        while True:
+            # Every attempt is a request to the API, so each one waits for its own share of the limits
+            throttle_started = time.monotonic()
+            with span("rate_limit_wait", attempt=attempt + 1):
+                self.limiter.acquire(estimated)
+            self._bump("throttled_seconds", time.monotonic() - throttle_started)
+            request_kwargs = dict(kwargs)
+            if expires_at is not None:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    self._bump("deadline_exceeded")
+                    raise DeadlineExceededError(f"Request deadline of {deadline:.0f}s exceeded")
+                request_kwargs["timeout"] = remaining
+            self._bump("attempts")
+            try:
+                response = self._sdk.chat.completions.create(**request_kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._bump("failures")
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                if expires_at is not None and time.monotonic() + delay >= expires_at:
+                    self._bump("deadline_exceeded")
+                    raise DeadlineExceededError(
+                        f"Request deadline of {deadline:.0f}s exceeded after {attempt + 1} attempts: {e}"
+                    ) from e
+                self._bump("retries")
+                with span("retry_backoff", attempt=attempt + 1, error=type(e).__name__):
+                    self._sleep(delay)
+                attempt += 1
+                continue
+
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.limiter.settle(estimated, getattr(usage, "total_tokens", None))
+            return response
+
+    def stats(self):
+        """Return request, retry and throttling counters"""
+        with self._lock:
+            return dict(self._stats)
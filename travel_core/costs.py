@@ -0,0 +1,158 @@
+"""Deterministic cost breakdown computed locally from the itinerary's prices.
+
+The model writes prices as free text ("$650", "$120-150 per night",
+"Free", "USD 1,200"). The engine parses them into ``Decimal`` amounts (the
+activity list in one vectorized pandas pass, with pandas imported on first
+use so importing this module stays cheap), computes every total itself and
+checks the flight and hotel picks against the traveler's budgets. The model
+only supplies the two figures it cannot know from the other sections: the
+daily food budget and the local transport estimate.
+"""
+import math
+from decimal import ROUND_HALF_UP, Decimal
+
+_CENT = Decimal("0.01")
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)"
+# First amount in the text, optionally a range ("$120-150", "$20 to $30")
+_PRICE_PATTERN = _AMOUNT + r"(?:\s*(?:-|–|to)\s*(?:USD|\$)?\s*" + _AMOUNT + r")?"
+_FREE_PATTERN = r"^\s*(?:free|no cost|included|complimentary)\b"
+
+
+def parse_prices(values):
+    """Parse price values (strings or numbers) into a float Series, NaN where unparseable.
+
+    Ranges are taken at their midpoint and "free"/"included" count as zero.
+    """
+    import numpy as np
+    import pandas as pd
+
+    series = pd.Series(list(values), dtype="object")
+    numeric = pd.to_numeric(series, errors="coerce")
+    text = series.astype(str)
+    bounds = text.str.extract(_PRICE_PATTERN)
+    low = pd.to_numeric(bounds[0].str.replace(",", "", regex=False), errors="coerce")
+    high = pd.to_numeric(bounds[1].str.replace(",", "", regex=False), errors="coerce")
+    amounts = pd.Series(np.where(high.notna(), (low + high) / 2, low), index=series.index)
+    amounts = numeric.fillna(amounts)
+    free = text.str.contains(_FREE_PATTERN, case=False, regex=True)
+    return amounts.mask(free & amounts.isna(), 0.0)
+
+
+def to_decimal(amount):
+    """Convert a parsed amount to a ``Decimal`` rounded to cents (None stays None)"""
+    if amount is None or math.isnan(amount):
+        return None
+    return Decimal(str(amount)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def parse_price(value):
+    """Parse a single price value into a ``Decimal``, or None when it has no amount"""
+    return to_decimal(parse_prices([value]).iloc[0])
+
+
+def format_usd(amount):
+    """Format an amount as a whole-dollar USD string"""
+    return f"${amount:,.0f}"
+
+
+def trip_legs(itinerary):
+    """Return the stops of a multi-city itinerary (empty for a single destination)"""
+    return [leg for leg in itinerary.get('legs') or [] if isinstance(leg, dict)]
+
+
+def _multi_city_totals(itinerary, legs, preferences):
+    """Return the per-traveler transport price and the accommodation total of a multi-city trip"""
+    hops = [hop for hop in itinerary.get('transport') or [] if isinstance(hop, dict)]
+    hop_prices = parse_prices([hop.get('price') for hop in hops]).fillna(0.0)
+    # Stops without a parseable nightly rate are assumed to cost the nightly budget
+    rates = parse_prices([(leg.get('hotel') or {}).get('price_per_night') for leg in legs])
+    rates = rates.fillna(float(preferences.get('hotel_budget') or 0)).map(to_decimal)
+    accommodation = sum((rate * int(leg.get('nights') or 0) for rate, leg in zip(rates, legs)), Decimal(0))
+    return to_decimal(hop_prices.to_numpy().sum()), accommodation
+
+
+def estimate_costs(itinerary, preferences, daily_food_budget=None, transportation_local=None):
+    """Return the trip totals as ``Decimal`` values, keyed like the ``cost_breakdown`` block"""
+    travelers = int(preferences.get('travelers') or 1)
+    nights = int(preferences.get('duration') or 0)
+    flights = itinerary.get('flights') if isinstance(itinerary.get('flights'), dict) else {}
+    hotel = itinerary.get('hotel') if isinstance(itinerary.get('hotel'), dict) else {}
+    activities = [a for a in itinerary.get('activities') or [] if isinstance(a, dict)]
+    legs = trip_legs(itinerary)
+
+    prices = parse_prices([flights.get('price'), hotel.get('price_per_night'), daily_food_budget,
+                           transportation_local])
+    # Without a parseable nightly rate, assume the traveler's nightly budget
+    prices[1] = prices[1] if not math.isnan(prices[1]) else float(preferences.get('hotel_budget') or 0)
+    flight_price, hotel_rate, food_per_day, transport = prices.fillna(0.0).map(to_decimal)
+    if legs:
+        flight_price, accommodation_total = _multi_city_totals(itinerary, legs, preferences)
+    else:
+        accommodation_total = hotel_rate * nights
+    activity_prices = parse_prices(a.get('estimated_cost') for a in activities).fillna(0.0)
+    activities_total = to_decimal(activity_prices.to_numpy().sum()) * travelers
+
+    costs = {
+        "flights_total": flight_price * travelers,
+        "accommodation_total": accommodation_total,
+        "activities_estimated": activities_total,
+        "daily_food_budget": food_per_day,
+        "transportation_local": transport,
+    }
+    costs["total_estimated"] = (
+        costs["flights_total"] + costs["accommodation_total"] + activities_total
+        + food_per_day * nights * travelers + transport
+    )
+    return costs
+
+
+def budget_overruns(itinerary, preferences, costs=None):
+    """Return the flight/hotel picks that exceed the traveler's budgets.
+
+    The flight budget covers all travelers; the hotel budget is per night.
+    Each overrun is ``{"item", "budget", "estimate", "over_by"}`` in USD strings.
+    """
+    if costs is None:
+        costs = estimate_costs(itinerary, preferences)
+    hotel = itinerary.get('hotel') if isinstance(itinerary.get('hotel'), dict) else {}
+    checks = [("flights", preferences.get('flight_budget'), costs["flights_total"])]
+    legs = trip_legs(itinerary)
+    if legs:
+        for leg in legs:
+            leg_rate = parse_price((leg.get('hotel') or {}).get('price_per_night'))
+            if leg_rate is not None:
+                checks.append((f"hotel per night in {leg.get('destination')}", preferences.get('hotel_budget'), leg_rate))
+    else:
+        hotel_rate = parse_price(hotel.get('price_per_night'))
+        if hotel_rate is not None:
+            checks.append(("hotel per night", preferences.get('hotel_budget'), hotel_rate))
+
+    overruns = []
+    for item, budget, estimate in checks:
+        if budget is None:
+            continue
+        budget = Decimal(str(budget))
+        if estimate > budget:
+            overruns.append({
+                "item": item,
+                "budget": format_usd(budget),
+                "estimate": format_usd(estimate),
+                "over_by": format_usd(estimate - budget),
+            })
+    return overruns
+
+
+def apply_cost_breakdown(itinerary, preferences):
+    """Set ``cost_breakdown`` and ``budget_overruns`` on ``itinerary`` from its sections.
+
+    The model's food and transport estimates are read from the top-level
+    ``daily_food_budget``/``transportation_local`` keys (and moved into the
+    breakdown), falling back to those of an existing breakdown.
+    """
+    previous = itinerary.get("cost_breakdown") if isinstance(itinerary.get("cost_breakdown"), dict) else {}
+    food = itinerary.pop("daily_food_budget", None) or previous.get("daily_food_budget")
+    transport = itinerary.pop("transportation_local", None) or previous.get("transportation_local")
+    costs = estimate_costs(itinerary, preferences, food, transport)
+    itinerary["cost_breakdown"] = {key: format_usd(amount) for key, amount in costs.items()}
+    itinerary["budget_overruns"] = budget_overruns(itinerary, preferences, costs)
+    return itinerary
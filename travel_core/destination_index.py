@@ -0,0 +1,373 @@
+"""Precomputed destination knowledge index.
+
+A compact SQLite store of the generic, slowly changing facts every itinerary
+otherwise re-asks the model for: neighborhoods, top attractions per interest
+category, airlines on a route and general travel tips. It is built offline in
+bulk, either from a JSONL file of destination records or by asking the model
+once per destination::
+
+    python -m travel_core.destination_index build destinations.jsonl
+    python -m travel_core.destination_index generate "Paris, France" "Rome" --model gpt-4.1-mini
+    python -m travel_core.destination_index show Paris
+
+At request time ``DestinationIndex.lookup`` retrieves the relevant candidates
+for the trip's interests, which are injected into the prompt as a short
+context block. Indexed tips replace the model-generated suggestions entirely.
+
+A destination record looks like::
+
+    {"destination": "Paris", "country": "France", "tips": ["..."],
+     "neighborhoods": [{"name": "Le Marais", "description": "...", "price_level": "$$"}],
+     "attractions": {"Art & Museums": [{"name": "Louvre", "area": "1st arr.",
+                                         "description": "...", "estimated_cost": "$22"}]},
+     "routes": [{"origin": "New York", "airlines": ["Air France", "Delta"], "typical_price": "$650"}]}
+
+Neighborhoods and attractions may carry ``lat``/``lon``, and a record may add
+more named ``places`` (``{"name", "lat", "lon"}``); together they form the
+local gazetteer ``travel_core.schedule`` uses to group nearby activities.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "TRAVEL_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "travel_assistant", "destinations.sqlite3"),
+)
+
+INTEREST_CATEGORIES = (
+    "Art & Museums",
+    "Food & Dining",
+    "Historical Sites",
+    "Nature & Outdoors",
+    "Nightlife & Entertainment",
+    "Shopping",
+    "Adventure Sports",
+    "Local Culture",
+)
+
+# Indexed tips only replace the model's suggestions when there are enough of them
+MIN_TIPS_FOR_SUGGESTIONS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS destinations (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    country TEXT,
+    tips TEXT NOT NULL DEFAULT '[]'
+);
+CREATE TABLE IF NOT EXISTS neighborhoods (
+    destination_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    price_level TEXT
+);
+CREATE TABLE IF NOT EXISTS attractions (
+    destination_key TEXT NOT NULL,
+    interest TEXT NOT NULL,
+    name TEXT NOT NULL,
+    area TEXT,
+    description TEXT,
+    estimated_cost TEXT
+);
+CREATE TABLE IF NOT EXISTS routes (
+    origin_key TEXT NOT NULL,
+    destination_key TEXT NOT NULL,
+    airlines TEXT NOT NULL DEFAULT '[]',
+    typical_price TEXT,
+    PRIMARY KEY (origin_key, destination_key)
+);
+CREATE TABLE IF NOT EXISTS places (
+    destination_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_places_destination ON places (destination_key);
+CREATE INDEX IF NOT EXISTS idx_neighborhoods_destination ON neighborhoods (destination_key);
+CREATE INDEX IF NOT EXISTS idx_attractions_destination_interest ON attractions (destination_key, interest);
+"""
+
+_GENERATE_PROMPT = """Compile reference facts about {destination} for a travel planning database.
+Answer with one JSON object only, in this format:
+{{"destination": "{destination}", "country": "",
+ "tips": ["6-8 practical, evergreen tips: money-saving, transport with costs, dining prices, etiquette, safety"],
+ "neighborhoods": [{{"name": "", "description": "one sentence", "price_level": "$|$$|$$$"}}],
+ "attractions": {{{interests}}},
+ "routes": [{{"origin": "major origin city", "airlines": [""], "typical_price": "$ round trip per traveler"}}]}}
+Give 4-6 neighborhoods, 3-5 real attractions for every interest category (each as
+{{"name": "", "area": "", "description": "one sentence", "estimated_cost": "$ per person"}})
+and routes from the 5 largest origin markets. Add "lat" and "lon" (decimal degrees)
+to the destination itself, every neighborhood and every attraction."""
+
+
+def _coordinates(item):
+    """Return ``(lat, lon)`` of a record item, or None if it has no valid coordinates"""
+    try:
+        lat, lon = float(item["lat"]), float(item["lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+
+def record_places(record):
+    """Return the named coordinates of a destination record as ``(name, lat, lon)``"""
+    items = [dict(record, name=record["destination"])]
+    items += record.get("neighborhoods") or []
+    items += [item for items in (record.get("attractions") or {}).values() for item in items]
+    items += record.get("places") or []
+    places = []
+    for item in items:
+        coordinates = _coordinates(item) if item.get("name") else None
+        if coordinates:
+            places.append((item["name"], *coordinates))
+    return places
+
+
+def destination_key(name):
+    """Normalize a city name into an index key ("Paris, France" -> "paris")"""
+    return " ".join((name or "").split(",")[0].split()).casefold()
+
+
+class DestinationIndex:
+    """SQLite-backed store of destination facts keyed by destination and interest"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def open_existing(cls, path=DEFAULT_INDEX_PATH):
+        """Open the index at ``path`` if it has been built, else return None"""
+        if path != ":memory:" and not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def upsert_destination(self, record, commit=True):
+        """Insert or replace everything known about one destination record"""
+        key = destination_key(record["destination"])
+        with self._lock:
+            conn = self._conn
+            conn.execute("DELETE FROM neighborhoods WHERE destination_key = ?", (key,))
+            conn.execute("DELETE FROM attractions WHERE destination_key = ?", (key,))
+            conn.execute("DELETE FROM places WHERE destination_key = ?", (key,))
+            conn.execute("DELETE FROM routes WHERE destination_key = ?", (key,))
+            conn.execute(
+                "INSERT OR REPLACE INTO destinations (key, name, country, tips) VALUES (?, ?, ?, ?)",
+                (key, record["destination"], record.get("country"), json.dumps(record.get("tips") or [])),
+            )
+            conn.executemany(
+                "INSERT INTO neighborhoods (destination_key, name, description, price_level) VALUES (?, ?, ?, ?)",
+                [
+                    (key, item.get("name"), item.get("description"), item.get("price_level"))
+                    for item in record.get("neighborhoods") or [] if item.get("name")
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO attractions (destination_key, interest, name, area, description, estimated_cost)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, interest, item.get("name"), item.get("area"), item.get("description"),
+                     item.get("estimated_cost"))
+                    for interest, items in (record.get("attractions") or {}).items()
+                    for item in items if item.get("name")
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO places (destination_key, name, lat, lon) VALUES (?, ?, ?, ?)",
+                [(key, name, lat, lon) for name, lat, lon in record_places(record)],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO routes (origin_key, destination_key, airlines, typical_price)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (destination_key(route.get("origin")), key, json.dumps(route.get("airlines") or []),
+                     route.get("typical_price"))
+                    for route in record.get("routes") or [] if route.get("origin")
+                ],
+            )
+            if commit:
+                conn.commit()
+
+    def build(self, records):
+        """Bulk-load destination records in a single transaction; return the count"""
+        count = 0
+        for record in records:
+            self.upsert_destination(record, commit=False)
+            count += 1
+        with self._lock:
+            self._conn.commit()
+        return count
+
+    def destinations(self):
+        """Return the names of all indexed destinations"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM destinations ORDER BY key")]
+
+    def places(self, destination):
+        """Return the gazetteer entries of a destination as ``(name, lat, lon)``"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, lat, lon FROM places WHERE destination_key = ?", (destination_key(destination),)
+            ).fetchall()
+
+    def lookup(self, destination, interests=(), origin=None, per_interest=4):
+        """Return the indexed facts relevant to a trip, or None if the destination is unknown"""
+        key = destination_key(destination)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, country, tips FROM destinations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            neighborhoods = [
+                {"name": name, "description": description, "price_level": price_level}
+                for name, description, price_level in self._conn.execute(
+                    "SELECT name, description, price_level FROM neighborhoods WHERE destination_key = ?", (key,)
+                )
+            ]
+            attractions = {}
+            for interest in interests or ():
+                attractions[interest] = [
+                    {"name": name, "area": area, "description": description, "estimated_cost": cost}
+                    for name, area, description, cost in self._conn.execute(
+                        "SELECT name, area, description, estimated_cost FROM attractions"
+                        " WHERE destination_key = ? AND interest = ? LIMIT ?",
+                        (key, interest, per_interest),
+                    )
+                ]
+            route = None
+            if origin:
+                route = self._conn.execute(
+                    "SELECT airlines, typical_price FROM routes WHERE origin_key = ? AND destination_key = ?",
+                    (destination_key(origin), key),
+                ).fetchone()
+        return {
+            "destination": row[0],
+            "country": row[1],
+            "tips": json.loads(row[2]),
+            "neighborhoods": neighborhoods,
+            "attractions": {interest: items for interest, items in attractions.items() if items},
+            "airlines": json.loads(route[0]) if route else [],
+            "typical_flight_price": route[1] if route else None,
+        }
+
+
+def has_suggestions(facts):
+    """Return True when indexed tips can stand in for model-generated suggestions"""
+    return bool(facts) and len(facts.get("tips") or []) >= MIN_TIPS_FOR_SUGGESTIONS
+
+
+def format_context(facts):
+    """Render looked-up facts as a compact prompt block (empty string if nothing useful)"""
+    if not facts:
+        return ""
+    lines = ["**Known local options (prefer these where they fit):**"]
+    if facts.get("neighborhoods"):
+        lines.append("- Areas: " + "; ".join(
+            f"{item['name']} ({item['price_level']})" if item.get("price_level") else item["name"]
+            for item in facts["neighborhoods"]
+        ))
+    for interest, items in facts.get("attractions", {}).items():
+        lines.append(f"- {interest}: " + "; ".join(
+            ", ".join(part for part in (item["name"], item.get("area"), item.get("estimated_cost")) if part)
+            for item in items
+        ))
+    if facts.get("airlines"):
+        route = "- Airlines on this route: " + ", ".join(facts["airlines"])
+        if facts.get("typical_flight_price"):
+            route += f" (typically {facts['typical_flight_price']})"
+        lines.append(route)
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+def generate_records(destinations, complete, max_workers=4):
+    """Ask the model for one destination record per name, concurrently.
+
+    ``complete`` is a ``complete(messages, max_tokens) -> str`` callable (see
+    ``travel_core.generator.make_section_completer``). Yields records as they
+    complete; destinations that fail to parse are reported on stderr.
+    """
+    from travel_core.json_repair import loads_tolerant
+
+    interests = ", ".join(f'"{interest}": []' for interest in INTEREST_CATEGORIES)
+
+    def generate_one(destination):
+        prompt = _GENERATE_PROMPT.format(destination=destination, interests=interests)
+        content = complete([{"role": "user", "content": prompt}], 4000)
+        record, _ = loads_tolerant(content)
+        record["destination"] = destination.split(",")[0].strip()
+        return record
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(generate_one, name): name for name in destinations}
+        for future, name in futures.items():
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"Skipping {name}: {e}", file=sys.stderr)
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m travel_core.destination_index",
+                                     description="Build and inspect the destination knowledge index.")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help="Index database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Load destination records from a JSONL file")
+    build.add_argument("input")
+    generate = commands.add_parser("generate", help="Generate destination records with the model")
+    generate.add_argument("destinations", nargs="+")
+    generate.add_argument("--model", default=None)
+    generate.add_argument("--concurrency", type=int, default=4)
+    generate.add_argument("--save", help="Also append the generated records to this JSONL file")
+    show = commands.add_parser("show", help="Print what the index knows about a destination")
+    show.add_argument("destination")
+    show.add_argument("--origin")
+    args = parser.parse_args(argv)
+
+    index = DestinationIndex(args.db)
+    if args.command == "build":
+        print(f"Indexed {index.build(_read_jsonl(args.input))} destinations into {args.db}")
+    elif args.command == "generate":
+        from travel_core.client import LLMClient
+        from travel_core.generator import DEFAULT_MODEL, make_section_completer
+        complete = make_section_completer(args.model or DEFAULT_MODEL, 0.3, LLMClient.from_env())
+        save = open(args.save, "a", encoding="utf-8") if args.save else None
+        try:
+            count = 0
+            for record in generate_records(args.destinations, complete, args.concurrency):
+                index.upsert_destination(record)
+                if save:
+                    save.write(json.dumps(record) + "\n")
+                count += 1
+        finally:
+            if save:
+                save.close()
+        print(f"Indexed {count} of {len(args.destinations)} destinations into {args.db}")
+    else:
+        facts = index.lookup(args.destination, INTEREST_CATEGORIES, origin=args.origin)
+        if facts is None:
+            print(f"{args.destination} is not indexed", file=sys.stderr)
+            return 1
+        print(json.dumps(facts, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,469 @@
+"""Headless itinerary generation: prompt building, API calls and response parsing.
+
+Nothing in this module imports Streamlit, so it can be used from the web app,
+the batch CLI (``python -m travel_core.batch``) or any other script. Every
+entry point takes an optional OpenAI-compatible ``client`` (defaulting to the
+global ``openai`` module client), an optional ``ItineraryCache`` (with an
+optional ``SemanticCache`` behind it for near-identical requests), an optional
+``RateLimiter`` and an optional ``SingleFlight`` that coalesces identical
+concurrent requests.
+"""
+import datetime
+import re
+import time
+
+from travel_core.cache import itinerary_cache_key
+from travel_core.costs import apply_cost_breakdown
+from travel_core.json_repair import loads_tolerant
+from travel_core.prompts import FULL_SECTIONS, TokenAccount, build_itinerary_messages, max_tokens_for
+from travel_core.ratelimit import estimate_tokens
+from travel_core.schema import (
+    itinerary_schema,
+    missing_activity_days,
+    response_format_for,
+    structured_output_mode,
+    validate_itinerary,
+)
+from travel_core.sectioned import (
+    SectionedItineraryEngine,
+    activity_specs,
+    trip_days,
+)
+from travel_core.streaming import ITINERARY_COMPLETE, IncrementalJSONParser, StreamEvent
+from travel_core.tracing import add_span, span
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+DEFAULT_TEMPERATURE = 0.7
+
+
+def _default_client():
+    """Return the global ``openai`` module client"""
+    import openai
+    return openai
+
+
+def parse_itinerary_response(content):
+    """Extract the itinerary JSON from a completion's text, repairing malformed JSON if needed"""
+    with span("parse", characters=len(content or "")) as parse_span:
+        try:
+            recommendations, repaired = loads_tolerant(content)
+            parse_span.set(repaired=repaired)
+            return recommendations
+        except ValueError:
+            # Fallback if JSON parsing fails
+            parse_span.set(failed=True)
+            return {"error": "Could not parse AI response", "raw_response": content}
+
+
+def create_chat_completion(client=None, limiter=None, **kwargs):
+    """Send a chat completion request, waiting on the rate limiter first if one is given"""
+    client = client or _default_client()
+    estimated = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    if limiter is not None:
+        with span("rate_limit_wait"):
+            limiter.acquire(estimated)
+    # For streams this covers the wait for the response headers; the body is timed by the caller
+    with span("completion", model=kwargs.get("model"), max_tokens=kwargs.get("max_tokens"),
+              stream=bool(kwargs.get("stream"))) as completion_span:
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except Exception as e:
+            # OpenAI-compatible servers without JSON mode reject response_format; retry without it
+            if "response_format" not in kwargs or "response_format" not in str(e):
+                raise
+            kwargs = dict(kwargs)
+            del kwargs["response_format"]
+            response = client.chat.completions.create(**kwargs)
+        completion_span.record_usage(getattr(response, "usage", None))
+    usage = getattr(response, "usage", None)
+    if limiter is not None and usage is not None:
+        limiter.settle(estimated, getattr(usage, "total_tokens", None))
+    return response
+
+
+def _chat_kwargs(model, temperature, messages, max_tokens, response_format=None, **extra):
+    kwargs = dict(model=model, messages=messages, max_tokens=max_tokens, temperature=temperature, **extra)
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    return kwargs
+
+
+def make_completer(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, client=None, limiter=None,
+                   response_format=None, account=None):
+    """Return a ``complete(messages, max_tokens) -> str`` callable bound to a model.
+
+    When a ``TokenAccount`` is given, every request and its usage is recorded on it.
+    """
+    def complete(messages, max_tokens):
+        if account is not None:
+            account.record_request(messages, max_tokens)
+        response = create_chat_completion(
+            client,
+            limiter,
+            **_chat_kwargs(model, temperature, messages, max_tokens, response_format)
+        )
+        if account is not None:
+            account.record_usage(getattr(response, "usage", None))
+        return response.choices[0].message.content
+    return complete
+
+
+def make_section_completer(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, client=None, limiter=None,
+                           account=None):
+    """Return a completer for single-section requests, in JSON mode when the model supports it"""
+    response_format = {"type": "json_object"} if structured_output_mode(model) else None
+    return make_completer(model, temperature, client, limiter, response_format, account)
+
+
+_OVERVIEW_KEYS = ("user_preferences_summary", "analysis_reasoning", "additional_suggestions",
+                  "daily_food_budget", "transportation_local")
+
+
+def merge_section_results(itinerary, results):
+    """Patch ``itinerary`` in place with ``SectionedItineraryEngine.run_sections`` results.
+
+    Flights, hotel and overview replace the existing values; generated
+    activities are added, and the activity list is kept sorted by day.
+    """
+    if not isinstance(itinerary.get("activities"), list):
+        itinerary["activities"] = []
+    for (section, _, _), data in results.items():
+        if section in ("flights", "hotel"):
+            itinerary[section] = data[section]
+        elif section == "overview":
+            for key in _OVERVIEW_KEYS:
+                if key in data:
+                    itinerary[key] = data[key]
+        else:
+            itinerary["activities"].extend(a for a in data["activities"] if isinstance(a, dict))
+    itinerary["activities"] = sorted(
+        (a for a in itinerary["activities"] if isinstance(a, dict)),
+        key=lambda a: a.get('day') if isinstance(a.get('day'), int) else 0
+    )
+    return itinerary
+
+
+def repair_itinerary_sections(itinerary, preferences, complete, max_workers=4):
+    """Re-request only the sections of ``itinerary`` that fail validation.
+
+    Flights, hotel, the overview (which also carries the suggestions) and
+    individual missing activity days are regenerated through ``complete``; the
+    cost breakdown and budget check are then computed locally. Returns the
+    patched itinerary.
+    """
+    problems = validate_itinerary(itinerary, trip_days(preferences))
+    specs = [(section, None, None) for section in ("flights", "hotel") if section in problems]
+    if "overview" in problems or "suggestions" in problems:
+        specs.append(("overview", None, None))
+    if "activities" in problems:
+        specs += activity_specs(missing_activity_days(itinerary, trip_days(preferences)))
+
+    if specs:
+        engine = SectionedItineraryEngine(complete, max_workers=max_workers, max_retries=1)
+        with span("repair", sections=[spec[0] for spec in specs]):
+            results, errors = engine.run_sections(preferences, specs)
+        merge_section_results(itinerary, results)
+        if errors:
+            itinerary["section_errors"] = errors
+
+    with span("costs"):
+        return apply_cost_breakdown(itinerary, preferences)
+
+
+def plan_from_index(preferences, index=None):
+    """Return ``(facts, sections, context)`` for a request, using the destination index if given.
+
+    Indexed destinations get their known areas, attractions and airlines as
+    prompt context, and skip the suggestions section when enough tips are indexed.
+    """
+    # Imported here so ``python -m travel_core.destination_index`` does not import itself twice
+    from travel_core.destination_index import format_context, has_suggestions
+
+    facts = None
+    if index is not None:
+        with span("index_lookup"):
+            facts = index.lookup(preferences['destination'], preferences.get('interests') or (),
+                                 origin=preferences.get('origin'))
+    sections = FULL_SECTIONS
+    if has_suggestions(facts):
+        sections = tuple(section for section in FULL_SECTIONS if section != "suggestions")
+    return facts, sections, format_context(facts)
+
+
+def _apply_index_facts(recommendations, facts, sections):
+    """Fill sections that were served from the index instead of the model"""
+    if "suggestions" not in sections:
+        recommendations["additional_suggestions"] = list(facts["tips"])
+    return recommendations
+
+
+def request_itinerary(preferences, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, client=None, limiter=None,
+                      index=None):
+    """Call the model once for the whole itinerary, using structured output where available.
+
+    Malformed JSON is repaired locally; if individual sections are still
+    missing or invalid only those sections are re-requested.
+    """
+    account = TokenAccount(model)
+    try:
+        facts, sections, context = plan_from_index(preferences, index)
+        complete = make_completer(
+            model, temperature, client, limiter,
+            response_format_for(model, itinerary_schema(sections)), account
+        )
+        with span("prompt"):
+            messages = build_itinerary_messages(preferences, sections, context)
+            max_tokens = max_tokens_for(preferences['duration'], sections, model)
+        content = complete(messages, max_tokens)
+        recommendations = parse_itinerary_response(content)
+        if "error" in recommendations:
+            return recommendations
+        _apply_index_facts(recommendations, facts, sections)
+        recommendations = repair_itinerary_sections(
+            recommendations, preferences, make_section_completer(model, temperature, client, limiter, account)
+        )
+        recommendations["token_usage"] = account.as_dict()
+        return recommendations
+    except Exception as e:
+        return {"error": f"Error generating recommendations: {str(e)}"}
+
+
+def _cache_lookup(cache, preferences, model, temperature, semantic=None):
+    """Return ``(cache_key, cached_itinerary_or_None)``, trying an exact match first"""
+    cache_key = itinerary_cache_key(preferences, model, temperature)
+    cached = None
+    if cache is not None:
+        with span("cache_lookup") as lookup_span:
+            cached = cache.get(cache_key)
+            lookup_span.set(hit=cached is not None)
+    if cached is None and semantic is not None:
+        with span("semantic_lookup") as lookup_span:
+            cached, similarity = semantic.lookup(preferences, model, temperature)
+            lookup_span.set(hit=cached is not None, similarity=round(similarity, 4), threshold=semantic.threshold)
+    return cache_key, cached
+
+
+def _cache_store(cache, cache_key, recommendations):
+    """Cache a complete, error-free itinerary"""
+    if cache is not None and "error" not in recommendations and "section_errors" not in recommendations:
+        cache.set(cache_key, recommendations)
+
+
+def _semantic_store(semantic, preferences, model, temperature, recommendations):
+    """Index a fresh itinerary for near-duplicate lookups"""
+    if semantic is not None and recommendations is not None:
+        semantic.add(preferences, model, temperature, recommendations)
+
+
+def _single_flight(flight, cache_key, generate):
+    """Run ``generate()``, sharing one execution between identical concurrent requests"""
+    if flight is None:
+        return generate()
+    with span("single_flight") as flight_span:
+        recommendations, shared = flight.do(cache_key, generate)
+        flight_span.set(shared=shared)
+    return recommendations
+
+
+def generate_travel_itinerary(preferences, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                              client=None, cache=None, limiter=None, index=None, flight=None, semantic=None):
+    """Generate travel itinerary with a single completion, serving repeat requests from the cache"""
+    cache_key, cached = _cache_lookup(cache, preferences, model, temperature, semantic)
+    if cached is not None:
+        return cached
+
+    def generate():
+        recommendations = request_itinerary(preferences, model, temperature, client, limiter, index)
+        _cache_store(cache, cache_key, recommendations)
+        _semantic_store(semantic, preferences, model, temperature, recommendations)
+        return recommendations
+    return _single_flight(flight, cache_key, generate)
+
+
+def generate_sectioned_itinerary(preferences, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                                 max_workers=4, client=None, cache=None, limiter=None, index=None,
+                                 flight=None, semantic=None):
+    """Generate an itinerary as parallel per-section requests, serving repeats from the cache"""
+    cache_key, cached = _cache_lookup(cache, preferences, model, temperature, semantic)
+    if cached is not None:
+        return cached
+
+    def generate():
+        recommendations = _generate_sections(preferences, model, temperature, max_workers, client, cache,
+                                             cache_key, limiter, index)
+        _semantic_store(semantic, preferences, model, temperature, recommendations)
+        return recommendations
+    return _single_flight(flight, cache_key, generate)
+
+
+def _generate_sections(preferences, model, temperature, max_workers, client, cache, cache_key, limiter, index):
+    """Run the sectioned engine for one request and cache the result"""
+    account = TokenAccount(model)
+    try:
+        facts, sections, context = plan_from_index(preferences, index)
+        engine = SectionedItineraryEngine(make_section_completer(model, temperature, client, limiter, account),
+                                          max_workers=max_workers, context=context,
+                                          suggestions="suggestions" in sections)
+        recommendations = engine.generate(preferences)
+        if "error" not in recommendations:
+            _apply_index_facts(recommendations, facts, sections)
+            recommendations["token_usage"] = account.as_dict()
+    except Exception as e:
+        return {"error": f"Error generating recommendations: {str(e)}"}
+    _cache_store(cache, cache_key, recommendations)
+    return recommendations
+
+
+def stream_travel_itinerary(preferences, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                            client=None, cache=None, limiter=None, index=None, flight=None, semantic=None):
+    """Yield itinerary sections as they stream in, ending with the full recommendations.
+
+    With a ``SingleFlight``, a request identical to one already streaming
+    waits for it and yields only the shared final result.
+    """
+    cache_key, cached = _cache_lookup(cache, preferences, model, temperature, semantic)
+    if cached is not None:
+        yield StreamEvent(ITINERARY_COMPLETE, cached, False)
+        return
+
+    call = None
+    if flight is not None:
+        call, leader = flight.begin(cache_key)
+        if not leader:
+            with span("single_flight", shared=True):
+                shared = call.wait()
+            if shared is not None:
+                yield StreamEvent(ITINERARY_COMPLETE, shared, False)
+                return
+            # The leader was closed before finishing; stream this request on its own
+            call = None
+
+    recommendations = None
+    try:
+        for event in _stream_itinerary(preferences, model, temperature, client, cache, cache_key, limiter, index):
+            if event.key == ITINERARY_COMPLETE:
+                recommendations = event.value
+                _semantic_store(semantic, preferences, model, temperature, recommendations)
+            yield event
+    finally:
+        if call is not None:
+            flight.finish(cache_key, call, recommendations)
+
+
+def _stream_itinerary(preferences, model, temperature, client, cache, cache_key, limiter, index):
+    """Stream one completion, yielding section events and finally the full itinerary"""
+    parser = IncrementalJSONParser()
+    account = TokenAccount(model)
+    try:
+        facts, sections, context = plan_from_index(preferences, index)
+        with span("prompt"):
+            messages = build_itinerary_messages(preferences, sections, context)
+            max_tokens = max_tokens_for(preferences['duration'], sections, model)
+        account.record_request(messages, max_tokens)
+        requested_at = time.perf_counter()
+        stream = create_chat_completion(
+            client,
+            limiter,
+            **_chat_kwargs(model, temperature, messages, max_tokens,
+                           response_format_for(model, itinerary_schema(sections)), stream=True,
+                           stream_options={"include_usage": True})
+        )
+        first_token_at = None
+        usage = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                    account.record_usage(usage)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield from parser.feed(delta)
+        finally:
+            finished_at = time.perf_counter()
+            add_span("time_to_first_token", requested_at, first_token_at or finished_at)
+            if first_token_at is not None:
+                add_span("generation", first_token_at, finished_at, usage=usage)
+            # Closing this generator early (e.g. a cancelled prefetch) aborts the HTTP stream
+            if hasattr(stream, "close"):
+                stream.close()
+        recommendations = parse_itinerary_response(parser.text)
+        if "error" not in recommendations:
+            _apply_index_facts(recommendations, facts, sections)
+            recommendations = repair_itinerary_sections(
+                recommendations, preferences, make_section_completer(model, temperature, client, limiter, account)
+            )
+            recommendations["token_usage"] = account.as_dict()
+    except Exception as e:
+        recommendations = {"error": f"Error generating recommendations: {str(e)}"}
+
+    _cache_store(cache, cache_key, recommendations)
+    yield StreamEvent(ITINERARY_COMPLETE, recommendations, False)
+
+
+def _parse_date(value):
+    """Parse a date from a ``date``/``datetime`` or an ISO ``YYYY-MM-DD`` string"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip()[:10])
+
+
+def preferences_from_record(record):
+    """Build a preferences dict (as the app collects it) from a loose JSON/CSV record.
+
+    ``interests`` may be a list or a ``;``/``|`` separated string. Dates default
+    to the app's defaults (today + 30 days, five nights). A multi-city trip
+    gives ``legs`` instead of a destination (see ``multicity.parse_legs``); its
+    end date follows from the nights per stop. Raises ``ValueError`` when
+    required fields are missing.
+    """
+    # Imported here because the multi-city planner builds on this module
+    from travel_core.multicity import parse_legs
+
+    legs = parse_legs(record['legs']) if record.get('legs') else []
+    if legs:
+        if len(legs) < 2:
+            raise ValueError("A multi-city trip needs at least two stops")
+        record = dict(record, destination=" → ".join(leg['destination'] for leg in legs),
+                      duration=sum(leg['nights'] for leg in legs), end_date=None)
+    destination = (record.get('destination') or '').strip()
+    origin = (record.get('origin') or '').strip()
+    missing = [name for name, value in (("destination", destination), ("origin", origin)) if not value]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    start_date = _parse_date(record['start_date']) if record.get('start_date') else datetime.date.today() + datetime.timedelta(days=30)
+    if record.get('end_date'):
+        end_date = _parse_date(record['end_date'])
+    else:
+        end_date = start_date + datetime.timedelta(days=int(record.get('duration') or 5))
+    if end_date < start_date:
+        raise ValueError("end_date is before start_date")
+
+    interests = record.get('interests') or []
+    if isinstance(interests, str):
+        interests = [item.strip() for item in re.split(r'[;|]', interests) if item.strip()]
+
+    preferences = {
+        'destination': destination,
+        'origin': origin,
+        'start_date': start_date,
+        'end_date': end_date,
+        'duration': (end_date - start_date).days,
+        'flight_budget': int(float(record.get('flight_budget') or 800)),
+        'hotel_budget': int(float(record.get('hotel_budget') or 150)),
+        'travelers': int(float(record.get('travelers') or 1)),
+        'accommodation_type': record.get('accommodation_type') or "Hotel",
+        'location_preference': record.get('location_preference') or "",
+        'interests': list(interests),
+        'model_choice': record.get('model_choice') or DEFAULT_MODEL,
+        # 0 is a valid temperature; only a missing or empty value takes the default
+        'creativity_level': (DEFAULT_TEMPERATURE if record.get('creativity_level') in (None, "")
+                             else float(record['creativity_level']))
+    }
+    if legs:
+        preferences['legs'] = legs
+    return preferences
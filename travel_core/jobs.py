@@ -0,0 +1,225 @@
+"""Background generation jobs that outlive Streamlit reruns.
+
+A ``JobQueue`` runs submitted tasks on a bounded pool of worker threads, so a
+slow completion neither blocks the script thread of the session that asked
+for it nor is abandoned or repeated when a widget interaction reruns the
+script. ``submit`` returns a job id at once; the caller polls ``status`` for
+progress and collects the result with ``result`` from the queue's store of
+finished jobs, from any rerun or session.
+
+* Concurrency is capped by ``max_workers`` (``TRAVEL_JOB_WORKERS``).
+* At most ``max_queued`` jobs wait for a worker (``TRAVEL_JOB_QUEUE_DEPTH``);
+  beyond that ``submit`` raises ``QueueFull`` so callers can push back.
+* Submitting a ``key`` that is already queued or running returns the
+  existing job instead of starting a duplicate.
+* ``cancel`` drops a queued job, and asks a running one to stop through its
+  ``cancelled`` event.
+
+Tasks are called as ``task(job)`` and may call ``job.report(...)`` to
+publish progress.
+"""
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("TRAVEL_JOB_WORKERS", 4))
+DEFAULT_MAX_QUEUED = int(os.environ.get("TRAVEL_JOB_QUEUE_DEPTH", 16))
+DEFAULT_KEEP_FINISHED = 200
+DEFAULT_RESULT_TTL_SECONDS = 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+_job_numbers = itertools.count(1)
+
+
+class QueueFull(Exception):
+    """Raised by ``JobQueue.submit`` when ``max_queued`` jobs are already waiting"""
+
+
+class Job:
+    """One submitted task with its state, progress and result"""
+
+    def __init__(self, task, key=None, attributes=None):
+        self.id = f"{next(_job_numbers)}-{uuid.uuid4().hex[:8]}"
+        self.key = key
+        self.task = task
+        self.attributes = dict(attributes or {})
+        self.state = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.cancelled = threading.Event()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def report(self, message=None, **progress):
+        """Publish progress (a status line and/or any other fields) for pollers"""
+        with self._lock:
+            if message is not None:
+                progress["message"] = message
+            self.progress = {**self.progress, **progress}
+
+    def snapshot(self):
+        """Return the job's public state as a dict"""
+        with self._lock:
+            progress = dict(self.progress)
+        now = time.time()
+        return {
+            "id": self.id,
+            "state": self.state,
+            "progress": progress,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "waited_seconds": round((self.started_at or now) - self.submitted_at, 3),
+            "elapsed_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+            **self.attributes,
+        }
+
+
+class JobQueue:
+    """Bounded worker pool with a queue-depth limit and an in-memory store of finished jobs"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_queued=DEFAULT_MAX_QUEUED,
+                 keep_finished=DEFAULT_KEEP_FINISHED, result_ttl_seconds=DEFAULT_RESULT_TTL_SECONDS):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(0, int(max_queued))
+        self.keep_finished = keep_finished
+        self.result_ttl_seconds = result_ttl_seconds
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._queue = deque()
+        self._jobs = {}
+        self._active_keys = {}
+        self._finished = OrderedDict()
+        self._workers = []
+        self._idle = 0
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "completed": 0, "failed": 0,
+                       "cancelled": 0}
+
+    def submit(self, task, key=None, **attributes):
+        """Queue ``task(job)`` and return the job id.
+
+        A ``key`` already queued or running returns that job's id. Raises
+        ``QueueFull`` when ``max_queued`` jobs are waiting for a worker.
+        """
+        with self._lock:
+            existing = self._active_keys.get(key) if key is not None else None
+            if existing is not None:
+                self._stats["deduplicated"] += 1
+                return existing.id
+            if len(self._queue) >= self.max_queued:
+                self._stats["rejected"] += 1
+                raise QueueFull(f"{len(self._queue)} jobs are already waiting; try again shortly")
+            job = Job(task, key, attributes)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job
+            self._queue.append(job)
+            self._stats["submitted"] += 1
+            # Start workers lazily, up to the limit, when none is free to take the job
+            if len(self._queue) > self._idle and len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"travel-job-{len(self._workers) + 1}",
+                                          daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._ready.notify()
+            return job.id
+
+    def _work(self):
+        while True:
+            with self._lock:
+                self._idle += 1
+                while not self._queue:
+                    self._ready.wait()
+                self._idle -= 1
+                job = self._queue.popleft()
+                job.state = RUNNING
+                job.started_at = time.time()
+            try:
+                result = job.task(job)
+            except Exception as e:
+                self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+            else:
+                if job.cancelled.is_set():
+                    self._finish(job, CANCELLED)
+                else:
+                    self._finish(job, DONE, result=result)
+
+    def _finish(self, job, state, result=None, error=None):
+        with self._lock:
+            job.state = state
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            # Drop the task (and the clients and inputs it holds) once it has run
+            job.task = None
+            if self._active_keys.get(job.key) is job:
+                del self._active_keys[job.key]
+            self._stats[{DONE: "completed", FAILED: "failed", CANCELLED: "cancelled"}[state]] += 1
+            self._finished[job.id] = job
+            self._evict_locked(job.finished_at)
+
+    def _evict_locked(self, now):
+        """Forget finished jobs past the TTL, then the oldest beyond ``keep_finished``"""
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            expired = self.result_ttl_seconds is not None and now - job.finished_at > self.result_ttl_seconds
+            if not expired and len(self._finished) <= self.keep_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def status(self, job_id):
+        """Return the job's state and progress (plus ``position`` while queued), or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            position = next((number for number, queued in enumerate(self._queue, 1) if queued is job), None)
+        status = job.snapshot()
+        if position is not None:
+            status["position"] = position
+        return status
+
+    def result(self, job_id):
+        """Return the result of a finished job (None while it runs, or if it failed or was cancelled)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.result if job is not None and job.state == DONE else None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; return False if it already finished or is unknown.
+
+        A running job stops at its next check of ``job.cancelled``; its result is discarded.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            job.cancelled.set()
+            if job.state != QUEUED:
+                return True
+            self._queue.remove(job)
+        self._finish(job, CANCELLED)
+        return True
+
+    def stats(self):
+        """Return job counters plus the current queue depth, running jobs and worker count"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+            stats["running"] = sum(1 for job in self._jobs.values() if job.state == RUNNING)
+            stats["workers"] = len(self._workers)
+        stats["max_workers"] = self.max_workers
+        stats["max_queued"] = self.max_queued
+        return stats
@@ -0,0 +1,156 @@
+"""Tolerant parsing for slightly malformed JSON emitted by language models.
+
+``repair_json`` fixes the mistakes models commonly make in long JSON answers
+so the response can be used instead of regenerating it:
+
+* prose or Markdown code fences around the object,
+* trailing commas before ``}`` or ``]``,
+* unescaped double quotes and raw newlines inside strings,
+* truncated output (an unterminated string, a dangling key, unclosed
+  arrays/objects), which is closed at the last complete value.
+"""
+import json
+import re
+
+_CLOSERS = {"{": "}", "[": "]"}
+_TRAILING_PARTIAL_LITERAL = re.compile(r"[A-Za-z]+$")
+
+
+def _next_significant(text, index):
+    """Return the next non-whitespace character at or after ``index`` ('' at the end)"""
+    while index < len(text) and text[index].isspace():
+        index += 1
+    return text[index] if index < len(text) else ""
+
+
+def _strip_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _drop_dangling_member(text, stack):
+    """Trim an incomplete trailing member (``"key":``, ``"key"``, ``,`` or a partial literal)"""
+    text = text.rstrip()
+    while True:
+        original = text
+        text = text.rstrip()
+        partial = _TRAILING_PARTIAL_LITERAL.search(text)
+        if partial and partial.group() not in ("true", "false", "null"):
+            text = text[:partial.start()].rstrip()
+        if text.endswith(","):
+            text = text[:-1].rstrip()
+        if text.endswith(":"):
+            text = text[:-1].rstrip()
+            text = _drop_trailing_string(text)
+        elif stack and stack[-1] == "{" and text.endswith('"'):
+            # A bare string directly inside an object is a key without a value
+            start = _string_start(text)
+            if start is not None and text[:start].rstrip()[-1:] in ("{", ","):
+                text = text[:start].rstrip()
+        if text == original:
+            return text
+
+
+def _string_start(text):
+    """Return the index of the opening quote of the string literal ending ``text``"""
+    index = len(text) - 2
+    while index >= 0:
+        if text[index] == '"':
+            backslashes = 0
+            probe = index - 1
+            while probe >= 0 and text[probe] == "\\":
+                backslashes += 1
+                probe -= 1
+            if backslashes % 2 == 0:
+                return index
+        index -= 1
+    return None
+
+
+def _drop_trailing_string(text):
+    start = _string_start(text) if text.endswith('"') else None
+    return text[:start].rstrip() if start is not None else text
+
+
+def repair_json(text):
+    """Return a best-effort syntactically valid version of the first JSON object in ``text``"""
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in text")
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    index = start
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+                out.append(char)
+            elif char == "\\":
+                escape = True
+                out.append(char)
+            elif char == '"':
+                follower = _next_significant(text, index + 1)
+                if follower in ("", ",", ":", "}", "]"):
+                    in_string = False
+                    out.append(char)
+                else:
+                    # A quote inside a string that does not end it
+                    out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\r":
+                out.append("\\r")
+            elif char == "\t":
+                out.append("\\t")
+            else:
+                out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            stack.append(char)
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if not stack:
+                break
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                break
+        else:
+            out.append(char)
+        index += 1
+
+    repaired = "".join(out)
+    if in_string:
+        if escape:
+            repaired = repaired[:-1]
+        repaired += '"'
+    if stack:
+        repaired = _drop_dangling_member(repaired, stack)
+        repaired += "".join(_CLOSERS[opener] for opener in reversed(stack))
+    return repaired
+
+
+def loads_tolerant(text):
+    """Parse the JSON object in ``text``, repairing it if strict parsing fails.
+
+    Returns ``(data, repaired)`` where ``repaired`` tells whether the repair
+    pass was needed. Raises ``ValueError`` if the text cannot be salvaged.
+    """
+    json_match = re.search(r'\{.*\}', text or "", re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group()), False
+        except ValueError:
+            pass
+    data = json.loads(repair_json(text or ""))
+    if not isinstance(data, dict):
+        raise ValueError("JSON value is not an object")
+    return data, True
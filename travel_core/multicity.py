@@ -0,0 +1,214 @@
+"""Multi-city trips: a hotel and activities per stop, and transport between stops.
+
+A multi-city request carries ``legs``, its stops in travel order::
+
+    [{"destination": "Paris", "nights": 3}, {"destination": "Rome", "nights": 4}]
+
+The trip starts and ends at ``origin``. Every stop gets its own hotel and
+activities, and every hop (origin to the first stop, between stops, and the
+last stop back to origin) its own transport pick: a flight, train, bus or
+ferry. All of these sections, plus one overview for the whole trip, run
+concurrently on a single pool, so the total latency is roughly that of the
+slowest section rather than the sum of the legs. The results are merged into
+one timeline with trip-wide day numbers and one cost breakdown.
+"""
+import datetime
+import re
+
+from travel_core.costs import apply_cost_breakdown
+from travel_core.generator import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    _cache_lookup,
+    _cache_store,
+    _semantic_store,
+    _single_flight,
+    make_section_completer,
+    plan_from_index,
+)
+from travel_core.prompts import TokenAccount
+from travel_core.sectioned import (
+    DEFAULT_DAYS_PER_CHUNK,
+    SectionedItineraryEngine,
+    activity_specs,
+    run_section_tasks,
+)
+from travel_core.tracing import span
+
+DEFAULT_MAX_WORKERS = 8
+
+_STOP_PATTERN = re.compile(r"^(.+)[,:]\s*(\d+)\s*(?:nights?)?$", re.IGNORECASE)
+
+
+def parse_legs(value):
+    """Parse stops into ``[{"destination", "nights"}]``.
+
+    Accepts a list of dicts (``destination`` or ``city`` plus ``nights``) or
+    text with one stop per line or ``;``/``|`` separated, each written as
+    ``City, nights`` or ``City: nights``. Raises ``ValueError`` on a stop it
+    cannot read.
+    """
+    if isinstance(value, str):
+        items = []
+        for part in re.split(r"[\n;|]", value):
+            part = part.strip()
+            if not part:
+                continue
+            match = _STOP_PATTERN.match(part)
+            if not match:
+                raise ValueError(f"Could not read stop '{part}': write it as 'City, nights'")
+            items.append({"destination": match.group(1), "nights": match.group(2)})
+    else:
+        items = list(value or [])
+
+    legs = []
+    for item in items:
+        destination = " ".join(str(item.get("destination") or item.get("city") or "").split()).strip(" ,")
+        if not destination:
+            raise ValueError("Every stop needs a city")
+        nights = int(item.get("nights") or 0)
+        if nights < 1:
+            raise ValueError(f"{destination}: a stop needs at least one night")
+        legs.append({"destination": destination, "nights": nights})
+    return legs
+
+
+def _as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def plan_legs(preferences):
+    """Return each stop with its dates and its range of trip-wide day numbers"""
+    start_date = _as_date(preferences['start_date'])
+    first_day = 1
+    legs = []
+    for number, leg in enumerate(preferences['legs'], 1):
+        end_date = start_date + datetime.timedelta(days=leg['nights'])
+        legs.append({
+            "leg": number,
+            "destination": leg['destination'],
+            "nights": leg['nights'],
+            "start_date": start_date,
+            "end_date": end_date,
+            "first_day": first_day,
+            "last_day": first_day + leg['nights'] - 1,
+        })
+        start_date = end_date
+        first_day += leg['nights']
+    return legs
+
+
+def leg_preferences(preferences, leg):
+    """Single-destination preferences for one stop"""
+    prefs = {key: value for key, value in preferences.items() if key != 'legs'}
+    prefs.update(destination=leg['destination'], start_date=leg['start_date'], end_date=leg['end_date'],
+                 duration=leg['nights'])
+    return prefs
+
+
+def hop_preferences(preferences, origin, destination, date, hops):
+    """Preferences for one transport hop, with an even share of the flight budget"""
+    prefs = {key: value for key, value in preferences.items() if key != 'legs'}
+    prefs.update(origin=origin, destination=destination, start_date=date, end_date=date,
+                 flight_budget=round(int(preferences.get('flight_budget') or 0) / hops))
+    return prefs
+
+
+def multi_city_tasks(preferences, complete, index=None, days_per_chunk=DEFAULT_DAYS_PER_CHUNK, max_retries=2):
+    """Return ``(legs, hops, tasks)``; tasks are ``run_section_tasks`` inputs for every section of the trip"""
+    legs = plan_legs(preferences)
+    stops = [preferences['origin']] + [leg['destination'] for leg in legs] + [preferences['origin']]
+    dates = [leg['start_date'] for leg in legs] + [legs[-1]['end_date']]
+    hops = [{"from": origin, "to": destination, "date": date}
+            for origin, destination, date in zip(stops, stops[1:], dates)]
+
+    engine = SectionedItineraryEngine(complete, max_retries=max_retries)
+    tasks = [(("overview",), engine, preferences, ("overview", None, None))]
+    for number, hop in enumerate(hops):
+        tasks.append((("transport", number), engine,
+                      hop_preferences(preferences, hop['from'], hop['to'], hop['date'], len(hops)),
+                      ("transport", None, None)))
+    for leg in legs:
+        prefs = leg_preferences(preferences, leg)
+        _, _, context = plan_from_index(prefs, index)
+        leg_engine = SectionedItineraryEngine(complete, max_retries=max_retries, context=context)
+        tasks.append((("hotel", leg['leg']), leg_engine, prefs, ("hotel", None, None)))
+        for spec in activity_specs(range(1, leg['nights'] + 1), days_per_chunk):
+            tasks.append((("activities", leg['leg'], spec[1]), leg_engine, prefs, spec))
+    return legs, hops, tasks
+
+
+def merge_multi_city(preferences, legs, hops, results, errors=()):
+    """Assemble the section results of a multi-city trip into one itinerary"""
+    overview = results.get(("overview",), {})
+    activities = []
+    for key, data in results.items():
+        if key[0] != "activities":
+            continue
+        leg = legs[key[1] - 1]
+        for activity in data.get("activities") or []:
+            if isinstance(activity, dict) and isinstance(activity.get("day"), int):
+                # Stops number their days from 1; the timeline uses trip-wide day numbers
+                activities.append(dict(activity, day=activity["day"] + leg['first_day'] - 1,
+                                       destination=leg['destination']))
+    activities.sort(key=lambda a: a['day'])
+
+    itinerary = {
+        "user_preferences_summary": overview.get("user_preferences_summary", ""),
+        "analysis_reasoning": overview.get("analysis_reasoning", ""),
+        "legs": [
+            dict(leg, start_date=leg['start_date'].isoformat(), end_date=leg['end_date'].isoformat(),
+                 hotel=results.get(("hotel", leg['leg']), {}).get("hotel", {}))
+            for leg in legs
+        ],
+        "transport": [
+            # The schedule, not the model, decides when each hop travels
+            {**results.get(("transport", number), {}).get("transport", {}),
+             "from": hop['from'], "to": hop['to'], "date": hop['date'].isoformat()}
+            for number, hop in enumerate(hops)
+        ],
+        "activities": activities,
+        "additional_suggestions": overview.get("additional_suggestions", []),
+        "daily_food_budget": overview.get("daily_food_budget"),
+        "transportation_local": overview.get("transportation_local"),
+    }
+    with span("costs"):
+        apply_cost_breakdown(itinerary, preferences)
+    if errors:
+        itinerary["section_errors"] = list(errors)
+    return itinerary
+
+
+def build_multi_city_itinerary(preferences, complete, max_workers=DEFAULT_MAX_WORKERS, index=None):
+    """Generate every section of a multi-city trip concurrently and merge them"""
+    legs, hops, tasks = multi_city_tasks(preferences, complete, index)
+    with span("multi_city", legs=len(legs), sections=len(tasks)):
+        results, errors = run_section_tasks(tasks, max_workers)
+    if not results:
+        return {"error": "Error generating recommendations: " + "; ".join(errors)}
+    return merge_multi_city(preferences, legs, hops, results, errors)
+
+
+def generate_multi_city_itinerary(preferences, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                                  max_workers=DEFAULT_MAX_WORKERS, client=None, cache=None, limiter=None,
+                                  index=None, flight=None, semantic=None):
+    """Generate a multi-city itinerary (``preferences['legs']``), serving repeats from the cache"""
+    cache_key, cached = _cache_lookup(cache, preferences, model, temperature, semantic)
+    if cached is not None:
+        return cached
+
+    def generate():
+        account = TokenAccount(model)
+        complete = make_section_completer(model, temperature, client, limiter, account)
+        try:
+            recommendations = build_multi_city_itinerary(preferences, complete, max_workers, index)
+        except Exception as e:
+            recommendations = {"error": f"Error generating recommendations: {str(e)}"}
+        if "error" not in recommendations:
+            recommendations["token_usage"] = account.as_dict()
+        _cache_store(cache, cache_key, recommendations)
+        _semantic_store(semantic, preferences, model, temperature, recommendations)
+        return recommendations
+    return _single_flight(flight, cache_key, generate)
@@ -0,0 +1,174 @@
+"""Generation tasks for the background job queue, free of any Streamlit dependency.
+
+``plan_itinerary`` is the whole request path of the app (prefetch reuse,
+re-planning, multi-city, model routing, parallel sections, streaming and the
+local route scheduling) as a task for ``travel_core.jobs.JobQueue``; every
+collaborator is passed in, so it runs the same in the app, in scripts and in
+benchmarks::
+
+    queue.submit(partial(plan_itinerary, preferences=..., client=..., ...))
+"""
+import time
+
+from travel_core.generator import (
+    generate_sectioned_itinerary,
+    generate_travel_itinerary,
+    stream_travel_itinerary,
+)
+from travel_core.multicity import generate_multi_city_itinerary
+from travel_core.prefetch import drain_stream
+from travel_core.replan import plan_replan, replan_itinerary
+from travel_core.streaming import ITINERARY_COMPLETE
+from travel_core.tracing import span
+
+
+def prefetch_itinerary(preferences, model, temperature, client, cache, index, flight, tracer, cancelled):
+    """Background prefetch task: generate the itinerary without touching Streamlit"""
+    with tracer.trace("prefetch", destination=preferences['destination'], days=preferences['duration']) as trace:
+        events = stream_travel_itinerary(preferences, model=model, temperature=temperature,
+                                         client=client, cache=cache, index=index, flight=flight)
+        recommendations = drain_stream(events, cancelled)
+        trace.set(status="cancelled" if recommendations is None else
+                  "error" if "error" in recommendations else "ok")
+    return recommendations
+
+
+def stream_into_job(job, events):
+    """Consume streamed itinerary events, publishing the cards received so far as the job's progress.
+
+    Returns the final itinerary, or None when the job is cancelled (the stream is closed at once).
+    """
+    partial = {}
+    try:
+        for event in events:
+            if job.cancelled.is_set():
+                return None
+            if event.key == ITINERARY_COMPLETE:
+                return event.value
+            if event.key in ('activities', 'additional_suggestions'):
+                if not event.item:
+                    continue
+                partial[event.key] = partial.get(event.key, []) + [event.value]
+            elif event.key in ('analysis_reasoning', 'flights', 'hotel'):
+                partial[event.key] = event.value
+            else:
+                continue
+            job.report(partial=dict(partial))
+    finally:
+        events.close()
+    return None
+
+
+def plan_itinerary(job, preferences, previous_preferences, previous_recommendations, model, temperature,
+                   trace_mode, auto_routing, parallel, max_workers, stream, replan, client, cache, index, flight,
+                   semantic, router, tracer, optimize_routes=True, prefetch=None):
+    """Background job: produce the itinerary for a submitted request without touching Streamlit"""
+    trace_attributes = {"mode": trace_mode, "destination": preferences['destination'], "days": preferences['duration']}
+    with tracer.trace("itinerary", **trace_attributes) as request_trace:
+        # Attach to a prefetch of the same request, if one is running or done. ``prefetch`` is
+        # ``Prefetcher.take`` bound to the request key and only claims the prefetch once the job
+        # has actually been accepted by the queue
+        prefetched = None
+        future = prefetch() if prefetch is not None else None
+        if future is not None:
+            job.report("Finishing the plan started while you were editing...")
+            try:
+                prefetched = future.result()
+            except Exception:
+                prefetched = None
+
+        # Generate AI recommendations
+        started = time.perf_counter()
+        if prefetched and "error" not in prefetched:
+            recommendations = prefetched
+        elif replan and plan_replan(previous_recommendations, previous_preferences, preferences) is not None:
+            request_trace.set(mode="replan")
+            job.report("AI is updating the parts of your plan that changed...")
+            recommendations = replan_itinerary(
+                previous_recommendations,
+                previous_preferences,
+                preferences,
+                model=model,
+                temperature=temperature,
+                client=client,
+                cache=cache,
+                index=index
+            )
+        elif preferences.get('legs'):
+            request_trace.set(mode="multi_city")
+            job.report("AI is planning every stop and the journeys between them in parallel...")
+            recommendations = generate_multi_city_itinerary(
+                preferences,
+                model=model,
+                temperature=temperature,
+                client=client,
+                cache=cache,
+                index=index,
+                flight=flight,
+                semantic=semantic
+            )
+        elif auto_routing and not stream:
+            job.report("AI is crafting your perfect travel itinerary...")
+            recommendations = router.generate(
+                preferences,
+                temperature=temperature,
+                mode="sectioned" if parallel else "single",
+                max_workers=max_workers,
+                client=client,
+                cache=cache,
+                index=index,
+                flight=flight,
+                semantic=semantic
+            )
+        elif parallel:
+            job.report("AI is planning flights, hotel and each day in parallel...")
+            recommendations = generate_sectioned_itinerary(
+                preferences,
+                model=model,
+                temperature=temperature,
+                max_workers=max_workers,
+                client=client,
+                cache=cache,
+                index=index,
+                flight=flight,
+                semantic=semantic
+            )
+        elif stream:
+            job.report("AI is crafting your perfect travel itinerary... cards appear as soon as they are ready!")
+            recommendations = stream_into_job(job, stream_travel_itinerary(
+                preferences, model=model, temperature=temperature, client=client, cache=cache, index=index,
+                flight=flight, semantic=semantic
+            ))
+            if recommendations is None:
+                request_trace.set(status="cancelled")
+                return None
+        else:
+            job.report("AI is crafting your perfect travel itinerary...")
+            recommendations = generate_travel_itinerary(
+                preferences,
+                model=model,
+                temperature=temperature,
+                client=client,
+                cache=cache,
+                index=index,
+                flight=flight,
+                semantic=semantic
+            )
+        # Multi-city trips stay with the first model: the cascade checks single-destination plans
+        if auto_routing and not preferences.get('legs') and "routing" not in recommendations:
+            job.report("Checking the plan and asking a stronger model to fix any gaps...")
+            recommendations = router.escalate(
+                recommendations,
+                preferences,
+                temperature=temperature,
+                client=client,
+                index=index,
+                seconds=None if prefetched and "error" not in prefetched else time.perf_counter() - started
+            )
+        # Regroup the activities into short daily routes locally, without another completion
+        if optimize_routes and "error" not in recommendations:
+            from travel_core.schedule import optimize_itinerary
+            with span("schedule"):
+                recommendations = optimize_itinerary(recommendations, preferences, index=index)
+        request_trace.set(status="error" if "error" in recommendations else "ok")
+    return recommendations
@@ -0,0 +1,132 @@
+"""Speculative prefetch of itineraries while the user is still editing.
+
+Once the required trip fields are valid, the app schedules a prefetch keyed
+by the request's cache key. The prefetch starts after the inputs have been
+stable for a debounce period and runs on a background thread, so by the time
+"Generate Travel Plan" is pressed the result is often ready, or at least in
+flight and can be waited on. Changing the inputs cancels the pending or
+running prefetch, and each ``Prefetcher`` (one per session) caps how many
+speculative calls run at once.
+"""
+import threading
+from concurrent.futures import Future
+
+from travel_core.streaming import ITINERARY_COMPLETE
+
+DEFAULT_DEBOUNCE_SECONDS = 1.5
+DEFAULT_MAX_IN_FLIGHT = 1
+
+
+def drain_stream(events, cancelled):
+    """Consume ``stream_travel_itinerary`` events and return the final itinerary.
+
+    Closes the stream (aborting the HTTP response) and returns None as soon as
+    ``cancelled`` is set.
+    """
+    try:
+        for event in events:
+            if cancelled.is_set():
+                return None
+            if event.key == ITINERARY_COMPLETE:
+                return event.value
+    finally:
+        events.close()
+    return None
+
+
+class _Job:
+    def __init__(self, key, task):
+        self.key = key
+        self.task = task
+        self.future = Future()
+        self.cancelled = threading.Event()
+        self.timer = None
+
+
+class Prefetcher:
+    """Debounced, cancellable background generation of the itinerary for the current inputs.
+
+    ``task`` callables passed to ``schedule`` are called as
+    ``task(cancelled)`` on a worker thread, where ``cancelled`` is a
+    ``threading.Event`` they should check to stop early.
+    """
+
+    def __init__(self, debounce_seconds=DEFAULT_DEBOUNCE_SECONDS, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.debounce_seconds = debounce_seconds
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._job = None
+        self._stats = {"scheduled": 0, "started": 0, "cancelled": 0, "completed": 0, "served": 0}
+
+    def schedule(self, key, task):
+        """Prefetch ``task`` for ``key`` once the inputs stay unchanged for the debounce period.
+
+        Scheduling the key already pending or running is a no-op; any other
+        key replaces (and cancels) the current prefetch.
+        """
+        with self._lock:
+            if self._job is not None and self._job.key == key and not self._job.cancelled.is_set():
+                return
+            self._cancel_locked()
+            job = self._job = _Job(key, task)
+            job.timer = threading.Timer(self.debounce_seconds, self._run, args=(job,))
+            job.timer.daemon = True
+            self._stats["scheduled"] += 1
+        job.timer.start()
+
+    def cancel(self):
+        """Cancel the pending or running prefetch, if any"""
+        with self._lock:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        job, self._job = self._job, None
+        if job is None or job.future.done():
+            return
+        job.cancelled.set()
+        job.timer.cancel()
+        job.future.cancel()
+        self._stats["cancelled"] += 1
+
+    def _run(self, job):
+        # Wait for a free slot, giving up if the inputs change meanwhile
+        while not self._slots.acquire(timeout=0.1):
+            if job.cancelled.is_set():
+                return
+        try:
+            if job.cancelled.is_set() or not job.future.set_running_or_notify_cancel():
+                return
+            with self._lock:
+                self._stats["started"] += 1
+            try:
+                result = job.task(job.cancelled)
+            except Exception as e:
+                job.future.set_exception(e)
+                return
+            job.future.set_result(result)
+            if result is not None:
+                with self._lock:
+                    self._stats["completed"] += 1
+        finally:
+            self._slots.release()
+
+    def take(self, key):
+        """Return the prefetch ``Future`` for ``key`` (done or still running), or None.
+
+        A prefetch still in its debounce period is cancelled and None is
+        returned, as is one cancelled mid-run; callers then generate normally.
+        """
+        with self._lock:
+            job = self._job
+            if job is None or job.key != key or job.cancelled.is_set():
+                return None
+            if not job.future.running() and not job.future.done():
+                self._cancel_locked()
+                return None
+            self._stats["served"] += 1
+            return job.future
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,210 @@
+"""Itinerary prompt building and token budgeting.
+
+The static part of the prompt (role, rules and the JSON format) lives in a
+system message that is byte-identical across requests for the same set of
+sections; only the compact trip details go into the user message.
+``max_tokens`` is sized from the trip length and the sections requested
+instead of a fixed 3000, within the model's output limit, and
+``TokenAccount`` records per-request token usage.
+"""
+import json
+import threading
+from functools import lru_cache
+
+# The cost breakdown is computed locally (travel_core.costs), never by the model
+FULL_SECTIONS = ("overview", "flights", "hotel", "activities", "suggestions")
+
+# Approximate completion tokens per section, and per trip day for activities
+_SECTION_OUTPUT_TOKENS = {"overview": 230, "flights": 200, "hotel": 200, "suggestions": 150}
+_ACTIVITY_TOKENS_PER_DAY = 180
+_MAX_TOKENS_MARGIN = 1.25
+MIN_MAX_TOKENS = 1000
+MAX_MAX_TOKENS = 16000
+
+# Largest completion each model accepts, by model name prefix (longest prefix wins)
+MODEL_MAX_OUTPUT_TOKENS = {
+    "gpt-4.1": 32768,
+    "gpt-4o": 16384,
+    "gpt-4-turbo": 4096,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 4096,
+}
+
+_ROLE = (
+    "You are a professional travel advisor with deep expertise in global travel, current pricing, "
+    "and destination-specific recommendations. Provide accurate, helpful, and budget-conscious advice."
+)
+
+_RULES = """Create a detailed, realistic itinerary for the trip the user describes.
+Rules:
+1. Realistic, current pricing in USD (2024/2025 market rates); flight prices are per traveler.
+2. Actual airlines that operate the route; real hotels with accurate locations.
+3. Day-by-day activities matching the interests, with at least one activity for every trip day.
+4. Stay within the flight and hotel budgets.
+5. Practical tips and money-saving advice; consider the dates and seasonality.
+Answer with one JSON object only, in this format:"""
+
+_SECTION_FORMATS = {
+    "overview": {
+        "user_preferences_summary": "concise summary of requirements and constraints",
+        "analysis_reasoning": "3-4 sentences on the strategy and how it fits needs and budget",
+        "daily_food_budget": "$ per person per day", "transportation_local": "$ local transport, whole trip",
+    },
+    "suggestions": {
+        "additional_suggestions": ["money-saving", "transport with costs", "dining with prices",
+                                   "weather/packing", "etiquette", "safety"],
+    },
+    "flights": {
+        "flights": {
+            "airline": "", "route": "origin to destination", "departure_date": "YYYY-MM-DD",
+            "return_date": "YYYY-MM-DD", "departure_time": "", "arrival_time": "",
+            "price": "$ per traveler", "type": "Direct|1 stop|2+ stops", "duration": "",
+            "booking_tips": "",
+        },
+    },
+    "hotel": {
+        "hotel": {
+            "name": "", "location": "area/district", "address": "", "price_per_night": "$",
+            "total_cost": "$ for all nights", "star_rating": "", "amenities": "", "booking_tips": "",
+        },
+    },
+    "activities": {
+        "activities": [{
+            "day": 1, "activity": "", "description": "", "location": "",
+            "estimated_cost": "$ per person", "duration": "", "tips": "",
+        }],
+    },
+}
+
+
+def trip_details(preferences):
+    """Render the compact, per-request trip details block"""
+    interests_str = ", ".join(preferences['interests']) if preferences.get('interests') else "general sightseeing"
+    return f"""**Trip Details:**
+- Destination: {preferences['destination']}
+- Origin: {preferences['origin']}
+- Duration: {preferences['duration']} days
+- Dates: {preferences['start_date']} to {preferences['end_date']}
+- Travelers: {preferences['travelers']}
+
+**Budget & Accommodation:**
+- Flight budget: ${preferences['flight_budget']} total
+- Hotel budget: ${preferences['hotel_budget']} per night
+- Accommodation type: {preferences['accommodation_type']}
+- Location preference: {preferences.get('location_preference') or 'city center'}
+
+**Interests & Activities:**
+- Primary interests: {interests_str}"""
+
+
+@lru_cache(maxsize=32)
+def system_prompt(sections=FULL_SECTIONS):
+    """Return the static system message for a tuple of sections (identical across requests)"""
+    response_format = {}
+    for section in FULL_SECTIONS:
+        if section in sections:
+            response_format.update(_SECTION_FORMATS[section])
+    return f"{_ROLE}\n\n{_RULES}\n{json.dumps(response_format, separators=(',', ':'))}"
+
+
+def build_itinerary_messages(preferences, sections=FULL_SECTIONS, context=None):
+    """Build the chat messages for an itinerary request.
+
+    ``context`` is optional extra text (e.g. retrieved destination facts)
+    appended to the user message.
+    """
+    user_message = trip_details(preferences)
+    if context:
+        user_message += "\n\n" + context
+    return [
+        {"role": "system", "content": system_prompt(tuple(sections))},
+        {"role": "user", "content": user_message},
+    ]
+
+
+def max_output_tokens(model):
+    """Return the largest ``max_tokens`` ``model`` accepts (``MAX_MAX_TOKENS`` for unknown models)"""
+    model = (model or "").lower()
+    prefixes = [prefix for prefix in MODEL_MAX_OUTPUT_TOKENS if model.startswith(prefix)]
+    return MODEL_MAX_OUTPUT_TOKENS[max(prefixes, key=len)] if prefixes else MAX_MAX_TOKENS
+
+
+def max_tokens_for(duration, sections=FULL_SECTIONS, model=None):
+    """Return the completion budget for a trip of ``duration`` days and the requested sections.
+
+    The budget never exceeds what ``model`` accepts, so a long trip on a
+    small model gets a shorter plan instead of a rejected request.
+    """
+    budget = sum(_SECTION_OUTPUT_TOKENS.get(section, 0) for section in sections)
+    if "activities" in sections:
+        budget += _ACTIVITY_TOKENS_PER_DAY * max(int(duration or 0), 1)
+    limit = min(max_output_tokens(model), MAX_MAX_TOKENS)
+    return int(min(limit, max(MIN_MAX_TOKENS, budget * _MAX_TOKENS_MARGIN)))
+
+
+@lru_cache(maxsize=16)
+def _encoding_for(model):
+    """Return a tiktoken encoding for ``model``, or None when tiktoken is unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model=None):
+    """Count tokens in ``text`` with tiktoken, falling back to ~4 characters per token"""
+    encoding = _encoding_for(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages, model=None):
+    """Count prompt tokens for chat messages, including the per-message overhead"""
+    return sum(count_tokens(message.get("content") or "", model) + 4 for message in messages) + 3
+
+
+class TokenAccount:
+    """Thread-safe token accounting for all completions made for one itinerary"""
+
+    def __init__(self, model=None):
+        self.model = model
+        self._lock = threading.Lock()
+        self._totals = {
+            "requests": 0,
+            "prompt_tokens_estimated": 0,
+            "max_tokens_requested": 0,
+            "prompt_tokens": 0,
+            "cached_prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def record_request(self, messages, max_tokens):
+        """Record a request's locally measured prompt size and completion budget"""
+        estimated = count_message_tokens(messages, self.model)
+        with self._lock:
+            self._totals["requests"] += 1
+            self._totals["prompt_tokens_estimated"] += estimated
+            self._totals["max_tokens_requested"] += int(max_tokens or 0)
+        return estimated
+
+    def record_usage(self, usage):
+        """Record the ``usage`` block returned by the API (may be None)"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+        with self._lock:
+            self._totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self._totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            self._totals["cached_prompt_tokens"] += cached or 0
+
+    def as_dict(self):
+        with self._lock:
+            totals = dict(self._totals)
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        return totals
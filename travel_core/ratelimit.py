@@ -0,0 +1,81 @@
+"""Token-bucket throttling for requests/min and tokens/min account limits."""
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate_per_minute) / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount=1.0):
+        """Take ``amount`` tokens if available; return 0.0 on success or the seconds to wait"""
+        # Requests larger than the bucket would never fit; let them through once it is full
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount=1.0, timeout=None):
+        """Block until ``amount`` tokens are taken; return False if ``timeout`` runs out first"""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+    def refund(self, amount):
+        """Return unused tokens, e.g. when a request used fewer tokens than reserved"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + float(amount))
+
+
+class RateLimiter:
+    """Combined requests-per-minute and tokens-per-minute limiter.
+
+    Either limit may be ``None`` to disable it.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, estimated_tokens=0):
+        """Block until one request carrying ``estimated_tokens`` may be sent"""
+        if self.requests is not None:
+            self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens:
+            self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Refund the difference between the reserved and the actually used tokens"""
+        if self.tokens is not None and actual_tokens is not None and actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Rough token estimate (4 characters per token) for a request's prompt plus completion budget"""
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return prompt_chars // 4 + int(max_tokens or 0)
@@ -0,0 +1,172 @@
+"""HTML for the itinerary cards of the results view, built once per itinerary.
+
+Writing a card through one ``st.write`` per field sends one element per line,
+and a long trip adds hundreds of them to every rerun. Each card is instead
+built as a single HTML block (escaped, styled by the app's CSS classes), and
+the blocks of an itinerary are memoized by a hash of its content, so reruns
+that show the same plan reuse them. Activities are grouped by day and split
+into pages so the view only emits the days on screen.
+"""
+import hashlib
+import html
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_DAYS_PER_PAGE = 7
+_MAX_MEMOIZED = 32
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def itinerary_hash(itinerary):
+    """Return a stable hash of an itinerary's content"""
+    canonical = json.dumps(itinerary, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _text(value, default="N/A"):
+    return html.escape(str(value)) if value not in (None, "") else default
+
+
+def _field(label, value):
+    return f"<p><strong>{label}:</strong> {_text(value)}</p>"
+
+
+def _tip(text):
+    return f'<p class="booking-tip">💡 {_text(text)}</p>' if text else ""
+
+
+def _card(header, body):
+    return f'<div class="result-card"><div class="recommendation-header">{header}</div>{body}</div>'
+
+
+def analysis_card_html(analysis):
+    return _card("🧠 Analysis and Reasoning", f"<p>{_text(analysis)}</p>")
+
+
+def flight_card_html(flight):
+    return _card("✈️ AI-Recommended Flight", "".join([
+        _field("Airline", flight.get('airline')),
+        _field("Route", flight.get('route')),
+        f"<p><strong>Dates:</strong> {_text(flight.get('departure_date'))} to {_text(flight.get('return_date'))}</p>",
+        _field("Departure", flight.get('departure_time')),
+        _field("Arrival", flight.get('arrival_time')),
+        _field("Duration", flight.get('duration')),
+        _field("Price", flight.get('price')),
+        _field("Type", flight.get('type')),
+        _tip(flight.get('booking_tips')),
+    ]))
+
+
+def hotel_card_html(hotel):
+    return _card("🏨 AI-Recommended Hotel", "".join([
+        _field("Name", hotel.get('name')),
+        _field("Location", hotel.get('location')),
+        _field("Address", hotel.get('address')),
+        _field("Rating", hotel.get('star_rating')),
+        _field("Price/Night", hotel.get('price_per_night')),
+        _field("Total Cost", hotel.get('total_cost')),
+        _field("Amenities", hotel.get('amenities')),
+        _tip(hotel.get('booking_tips')),
+    ]))
+
+
+def transport_card_html(hop):
+    return _card(f"🚆 {_text(hop.get('from'))} → {_text(hop.get('to'))}", "".join([
+        f"<p><strong>Mode:</strong> {_text(hop.get('mode'))} ({_text(hop.get('carrier'))})</p>",
+        _field("Route", hop.get('route')),
+        _field("Date", hop.get('date')),
+        _field("Departure", hop.get('departure_time')),
+        _field("Arrival", hop.get('arrival_time')),
+        _field("Duration", hop.get('duration')),
+        _field("Price", hop.get('price')),
+        _tip(hop.get('booking_tips')),
+    ]))
+
+
+def activity_html(activity):
+    tips = f"<p>💡 {_text(activity.get('tips'))}</p>" if activity.get('tips') else ""
+    return (
+        '<div class="activity-item">'
+        f"<p><strong>Day {_text(activity.get('day'))}: {_text(activity.get('activity'))}</strong></p>"
+        f"<p>📍 {_text(activity.get('location'))}</p>"
+        f"<p>{_text(activity.get('description'))}</p>"
+        f"<p>⏱️ Duration: {_text(activity.get('duration'))} | 💰 Cost: {_text(activity.get('estimated_cost'))}</p>"
+        f"{tips}</div>"
+    )
+
+
+def suggestions_card_html(suggestions):
+    return _card("💡 AI Additional Suggestions", "".join(f"<p>• {_text(item)}</p>" for item in suggestions))
+
+
+def group_days(activities):
+    """Return ``{day: [activities]}`` in day order; activities without a day number come last under None"""
+    days = {}
+    for activity in activities or ():
+        if isinstance(activity, dict):
+            day = activity.get("day") if isinstance(activity.get("day"), int) else None
+            days.setdefault(day, []).append(activity)
+    return OrderedDict(sorted(days.items(), key=lambda item: (item[0] is None, item[0] or 0)))
+
+
+class ItineraryCards:
+    """The card HTML of one itinerary, plus its days grouped for paginated display"""
+
+    def __init__(self, itinerary):
+        self.analysis = analysis_card_html(itinerary.get('analysis_reasoning', 'AI analysis not available'))
+        self.flight = flight_card_html(itinerary.get('flights') or {})
+        self.hotel = hotel_card_html(itinerary.get('hotel') or {})
+        transport = [hop for hop in itinerary.get('transport') or () if isinstance(hop, dict)]
+        legs = [leg for leg in itinerary.get('legs') or () if isinstance(leg, dict)]
+        # Each stop: its header, the journey there and its hotel
+        self.stops = [
+            (f"📍 Stop {leg.get('leg')}: {leg.get('destination')} · {leg.get('start_date')} to {leg.get('end_date')} "
+             f"({leg.get('nights')} nights, days {leg.get('first_day')}–{leg.get('last_day')})",
+             transport_card_html(transport[position]) if position < len(transport) else "",
+             hotel_card_html(leg.get('hotel') or {}))
+            for position, leg in enumerate(legs)
+        ]
+        self.journey_home = transport_card_html(transport[-1]) if legs and len(transport) > len(legs) else ""
+        self.days = []
+        for day, activities in group_days(itinerary.get('activities')).items():
+            names = ", ".join(str(a.get('activity') or "") for a in activities if a.get('activity'))
+            place = f" · {activities[0]['destination']}" if activities[0].get('destination') else ""
+            title = f"Day {day}{place}: {names}" if day is not None else f"More ideas: {names}"
+            self.days.append((day, title, "".join(activity_html(a) for a in activities)))
+        suggestions = itinerary.get('additional_suggestions') or []
+        self.suggestions = suggestions_card_html(suggestions) if suggestions else ""
+
+    def pages(self, days_per_page=DEFAULT_DAYS_PER_PAGE):
+        """Return the day pages as ``(label, [(day, title, html)])``"""
+        size = max(1, int(days_per_page))
+        pages = []
+        for start in range(0, len(self.days), size):
+            chunk = self.days[start:start + size]
+            numbers = [day for day, _, _ in chunk if day is not None]
+            if not numbers:
+                label = "More ideas"
+            elif numbers[0] == numbers[-1]:
+                label = f"Day {numbers[0]}"
+            else:
+                label = f"Days {numbers[0]}–{numbers[-1]}"
+            pages.append((label, chunk))
+        return pages
+
+
+def itinerary_cards(itinerary):
+    """Return the memoized ``ItineraryCards`` of ``itinerary``"""
+    key = itinerary_hash(itinerary)
+    with _memo_lock:
+        cards = _memo.get(key)
+        if cards is not None:
+            _memo.move_to_end(key)
+            return cards
+    cards = ItineraryCards(itinerary)
+    with _memo_lock:
+        _memo[key] = cards
+        while len(_memo) > _MAX_MEMOIZED:
+            _memo.popitem(last=False)
+    return cards
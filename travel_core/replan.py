@@ -0,0 +1,158 @@
+"""Incremental re-planning of an existing itinerary after the preferences change.
+
+Instead of regenerating the whole trip when the user edits a field, the new
+preferences are compared with the ones the itinerary was generated for and
+only the affected sections are requested again:
+
+* flights when the origin, dates or flight budget change,
+* the hotel when the nightly budget, accommodation type, preferred area or
+  number of travelers change,
+* every activity day when the interests change, otherwise only the days added
+  by a longer trip (days beyond a shorter trip are dropped),
+* the overview whenever anything changes, since it restates the preferences.
+
+Everything else is kept from the previous itinerary, and the cost breakdown
+and budget check are recomputed locally. A new destination needs a new plan,
+so ``replan_itinerary`` returns None and the caller generates from scratch;
+so do multi-city trips, whose sections are tied to their stops, and a change
+of model or creativity, which applies to every section.
+"""
+import copy
+
+from travel_core.cache import normalize_preferences
+from travel_core.costs import apply_cost_breakdown, format_usd, parse_price
+from travel_core.generator import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    _apply_index_facts,
+    _cache_lookup,
+    _cache_store,
+    make_section_completer,
+    merge_section_results,
+    plan_from_index,
+)
+from travel_core.prompts import TokenAccount
+from travel_core.schema import missing_activity_days, validate_itinerary
+from travel_core.sectioned import DEFAULT_DAYS_PER_CHUNK, SectionedItineraryEngine, activity_specs, trip_days
+from travel_core.tracing import span
+
+# Preference fields and the sections generated from them
+SECTION_DEPENDENCIES = {
+    "flights": ("origin", "start_date", "end_date", "duration", "flight_budget"),
+    "hotel": ("hotel_budget", "accommodation_type", "location_preference", "travelers"),
+    "activities": ("interests",),
+}
+# Preference fields that set how every section is generated rather than what is planned
+_GENERATION_KEYS = ("model_choice", "creativity_level")
+# Keys of an itinerary that describe how it was produced rather than the trip
+_RUN_KEYS = ("token_usage", "section_errors", "replanned", "routing", "semantic_match", "schedule")
+
+
+def changed_fields(previous_preferences, preferences):
+    """Return the set of preference fields whose normalized values differ"""
+    previous = normalize_preferences(previous_preferences or {})
+    current = normalize_preferences(preferences)
+    return {key for key in previous.keys() | current.keys() if previous.get(key) != current.get(key)}
+
+
+def plan_replan(itinerary, previous_preferences, preferences, days_per_chunk=DEFAULT_DAYS_PER_CHUNK):
+    """Return the section specs to regenerate, or None when a full regeneration is needed.
+
+    An empty list means the itinerary already matches the preferences.
+    Sections of the previous itinerary that fail validation are included too.
+    """
+    if not itinerary or "error" in itinerary or not previous_preferences:
+        return None
+    if previous_preferences.get('legs') or preferences.get('legs'):
+        return None
+    if any(previous_preferences.get(key) != preferences.get(key) for key in _GENERATION_KEYS):
+        return None
+    changed = changed_fields(previous_preferences, preferences)
+    if "destination" in changed:
+        return None
+    if not changed:
+        return []
+
+    days = trip_days(preferences)
+    problems = validate_itinerary(itinerary, days)
+    specs = [
+        (section, None, None) for section in ("flights", "hotel")
+        if section in problems or changed & set(SECTION_DEPENDENCIES[section])
+    ]
+    specs.append(("overview", None, None))
+    if changed & set(SECTION_DEPENDENCIES["activities"]):
+        new_days = range(1, days + 1)
+    else:
+        kept = [a for a in itinerary.get("activities") or [] if isinstance(a, dict)
+                and isinstance(a.get("day"), int) and a["day"] <= days]
+        new_days = missing_activity_days({"activities": kept}, days)
+    return specs + activity_specs(new_days, days_per_chunk)
+
+
+def _carry_over(itinerary, preferences, specs):
+    """Copy the parts of ``itinerary`` that stay valid for ``preferences``"""
+    carried = copy.deepcopy(itinerary)
+    for key in _RUN_KEYS:
+        carried.pop(key, None)
+    days = trip_days(preferences)
+    regenerated_days = {day for section, first, last in specs if section == "activities"
+                        for day in range(first, last + 1)}
+    carried["activities"] = [
+        a for a in carried.get("activities") or [] if isinstance(a, dict)
+        and isinstance(a.get("day"), int) and a["day"] <= days and a["day"] not in regenerated_days
+    ]
+    # A kept hotel still has the right rate, but not the right total for a different stay
+    hotel = carried.get("hotel")
+    if isinstance(hotel, dict) and ("hotel", None, None) not in specs:
+        rate = parse_price(hotel.get("price_per_night"))
+        if rate is not None:
+            hotel["total_cost"] = format_usd(rate * int(preferences.get("duration") or 0))
+    return carried
+
+
+def replan_itinerary(itinerary, previous_preferences, preferences, model=DEFAULT_MODEL,
+                     temperature=DEFAULT_TEMPERATURE, max_workers=4, client=None, cache=None,
+                     limiter=None, index=None):
+    """Update ``itinerary`` (generated for ``previous_preferences``) to match ``preferences``.
+
+    Regenerates only the sections affected by the change and returns the new
+    itinerary, with a ``replanned`` entry listing what was regenerated. Returns
+    None when the change needs a full regeneration (e.g. a new destination).
+    A cached itinerary for the new preferences is returned as is.
+    """
+    specs = plan_replan(itinerary, previous_preferences, preferences)
+    if specs is None:
+        return None
+    cache_key, cached = _cache_lookup(cache, preferences, model, temperature)
+    if cached is not None:
+        return cached
+
+    account = TokenAccount(model)
+    replanned = _carry_over(itinerary, preferences, specs)
+    errors = []
+    if specs:
+        facts, sections, context = plan_from_index(preferences, index)
+        engine = SectionedItineraryEngine(make_section_completer(model, temperature, client, limiter, account),
+                                          max_workers=max_workers, context=context,
+                                          suggestions="suggestions" in sections)
+        with span("replan", sections=sorted({spec[0] for spec in specs})):
+            results, errors = engine.run_sections(preferences, specs)
+        merge_section_results(replanned, results)
+        if ("overview", None, None) in results:
+            _apply_index_facts(replanned, facts, sections)
+
+    with span("costs"):
+        apply_cost_breakdown(replanned, preferences)
+    replanned["token_usage"] = account.as_dict()
+    if errors:
+        replanned["section_errors"] = errors
+    # Nothing regenerated: the plan is the previous one, already cached under the key it was generated for
+    if specs:
+        _cache_store(cache, cache_key, replanned)
+
+    replanned["replanned"] = {
+        "sections": sorted({spec[0] for spec in specs}),
+        "activity_days": sorted(day for section, first, last in specs if section == "activities"
+                                for day in range(first, last + 1)),
+    }
+    return replanned
@@ -0,0 +1,267 @@
+"""Model cascade: generate with a fast, cheap model and escalate only what fails.
+
+``ModelRouter`` generates the itinerary with the first model of its cascade
+and checks the result:
+
+* every section is complete (``validate_itinerary``),
+* there is an activity for every trip day and none beyond ``duration``
+  (extra days are dropped locally),
+* the flight price and nightly hotel rate are within the traveler's budgets,
+  allowing ``budget_tolerance`` over.
+
+Sections that fail are regenerated with the next, stronger model of the
+cascade, and so on until the checks pass or the cascade is exhausted. The
+routing decisions are recorded on the itinerary (``routing``) and per-model
+latency, token and cost statistics are kept for the ``stats()`` report.
+
+The cascade defaults to ``TRAVEL_MODEL_CASCADE`` (comma-separated models).
+"""
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+from travel_core.costs import apply_cost_breakdown, budget_overruns, parse_price
+from travel_core.generator import (
+    DEFAULT_TEMPERATURE,
+    _apply_index_facts,
+    _cache_lookup,
+    _cache_store,
+    _semantic_store,
+    _single_flight,
+    generate_sectioned_itinerary,
+    generate_travel_itinerary,
+    make_section_completer,
+    merge_section_results,
+    plan_from_index,
+)
+from travel_core.prompts import TokenAccount
+from travel_core.schema import missing_activity_days, validate_itinerary
+from travel_core.sectioned import SectionedItineraryEngine, activity_specs, plan_sections, trip_days
+from travel_core.tracing import span
+
+DEFAULT_CASCADE = tuple(
+    model.strip() for model in os.environ.get("TRAVEL_MODEL_CASCADE", "gpt-4.1-mini,gpt-4.1").split(",")
+    if model.strip()
+)
+DEFAULT_BUDGET_TOLERANCE = 0.1
+
+# USD per million (prompt, completion) tokens, for the cost estimates in ``stats()``
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+_LATENCY_SAMPLES = 500
+_BUDGET_SECTIONS = {"flights": "flights", "hotel per night": "hotel"}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Return the estimated USD cost of a model's token usage (None for unknown models)"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def quality_problems(itinerary, preferences, budget_tolerance=DEFAULT_BUDGET_TOLERANCE):
+    """Return ``{section: problem}`` for the parts of ``itinerary`` that fail the routing checks"""
+    if "error" in itinerary:
+        return {"itinerary": itinerary["error"]}
+    problems = validate_itinerary(itinerary, trip_days(preferences))
+    for overrun in budget_overruns(itinerary, preferences):
+        budget = parse_price(overrun["budget"])
+        estimate = parse_price(overrun["estimate"])
+        if budget is not None and estimate is not None and estimate > budget * (1 + Decimal(str(budget_tolerance))):
+            section = _BUDGET_SECTIONS.get(overrun["item"])
+            if section and section not in problems:
+                problems[section] = f"{overrun['estimate']} is over the {overrun['budget']} budget"
+    return problems
+
+
+def _drop_extra_days(itinerary, days):
+    """Remove activities outside days 1..``days``; return the number removed"""
+    activities = itinerary.get("activities")
+    if not isinstance(activities, list):
+        return 0
+    kept = [a for a in activities if isinstance(a, dict) and isinstance(a.get("day"), int) and 1 <= a["day"] <= days]
+    itinerary["activities"] = kept
+    return len(activities) - len(kept)
+
+
+def _specs_for(problems, itinerary, preferences):
+    """Return the section specs that regenerate the failing sections"""
+    if "itinerary" in problems:
+        return plan_sections(preferences)
+    specs = [(section, None, None) for section in ("flights", "hotel") if section in problems]
+    if "overview" in problems or "suggestions" in problems:
+        specs.append(("overview", None, None))
+    if "activities" in problems:
+        specs += activity_specs(missing_activity_days(itinerary, trip_days(preferences)))
+    return specs
+
+
+def _add_usage(total, usage):
+    for key, value in (usage or {}).items():
+        if isinstance(value, (int, float)):
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+class ModelRouter:
+    """Cascade of models from fastest/cheapest to strongest, with per-model statistics"""
+
+    def __init__(self, cascade=DEFAULT_CASCADE, budget_tolerance=DEFAULT_BUDGET_TOLERANCE, max_workers=4):
+        if not cascade:
+            raise ValueError("The model cascade needs at least one model")
+        self.cascade = tuple(cascade)
+        self.budget_tolerance = budget_tolerance
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._requests = {"requests": 0, "escalated": 0, "unresolved": 0}
+        self._models = {}
+
+    @property
+    def first_model(self):
+        return self.cascade[0]
+
+    @property
+    def label(self):
+        """Model name under which routed itineraries are cached"""
+        return "auto:" + "+".join(self.cascade)
+
+    def policy(self):
+        """Describe the routing policy"""
+        return {
+            "cascade": list(self.cascade),
+            "checks": ["complete sections", "one activity per trip day",
+                       f"flight and hotel within budget (+{self.budget_tolerance:.0%})"],
+            "escalation": "failing sections only, to the next model of the cascade",
+        }
+
+    def _record(self, model, seconds, usage, passed):
+        """Add one generation step to the per-model statistics"""
+        usage = usage or {}
+        with self._lock:
+            entry = self._models.setdefault(model, {
+                "runs": 0, "passed": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latencies": deque(maxlen=_LATENCY_SAMPLES),
+            })
+            entry["runs"] += 1
+            entry["passed"] += int(passed)
+            entry["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            entry["completion_tokens"] += usage.get("completion_tokens", 0)
+            if seconds is not None:
+                entry["latencies"].append(seconds)
+
+    def stats(self):
+        """Return routing counters and per-model latency, token and cost statistics"""
+        with self._lock:
+            report = dict(self._requests)
+            models = {}
+            for model, entry in self._models.items():
+                latencies = list(entry["latencies"])
+                cost = estimate_cost(model, entry["prompt_tokens"], entry["completion_tokens"])
+                models[model] = {
+                    "runs": entry["runs"],
+                    "pass_rate": round(entry["passed"] / entry["runs"], 4) if entry["runs"] else None,
+                    "p50_seconds": round(statistics.median(latencies), 3) if latencies else None,
+                    "mean_seconds": round(statistics.fmean(latencies), 3) if latencies else None,
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "completion_tokens": entry["completion_tokens"],
+                    "cost_usd": round(cost, 6) if cost is not None else None,
+                }
+        report["escalation_rate"] = round(report["escalated"] / report["requests"], 4) if report["requests"] else None
+        report["models"] = models
+        report["policy"] = self.policy()
+        return report
+
+    def escalate(self, itinerary, preferences, temperature=DEFAULT_TEMPERATURE, client=None, limiter=None,
+                 index=None, seconds=None):
+        """Check an itinerary made by the first model and regenerate its failing sections further down the cascade.
+
+        ``seconds`` is how long the first model took; pass None when the
+        itinerary was not generated just now (cache, prefetch) so it is not
+        counted in the statistics. Returns the routed itinerary.
+        """
+        itinerary = dict(itinerary)
+        itinerary.pop("routing", None)
+        days = trip_days(preferences)
+        dropped = _drop_extra_days(itinerary, days) if "error" not in itinerary else 0
+        if dropped:
+            apply_cost_breakdown(itinerary, preferences)
+        problems = quality_problems(itinerary, preferences, self.budget_tolerance)
+        steps = [{"model": self.first_model, "sections": ["all"], "problems": problems}]
+        if dropped:
+            steps[0]["dropped_extra_days"] = dropped
+        if seconds is not None:
+            self._record(self.first_model, seconds, itinerary.get("token_usage"), not problems)
+        token_usage = _add_usage({}, itinerary.get("token_usage"))
+
+        for model in self.cascade[1:]:
+            if not problems:
+                break
+            specs = _specs_for(problems, itinerary, preferences)
+            account = TokenAccount(model)
+            facts, sections, context = plan_from_index(preferences, index)
+            engine = SectionedItineraryEngine(make_section_completer(model, temperature, client, limiter, account),
+                                              max_workers=self.max_workers, context=context,
+                                              suggestions="suggestions" in sections)
+            started = time.perf_counter()
+            with span("escalate", model=model, sections=sorted({spec[0] for spec in specs})):
+                results, errors = engine.run_sections(preferences, specs)
+            elapsed = time.perf_counter() - started
+            if results:
+                if "itinerary" in problems:
+                    # Nothing usable came back from the previous model: rebuild from the sections
+                    itinerary = {"activities": []}
+                merge_section_results(itinerary, results)
+                if ("overview", None, None) in results:
+                    _apply_index_facts(itinerary, facts, sections)
+                with span("costs"):
+                    apply_cost_breakdown(itinerary, preferences)
+            problems = quality_problems(itinerary, preferences, self.budget_tolerance)
+            self._record(model, elapsed, account.as_dict(), not problems)
+            _add_usage(token_usage, account.as_dict())
+            steps.append({"model": model, "sections": sorted({spec[0] for spec in specs}), "problems": problems,
+                          **({"errors": errors} if errors else {})})
+
+        if "error" not in itinerary:
+            if token_usage:
+                itinerary["token_usage"] = token_usage
+            itinerary["routing"] = {"steps": steps, "unresolved": problems}
+        with self._lock:
+            self._requests["requests"] += 1
+            self._requests["escalated"] += int(len(steps) > 1)
+            self._requests["unresolved"] += int(bool(problems))
+        return itinerary
+
+    def generate(self, preferences, temperature=DEFAULT_TEMPERATURE, mode="single", max_workers=4, client=None,
+                 cache=None, limiter=None, index=None, flight=None, semantic=None):
+        """Generate an itinerary through the cascade (``mode`` is ``single`` or ``sectioned`` for the first model)"""
+        cache_key, cached = _cache_lookup(cache, preferences, self.label, temperature, semantic)
+        if cached is not None:
+            return cached
+
+        def generate():
+            started = time.perf_counter()
+            if mode == "sectioned":
+                first = generate_sectioned_itinerary(preferences, self.first_model, temperature, max_workers,
+                                                     client=client, limiter=limiter, index=index)
+            else:
+                first = generate_travel_itinerary(preferences, self.first_model, temperature,
+                                                  client=client, limiter=limiter, index=index)
+            itinerary = self.escalate(first, preferences, temperature, client, limiter, index,
+                                      seconds=time.perf_counter() - started)
+            if not itinerary.get("routing", {}).get("unresolved"):
+                _cache_store(cache, cache_key, itinerary)
+                _semantic_store(semantic, preferences, self.label, temperature, itinerary)
+            return itinerary
+        return _single_flight(flight, cache_key, generate)
@@ -0,0 +1,346 @@
+"""Route-aware day scheduling of an itinerary's activities, computed locally.
+
+The model writes the activities of each day with little regard to geography,
+so one day can cross the city twice while the next stays in one street.
+``optimize_itinerary`` regroups and reorders them without another completion:
+
+1. Every activity (and the hotel, the daily start and end point) is located
+   through a ``Gazetteer`` of known place names and coordinates, built from
+   the destination index. Activities that cannot be located stay on the day
+   the model gave them.
+2. The located activities are ordered along one short route through the
+   hotel: nearest neighbour, then 2-opt improvement on a NumPy distance
+   matrix.
+3. That route is cut into one contiguous stretch per trip day by dynamic
+   programming ("route first, cluster second"), minimizing the travelled
+   distance while keeping each day's activity hours plus travel time within
+   ``day_hours``. Every day that had activities keeps at least one.
+
+The new schedule is only used when it beats the original on the same
+objective. Multi-city trips are scheduled per stop, so no activity changes
+city. A 30-day trip with a hundred activities takes a few milliseconds.
+"""
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+DEFAULT_DAY_HOURS = float(os.environ.get("TRAVEL_DAY_HOURS", 9))
+DEFAULT_TRAVEL_SPEED_KMH = float(os.environ.get("TRAVEL_CITY_SPEED_KMH", 15))
+DEFAULT_ACTIVITY_HOURS = 2.0
+
+EARTH_RADIUS_KM = 6371.0
+# Cost of one hour over a day's budget, in kilometres of travel
+_OVERTIME_PENALTY_KM = 1000.0
+_MAX_TWO_OPT_ROUNDS = 2000
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_HOURS_PATTERN = re.compile(_NUMBER + r"(?:\s*(?:-|–|to)\s*" + _NUMBER + r")?\s*(?:hours?|hrs?|h)\b")
+_MINUTES_PATTERN = re.compile(_NUMBER + r"(?:\s*(?:-|–|to)\s*" + _NUMBER + r")?\s*(?:minutes?|mins?|m)\b")
+_NAMED_DURATIONS = (("full day", 8.0), ("all day", 8.0), ("whole day", 8.0), ("half day", 4.0),
+                    ("half-day", 4.0), ("evening", 3.0), ("morning", 3.0), ("afternoon", 3.0))
+
+
+def parse_duration_hours(value, default=DEFAULT_ACTIVITY_HOURS):
+    """Read a duration such as "3 hours", "2-3 hrs", "90 minutes", "1h 30m" or "Half day" as hours"""
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else default
+    text = str(value or "").casefold()
+
+    def amount(match):
+        low, high = match.group(1), match.group(2)
+        return (float(low) + float(high)) / 2 if high else float(low)
+
+    hours = sum(amount(match) for match in _HOURS_PATTERN.finditer(text))
+    hours += sum(amount(match) for match in _MINUTES_PATTERN.finditer(text)) / 60
+    if hours > 0:
+        return hours
+    return next((named for phrase, named in _NAMED_DURATIONS if phrase in text), default)
+
+
+def place_tokens(text):
+    """Normalize a place name into accent-free lowercase words ("Musée d'Orsay" -> ("musee", "d", "orsay"))"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    return tuple(re.findall(r"[a-z0-9]+", text))
+
+
+class Gazetteer:
+    """Local lookup of place names to ``(lat, lon)``, matching names that appear inside longer text"""
+
+    def __init__(self, places=()):
+        self._exact = {}
+        self._by_first_word = {}
+        for name, lat, lon in places:
+            tokens = place_tokens(name)
+            if not tokens or tokens in self._exact:
+                continue
+            self._exact[tokens] = (float(lat), float(lon))
+            self._by_first_word.setdefault(tokens[0], []).append(tokens)
+        for names in self._by_first_word.values():
+            names.sort(key=len, reverse=True)
+        self._memo = {}
+
+    @classmethod
+    def from_index(cls, index, destination):
+        """Gazetteer of one destination from a ``DestinationIndex`` (empty if there is none)"""
+        return cls(index.places(destination) if index is not None and destination else ())
+
+    def __len__(self):
+        return len(self._exact)
+
+    def _find(self, tokens):
+        """Coordinates of the longest known place name inside ``tokens``"""
+        best = None
+        for start, word in enumerate(tokens):
+            for name in self._by_first_word.get(word, ()):
+                if best is not None and len(name) <= len(best):
+                    break
+                if tokens[start:start + len(name)] == name:
+                    best = name
+                    break
+        return self._exact[best] if best is not None else None
+
+    def locate(self, *texts):
+        """Coordinates of the first text that names a known place: exact names first, then mentions"""
+        if not self._exact:
+            return None
+        key = texts
+        if key in self._memo:
+            return self._memo[key]
+        tokenized = [place_tokens(text) for text in texts if text]
+        found = next((self._exact[tokens] for tokens in tokenized if tokens in self._exact), None)
+        if found is None:
+            found = next((match for match in map(self._find, tokenized) if match), None)
+        self._memo[key] = found
+        return found
+
+
+def _own_coordinates(item):
+    """Coordinates the model put on an activity or hotel itself, if any"""
+    lat, lon = item.get("lat"), item.get("lon")
+    if lat is None and isinstance(item.get("coordinates"), (list, tuple)) and len(item["coordinates"]) == 2:
+        lat, lon = item["coordinates"]
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+
+def locate_activity(activity, gazetteer):
+    return _own_coordinates(activity) or gazetteer.locate(activity.get("location"), activity.get("activity"))
+
+
+def locate_hotel(hotel, gazetteer):
+    if not isinstance(hotel, dict):
+        return None
+    return _own_coordinates(hotel) or gazetteer.locate(hotel.get("name"), hotel.get("address"),
+                                                       hotel.get("location"))
+
+
+def distance_matrix(points):
+    """Great-circle distances in km between every pair of ``(lat, lon)`` points"""
+    radians = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    lat, lon = radians[:, 0], radians[:, 1]
+    a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+         + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def shortest_tour(distances):
+    """Return a short closed tour through every node, starting at node 0 (nearest neighbour + 2-opt)"""
+    count = len(distances)
+    tour = [0]
+    unvisited = np.ones(count, dtype=bool)
+    unvisited[0] = False
+    for _ in range(count - 1):
+        row = np.where(unvisited, distances[tour[-1]], np.inf)
+        tour.append(int(np.argmin(row)))
+        unvisited[tour[-1]] = False
+    tour = np.array(tour)
+    if count < 4:
+        return tour
+
+    # Best-improvement 2-opt: swap edges (a, b), (c, d) for (a, c), (b, d) while that shortens the tour
+    for _ in range(_MAX_TWO_OPT_ROUNDS):
+        after = np.roll(tour, -1)
+        edges = distances[tour, after]
+        delta = (distances[tour[:, None], tour[None, :]] + distances[after[:, None], after[None, :]]
+                 - edges[:, None] - edges[None, :])
+        delta = np.triu(delta, 2)
+        delta[0, count - 1] = 0.0
+        first, last = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[first, last] > -1e-9:
+            break
+        tour[first + 1:last + 1] = tour[first + 1:last + 1][::-1]
+    return tour
+
+
+class _DayCosts:
+    """Travel distance and hours of any stretch of a route, for every stretch at once"""
+
+    def __init__(self, distances, route, hours, anchored, day_hours, speed):
+        self.day_hours = day_hours
+        self.speed = speed
+        count = len(route)
+        walked = np.concatenate([[0.0], np.cumsum(distances[route[:-1], route[1:]])])
+        spent = np.concatenate([[0.0], np.cumsum(hours)])
+        starts = np.arange(count + 1)[:, None]
+        ends = np.arange(count + 1)[None, :]
+        first, last = np.minimum(starts, count - 1), np.maximum(ends - 1, 0)
+        # Stretch route[start:end]: walked between its stops, plus from and back to the hotel
+        self.length = walked[last] - walked[first]
+        if anchored:
+            self.length = self.length + distances[0, route[first]] + distances[route[last], 0]
+        self.hours = spent[ends] - spent[starts]
+        self.valid = starts < ends
+
+    def cost(self, length, hours):
+        overtime = np.maximum(0.0, hours + length / self.speed - self.day_hours)
+        return length + _OVERTIME_PENALTY_KM * overtime
+
+
+def route_length(distances, stops, anchored):
+    """Length of a day visiting ``stops`` (node numbers) in order, from and back to node 0 when anchored"""
+    path = [0, *stops, 0] if anchored and stops else list(stops)
+    return float(sum(distances[a, b] for a, b in zip(path, path[1:])))
+
+
+def split_route(costs, fixed_hours, must_fill):
+    """Cut a route into one contiguous stretch per day at minimum total cost.
+
+    ``fixed_hours`` are each day's hours already taken by activities that stay
+    put; days in ``must_fill`` need at least one stop. Returns the cut points.
+    """
+    count = costs.hours.shape[0] - 1
+    best = np.full(count + 1, np.inf)
+    best[0] = 0.0
+    choices = []
+    for day, fixed in enumerate(fixed_hours):
+        total = np.where(costs.valid, costs.cost(costs.length, costs.hours + fixed), np.inf)
+        if not must_fill[day]:
+            # An empty stretch: the day keeps only its fixed activities
+            np.fill_diagonal(total, costs.cost(0.0, fixed))
+        candidates = best[:, None] + total
+        choice = np.argmin(candidates, axis=0)
+        best = candidates[choice, np.arange(count + 1)]
+        choices.append(choice)
+    cuts = [count]
+    for choice in reversed(choices):
+        cuts.append(int(choice[cuts[-1]]))
+    return cuts[::-1]
+
+
+def schedule_activities(activities, gazetteer, hotel=None, day_hours=DEFAULT_DAY_HOURS,
+                        speed_kmh=DEFAULT_TRAVEL_SPEED_KMH):
+    """Reorder and reassign one city's activities across its days; return ``(activities, stats)``.
+
+    ``stats`` is None when fewer than two activities could be located.
+    """
+    days = sorted({a["day"] for a in activities})
+    located = [(position, coordinates) for position, coordinates in
+               ((position, locate_activity(a, gazetteer)) for position, a in enumerate(activities)) if coordinates]
+    if len(located) < 2:
+        return activities, None
+
+    anchor = locate_hotel(hotel, gazetteer)
+    # Node 0 is the hotel; without one it is a point at distance 0 from everything, making the route open
+    points = [anchor or located[0][1]] + [coordinates for _, coordinates in located]
+    distances = distance_matrix(points)
+    if anchor is None:
+        distances[0, :] = distances[:, 0] = 0.0
+    node_of = {position: node for node, (position, _) in enumerate(located, 1)}
+    hours = np.array([parse_duration_hours(a.get("duration")) for a in activities])
+
+    fixed_hours = np.zeros(len(days))
+    must_fill = np.ones(len(days), dtype=bool)
+    day_index = {day: index for index, day in enumerate(days)}
+    for position, activity in enumerate(activities):
+        if position not in node_of:
+            fixed_hours[day_index[activity["day"]]] += hours[position]
+            must_fill[day_index[activity["day"]]] = False
+
+    anchored = anchor is not None
+
+    def evaluate(positions_per_day):
+        """Kilometres travelled and the objective (distance plus overtime penalty) of a day assignment"""
+        kilometres = objective = 0.0
+        for fixed, stops in zip(fixed_hours, positions_per_day):
+            length = route_length(distances, [node_of[p] for p in stops], anchored)
+            overtime = max(0.0, fixed + hours[stops].sum() + length / speed_kmh - day_hours)
+            kilometres += length
+            objective += length + _OVERTIME_PENALTY_KM * overtime
+        return kilometres, objective
+
+    original = [[p for p in node_of if activities[p]["day"] == day] for day in days]
+    before_km, before_cost = evaluate(original)
+
+    route = shortest_tour(distances)[1:]
+    position_of = {node: position for position, node in node_of.items()}
+    costs = _DayCosts(distances, route, hours[[position_of[node] for node in route]], anchored,
+                      day_hours, speed_kmh)
+    cuts = split_route(costs, fixed_hours, must_fill)
+    planned = [[position_of[int(node)] for node in route[first:last]] for first, last in zip(cuts, cuts[1:])]
+    after_km, after_cost = evaluate(planned)
+
+    improved = after_cost < before_cost - 1e-6
+    positions_per_day = planned if improved else original
+    if not improved:
+        after_km = before_km
+
+    scheduled = []
+    moved = 0
+    for day, stops in zip(days, positions_per_day):
+        stays = [p for p, activity in enumerate(activities) if p not in node_of and activity["day"] == day]
+        for position in stops + stays:
+            moved += activities[position]["day"] != day
+            scheduled.append(dict(activities[position], day=day))
+    stats = {
+        "optimized": improved,
+        "activities": len(activities),
+        "located": len(located),
+        "moved": moved,
+        "distance_km_before": round(before_km, 1),
+        "distance_km_after": round(after_km, 1),
+    }
+    return scheduled, stats
+
+
+def optimize_itinerary(itinerary, preferences, index=None, gazetteer=None, day_hours=DEFAULT_DAY_HOURS,
+                       speed_kmh=DEFAULT_TRAVEL_SPEED_KMH):
+    """Return ``itinerary`` with its activities regrouped into short daily routes, plus a ``schedule`` summary.
+
+    Places are located with ``gazetteer`` or, per destination, with the
+    gazetteer of the ``DestinationIndex`` ``index``. The itinerary is returned
+    unchanged when it has an error or nothing could be located.
+    """
+    if "error" in itinerary or not itinerary.get("activities"):
+        return itinerary
+    legs = {leg.get("destination"): leg for leg in itinerary.get("legs") or () if isinstance(leg, dict)}
+    groups = {}
+    unscheduled = []
+    for activity in itinerary["activities"]:
+        if isinstance(activity, dict) and isinstance(activity.get("day"), int):
+            groups.setdefault(activity.get("destination") if legs else None, []).append(activity)
+        else:
+            unscheduled.append(activity)
+
+    activities = []
+    totals = {}
+    for destination, group in groups.items():
+        hotel = legs[destination].get("hotel") if destination in legs else itinerary.get("hotel")
+        places = gazetteer or Gazetteer.from_index(index, destination or preferences.get("destination"))
+        scheduled, stats = schedule_activities(group, places, hotel, day_hours, speed_kmh)
+        activities.extend(scheduled)
+        for key, value in (stats or {}).items():
+            totals[key] = totals.get(key, 0) + value
+    if not totals:
+        return itinerary
+
+    activities.sort(key=lambda a: a["day"])
+    totals["optimized"] = bool(totals["optimized"])
+    totals["distance_km_before"] = round(totals["distance_km_before"], 1)
+    totals["distance_km_after"] = round(totals["distance_km_after"], 1)
+    return dict(itinerary, activities=activities + unscheduled, schedule=totals)
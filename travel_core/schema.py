@@ -0,0 +1,136 @@
+"""JSON schema, structured-output settings and validation for itineraries."""
+
+
+def _object(properties):
+    """Strict-mode object schema: every property required, no extras"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+
+FLIGHTS_SCHEMA = _object({
+    name: _STRING for name in (
+        "airline", "route", "departure_date", "return_date", "departure_time",
+        "arrival_time", "price", "type", "duration", "booking_tips",
+    )
+})
+
+HOTEL_SCHEMA = _object({
+    name: _STRING for name in (
+        "name", "location", "address", "price_per_night", "total_cost",
+        "star_rating", "amenities", "booking_tips",
+    )
+})
+
+ACTIVITY_SCHEMA = _object({
+    "day": {"type": "integer"},
+    "activity": _STRING,
+    "description": _STRING,
+    "location": _STRING,
+    "estimated_cost": _STRING,
+    "duration": _STRING,
+    "tips": _STRING,
+})
+
+_SECTION_PROPERTIES = {
+    "overview": {
+        "user_preferences_summary": _STRING,
+        "analysis_reasoning": _STRING,
+        "daily_food_budget": _STRING,
+        "transportation_local": _STRING,
+    },
+    "flights": {"flights": FLIGHTS_SCHEMA},
+    "hotel": {"hotel": HOTEL_SCHEMA},
+    "activities": {"activities": {"type": "array", "items": ACTIVITY_SCHEMA}},
+    "suggestions": {"additional_suggestions": {"type": "array", "items": _STRING}},
+}
+
+
+def itinerary_schema(sections=tuple(_SECTION_PROPERTIES)):
+    """Return the strict JSON schema for an itinerary made of the given sections"""
+    properties = {}
+    for section in sections:
+        properties.update(_SECTION_PROPERTIES[section])
+    return _object(properties)
+
+
+ITINERARY_SCHEMA = itinerary_schema()
+
+# Model name prefixes by the strongest structured-output mode they support
+_JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+_JSON_OBJECT_MODELS = ("gpt-3.5-turbo", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125")
+_LEGACY_MODELS = ("gpt-3.5-turbo-0301", "gpt-3.5-turbo-0613", "gpt-3.5-turbo-16k")
+
+
+def structured_output_mode(model):
+    """Return ``"json_schema"``, ``"json_object"`` or None for a model name"""
+    model = (model or "").lower()
+    if model.startswith(_JSON_SCHEMA_MODELS):
+        return "json_schema"
+    if model.startswith(_JSON_OBJECT_MODELS) and not model.startswith(_LEGACY_MODELS):
+        return "json_object"
+    return None
+
+
+def response_format_for(model, schema=ITINERARY_SCHEMA, name="travel_itinerary"):
+    """Return the ``response_format`` argument for ``model``, or None if it has no JSON mode"""
+    mode = structured_output_mode(model)
+    if mode == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def _missing_fields(section, required):
+    if not isinstance(section, dict):
+        return list(required)
+    return [field for field in required if not str(section.get(field) or "").strip()]
+
+
+def missing_activity_days(itinerary, days):
+    """Return the trip days (1..days) that have no activity in the itinerary"""
+    activities = itinerary.get("activities")
+    if not isinstance(activities, list):
+        return list(range(1, days + 1))
+    covered = set()
+    for activity in activities:
+        if isinstance(activity, dict) and str(activity.get("activity") or "").strip():
+            try:
+                covered.add(int(activity.get("day")))
+            except (TypeError, ValueError):
+                continue
+    return [day for day in range(1, days + 1) if day not in covered]
+
+
+def validate_itinerary(itinerary, days=None):
+    """Return ``{section: problem}`` for each section of the itinerary that is unusable.
+
+    Sections are ``overview`` (summary and reasoning), ``flights``, ``hotel``,
+    ``activities`` and ``suggestions``; the cost breakdown is computed locally
+    and not validated. When ``days`` is given, every trip day must have at
+    least one activity.
+    """
+    problems = {}
+    if not str(itinerary.get("analysis_reasoning") or "").strip():
+        problems["overview"] = "missing analysis"
+    if not isinstance(itinerary.get("additional_suggestions"), list) or not itinerary["additional_suggestions"]:
+        problems["suggestions"] = "missing suggestions"
+    missing = _missing_fields(itinerary.get("flights"), ("airline", "price"))
+    if missing:
+        problems["flights"] = "missing " + ", ".join(missing)
+    missing = _missing_fields(itinerary.get("hotel"), ("name", "price_per_night"))
+    if missing:
+        problems["hotel"] = "missing " + ", ".join(missing)
+    if not isinstance(itinerary.get("activities"), list) or not itinerary["activities"]:
+        problems["activities"] = "missing activities"
+    elif days:
+        missing_days = missing_activity_days(itinerary, days)
+        if missing_days:
+            problems["activities"] = "no activities for day(s) " + ", ".join(map(str, missing_days))
+    return problems
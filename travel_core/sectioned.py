@@ -0,0 +1,301 @@
+"""Parallel sectioned itinerary generation.
+
+Instead of one long completion that writes flights, hotel, every day's
+activities and the suggestions one after another, the engine fans the work
+out into independent sub-requests (flights, hotel, overview and one request
+per chunk of days) that run concurrently on a bounded thread pool. Wall-clock
+time is then bounded by the slowest section rather than the sum of all of
+them. A final merge step assembles the itinerary and computes the
+``cost_breakdown`` locally.
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from travel_core.costs import apply_cost_breakdown
+from travel_core.json_repair import loads_tolerant
+from travel_core.prompts import trip_details
+from travel_core.tracing import span
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_DAYS_PER_CHUNK = 3
+DEFAULT_MAX_RETRIES = 2
+
+SECTION_SYSTEM_PROMPT = (
+    "You are a professional travel advisor with deep expertise in global travel, current "
+    "pricing, and destination-specific recommendations. You write one part of a larger "
+    "itinerary at a time and answer with a single JSON object only."
+)
+
+_FLIGHTS_SCHEMA = """{{
+    "flights": {{
+        "airline": "Specific airline name (e.g., Delta, American Airlines)",
+        "route": "{origin} to {destination}",
+        "departure_date": "{start_date}",
+        "return_date": "{end_date}",
+        "departure_time": "Realistic departure time",
+        "arrival_time": "Realistic arrival time",
+        "price": "Realistic price per traveler in USD format (e.g., $650)",
+        "type": "Direct, 1 stop, or 2+ stops",
+        "duration": "Total travel time",
+        "booking_tips": "Specific actionable booking advice"
+    }}
+}}"""
+
+_HOTEL_SCHEMA = """{{
+    "hotel": {{
+        "name": "Specific hotel name or type of accommodation",
+        "location": "Specific area/district in {destination}",
+        "address": "General area description",
+        "price_per_night": "Price in USD format (e.g., $120)",
+        "total_cost": "Total cost for {duration} nights",
+        "star_rating": "Hotel star rating or quality level",
+        "amenities": "Key amenities (WiFi, breakfast, gym, etc.)",
+        "booking_tips": "Best booking platforms or timing advice"
+    }}
+}}"""
+
+_OVERVIEW_SCHEMA = """{{
+    "user_preferences_summary": "Concise summary of key user requirements and constraints",
+    "analysis_reasoning": "Detailed 3-4 sentence explanation of your recommendation strategy and how it meets the user's needs and budget",{suggestions}
+    "daily_food_budget": "Suggested daily food budget per person in USD (e.g., $60)",
+    "transportation_local": "Local transportation estimate for the whole trip in USD (e.g., $80)"
+}}"""
+
+# Left out of the overview when the destination index supplies the suggestions
+_OVERVIEW_SUGGESTIONS = """
+    "additional_suggestions": [
+        "Money-saving tip with specific actionable advice",
+        "Transportation recommendation with costs",
+        "Local dining suggestion with price ranges",
+        "Weather/packing advice for the dates",
+        "Cultural etiquette or local customs tip",
+        "Emergency contact or safety advice"
+    ],"""
+
+_ACTIVITIES_SCHEMA = """{{
+    "activities": [
+        {{
+            "day": {first_day},
+            "activity": "Specific activity name",
+            "description": "Detailed description of the activity",
+            "location": "Where in the city",
+            "estimated_cost": "Cost estimate per person in USD (e.g., $25)",
+            "duration": "How long to spend",
+            "tips": "Insider tips and recommendations"
+        }}
+    ]
+}}"""
+
+_TRANSPORT_SCHEMA = """{{
+    "transport": {{
+        "mode": "Flight, Train, Bus or Ferry",
+        "carrier": "Specific airline or operator (e.g., Air France, Trenitalia)",
+        "route": "{origin} to {destination}",
+        "date": "{start_date}",
+        "departure_time": "Realistic departure time",
+        "arrival_time": "Realistic arrival time",
+        "price": "Realistic price per traveler in USD format (e.g., $120)",
+        "duration": "Total travel time",
+        "booking_tips": "Specific actionable booking advice"
+    }}
+}}"""
+
+# Completion budget per section; activities scale with the number of days
+_SECTION_MAX_TOKENS = {"flights": 400, "hotel": 400, "overview": 800, "transport": 350}
+# Sections whose answer is a single object under the section's name
+_OBJECT_SECTIONS = ("flights", "hotel", "transport")
+_TOKENS_PER_ACTIVITY_DAY = 300
+
+
+class SectionError(Exception):
+    """Raised when a section could not be generated after all retries"""
+
+
+def trip_days(preferences):
+    """Return the number of activity days for a trip (at least one)"""
+    return max(int(preferences.get('duration') or 0), 1)
+
+
+def plan_sections(preferences, days_per_chunk=DEFAULT_DAYS_PER_CHUNK):
+    """Return the list of section specs ``(name, first_day, last_day)`` for a trip"""
+    sections = [("flights", None, None), ("hotel", None, None), ("overview", None, None)]
+    return sections + activity_specs(range(1, trip_days(preferences) + 1), days_per_chunk)
+
+
+def activity_specs(days, days_per_chunk=DEFAULT_DAYS_PER_CHUNK):
+    """Group trip days into ``("activities", first_day, last_day)`` specs of consecutive days"""
+    specs = []
+    for day in sorted(set(days)):
+        if specs and specs[-1][2] == day - 1 and day - specs[-1][1] < days_per_chunk:
+            specs[-1] = ("activities", specs[-1][1], day)
+        else:
+            specs.append(("activities", day, day))
+    return specs
+
+
+def build_section_messages(preferences, section, first_day=None, last_day=None, context=None, suggestions=True):
+    """Build the chat messages for a single itinerary section.
+
+    ``context`` (e.g. retrieved destination facts) is included for the
+    flights, hotel and activities sections. Without ``suggestions`` the
+    overview does not ask for tips (they come from the destination index).
+    """
+    fields = dict(preferences)
+    if section == "flights":
+        task = "Recommend the best flight for this trip. Suggest an actual airline that operates on this route and stay within the flight budget."
+        schema = _FLIGHTS_SCHEMA.format(**fields)
+    elif section == "hotel":
+        task = "Recommend one real hotel or accommodation with accurate location info, within the hotel budget."
+        schema = _HOTEL_SCHEMA.format(**fields)
+    elif section == "transport":
+        task = (
+            f"Recommend the best way to travel from {preferences['origin']} to {preferences['destination']} "
+            f"on {preferences['start_date']}: a flight, or a train, bus or ferry when that is faster or cheaper "
+            "door to door. Stay within the flight budget for this journey."
+        )
+        schema = _TRANSPORT_SCHEMA.format(**fields)
+    elif section == "overview":
+        if suggestions:
+            task = "Summarize the user's requirements, explain the overall recommendation strategy and give practical tips and money-saving advice."
+        else:
+            task = "Summarize the user's requirements and explain the overall recommendation strategy."
+        schema = _OVERVIEW_SCHEMA.format(suggestions=_OVERVIEW_SUGGESTIONS if suggestions else "")
+    elif section == "activities":
+        task = (
+            f"Create day-by-day activities for days {first_day} to {last_day} of the trip only, "
+            "matching the user's interests. Include at least one activity per day and use the "
+            "day number of the trip for each activity."
+        )
+        schema = _ACTIVITIES_SCHEMA.format(first_day=first_day)
+    else:
+        raise ValueError(f"Unknown itinerary section: {section}")
+
+    details = trip_details(preferences)
+    if context and section != "overview":
+        details += "\n\n" + context
+    prompt = f"""{details}
+
+**Task:**
+{task}
+Provide realistic and current pricing (consider 2024/2025 market rates).
+
+Respond with JSON in this exact format:
+{schema}"""
+    return [
+        {"role": "system", "content": SECTION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def section_max_tokens(section, first_day=None, last_day=None):
+    """Return the completion budget for a section"""
+    if section == "activities":
+        return _TOKENS_PER_ACTIVITY_DAY * (last_day - first_day + 1) + 100
+    return _SECTION_MAX_TOKENS[section]
+
+
+def run_section_tasks(tasks, max_workers=DEFAULT_MAX_WORKERS):
+    """Run ``(key, engine, preferences, spec)`` tasks on one pool; return ``(results_by_key, errors)``.
+
+    Tasks may use different engines and preferences (e.g. the legs of a
+    multi-city trip), so the slowest task bounds the wall-clock time.
+    """
+    results = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        # Each section runs in a copy of the caller's context so its spans join the active trace
+        futures = {
+            executor.submit(contextvars.copy_context().run, engine.generate_section, preferences, *spec): key
+            for key, engine, preferences, spec in tasks
+        }
+        for future, key in futures.items():
+            try:
+                results[key] = future.result()
+            except SectionError as e:
+                errors.append(str(e))
+    return results, errors
+
+
+class SectionedItineraryEngine:
+    """Generate an itinerary as concurrent per-section completions and merge the results.
+
+    ``complete`` is any callable ``complete(messages, max_tokens) -> str`` that
+    returns the text of a chat completion.
+    """
+
+    def __init__(self, complete, max_workers=DEFAULT_MAX_WORKERS,
+                 days_per_chunk=DEFAULT_DAYS_PER_CHUNK, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_delay=0.5, context=None, suggestions=True):
+        self.complete = complete
+        self.max_workers = max(1, int(max_workers))
+        self.days_per_chunk = max(1, int(days_per_chunk))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = retry_delay
+        self.context = context
+        self.suggestions = suggestions
+
+    def generate_section(self, preferences, section, first_day=None, last_day=None):
+        """Generate and parse one section, retrying on API or parse failures"""
+        with span("section", section=section, first_day=first_day, last_day=last_day) as section_span:
+            messages = build_section_messages(preferences, section, first_day, last_day, self.context,
+                                              self.suggestions)
+            max_tokens = section_max_tokens(section, first_day, last_day)
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                section_span.set(attempts=attempt + 1)
+                if attempt:
+                    time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+                try:
+                    content = self.complete(messages, max_tokens)
+                    with span("parse", section=section):
+                        data, _ = loads_tolerant(content)
+                except Exception as e:
+                    last_error = e
+                    continue
+                if section in _OBJECT_SECTIONS and not isinstance(data.get(section), dict):
+                    last_error = ValueError(f"Missing '{section}' object")
+                    continue
+                if section == "activities" and not isinstance(data.get("activities"), list):
+                    last_error = ValueError("Missing 'activities' list")
+                    continue
+                return data
+            raise SectionError(f"{section} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def run_sections(self, preferences, sections):
+        """Generate the given section specs concurrently; return ``(results, errors)``"""
+        return run_section_tasks([(spec, self, preferences, spec) for spec in sections], self.max_workers)
+
+    def generate(self, preferences):
+        """Generate all sections concurrently and return the merged itinerary"""
+        sections = plan_sections(preferences, self.days_per_chunk)
+        results, errors = self.run_sections(preferences, sections)
+
+        if not results:
+            return {"error": "Error generating recommendations: " + "; ".join(errors)}
+        return self.merge(preferences, sections, results, errors)
+
+    def merge(self, preferences, sections, results, errors=()):
+        """Assemble section results into the itinerary shape used by the app"""
+        overview = results.get(("overview", None, None), {})
+        activities = []
+        for spec in sections:
+            if spec[0] == "activities" and spec in results:
+                activities.extend(a for a in results[spec]["activities"] if isinstance(a, dict))
+        activities.sort(key=lambda a: a.get('day') if isinstance(a.get('day'), int) else 0)
+
+        itinerary = {
+            "user_preferences_summary": overview.get("user_preferences_summary", ""),
+            "analysis_reasoning": overview.get("analysis_reasoning", ""),
+            "flights": results.get(("flights", None, None), {}).get("flights", {}),
+            "hotel": results.get(("hotel", None, None), {}).get("hotel", {}),
+            "activities": activities,
+            "additional_suggestions": overview.get("additional_suggestions", []),
+            "daily_food_budget": overview.get("daily_food_budget"),
+            "transportation_local": overview.get("transportation_local"),
+        }
+        with span("costs"):
+            apply_cost_breakdown(itinerary, preferences)
+        if errors:
+            itinerary["section_errors"] = list(errors)
+        return itinerary
@@ -0,0 +1,292 @@
+"""Similarity-based reuse of itineraries for near-identical trip requests.
+
+The exact-match ``ItineraryCache`` misses requests that describe the same trip
+in different words: "Paris" vs "Paris, France", "NYC" vs "New York", budgets
+$25 apart or the same interests in another order. ``SemanticCache`` sits
+behind it:
+
+* city names are normalized through a local alias table,
+* destination, trip length, number of travelers, model and temperature must
+  match exactly,
+* budgets must fall in the same or a neighboring range and the travel
+  month may differ by at most one,
+* everything else (origin, budgets bucketed into ranges, travel month,
+  accommodation, preferred area and interests) is turned into a hashed
+  feature vector, and the closest prior request is found by cosine
+  similarity with NumPy (imported with the first stored itinerary).
+
+A prior itinerary at or above the similarity threshold is reused: its flight
+dates are shifted to the new start date and the cost breakdown and budget
+check are recomputed for the new budgets. The match is recorded on the
+itinerary (``semantic_match``) and in ``stats()`` so hit quality can be
+reviewed and the threshold tuned.
+"""
+import copy
+import datetime
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from travel_core.costs import apply_cost_breakdown
+from travel_core.destination_index import destination_key
+
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get("TRAVEL_SEMANTIC_THRESHOLD", 0.92))
+DEFAULT_DIMENSIONS = 256
+DEFAULT_MAX_TRIPS = 1000
+DEFAULT_MAX_PER_TRIP = 50
+
+# Budget ranges: requests in the same or a neighboring range look alike
+_BUDGET_BUCKETS = {"flight_budget": 100, "hotel_budget": 50}
+_FEATURE_WEIGHTS = {"origin": 2.0, "accommodation": 1.0, "interest": 1.0, "area": 0.5, "month": 1.0}
+
+CITY_ALIASES = {
+    "nyc": "new york", "new york city": "new york", "ny": "new york", "manhattan": "new york",
+    "la": "los angeles", "l.a.": "los angeles",
+    "sf": "san francisco", "san fran": "san francisco",
+    "dc": "washington", "washington dc": "washington", "washington d.c.": "washington",
+    "vegas": "las vegas", "philly": "philadelphia", "chi-town": "chicago",
+    "nola": "new orleans", "rio": "rio de janeiro", "cdmx": "mexico city", "ciudad de mexico": "mexico city",
+    "saigon": "ho chi minh city", "hcmc": "ho chi minh city", "bombay": "mumbai", "peking": "beijing",
+    "kiev": "kyiv", "praha": "prague", "roma": "rome",
+    "firenze": "florence", "venezia": "venice", "napoli": "naples", "milano": "milan",
+    "münchen": "munich", "muenchen": "munich", "wien": "vienna", "lisboa": "lisbon",
+    "köln": "cologne", "koln": "cologne", "bruxelles": "brussels", "den haag": "the hague",
+    "københavn": "copenhagen", "kobenhavn": "copenhagen", "moskva": "moscow",
+    "hk": "hong kong", "bkk": "bangkok", "krung thep": "bangkok",
+}
+
+
+def canonical_city(name):
+    """Normalize a city name ("Paris, France" -> "paris", "NYC" -> "new york")"""
+    key = destination_key(name)
+    return CITY_ALIASES.get(key, key)
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def trip_signature(preferences, model, temperature):
+    """Return the fields a reusable itinerary must match exactly"""
+    return (
+        canonical_city(preferences.get('destination')),
+        int(preferences.get('duration') or 0),
+        int(preferences.get('travelers') or 1),
+        model,
+        round(float(temperature), 3),
+        tuple((canonical_city(leg.get('destination')), int(leg.get('nights') or 0))
+              for leg in preferences.get('legs') or ()),
+    )
+
+
+def preference_features(preferences):
+    """Return the weighted features describing the flexible parts of a trip request"""
+    features = {}
+
+    def add(name, weight):
+        features[name] = features.get(name, 0.0) + weight
+
+    add(f"origin:{canonical_city(preferences.get('origin'))}", _FEATURE_WEIGHTS["origin"])
+    add(f"accommodation:{destination_key(preferences.get('accommodation_type'))}", _FEATURE_WEIGHTS["accommodation"])
+    for interest in preferences.get('interests') or ():
+        add(f"interest:{destination_key(interest)}", _FEATURE_WEIGHTS["interest"])
+    for word in (preferences.get('location_preference') or "").casefold().split():
+        add(f"area:{word.strip('.,;')}", _FEATURE_WEIGHTS["area"])
+    start_date = _as_date(preferences.get('start_date'))
+    if start_date is not None:
+        add(f"month:{start_date.month}", _FEATURE_WEIGHTS["month"])
+    # Soft buckets: a budget contributes to its range and the next one in proportion to its position
+    for field, width in _BUDGET_BUCKETS.items():
+        position = float(preferences.get(field) or 0) / width
+        lower = math.floor(position)
+        add(f"{field}:{lower}", 1.0 - (position - lower))
+        add(f"{field}:{lower + 1}", position - lower)
+    return features
+
+
+def preference_gates(preferences):
+    """Return the budget buckets and travel month a reusable itinerary must be close to"""
+    start_date = _as_date(preferences.get('start_date'))
+    return {
+        **{field: math.floor(float(preferences.get(field) or 0) / width) for field, width in _BUDGET_BUCKETS.items()},
+        "month": start_date.month if start_date is not None else None,
+    }
+
+
+def gates_match(gates, other):
+    """True when every budget is in the same or a neighboring bucket and the months are at most one apart"""
+    if any(abs(gates[field] - other[field]) > 1 for field in _BUDGET_BUCKETS):
+        return False
+    if gates["month"] is None or other["month"] is None:
+        return gates["month"] == other["month"]
+    apart = abs(gates["month"] - other["month"])
+    return min(apart, 12 - apart) <= 1
+
+
+def embed_features(features, dimensions=DEFAULT_DIMENSIONS):
+    """Hash weighted features into a unit vector (stable across processes)"""
+    import numpy as np
+    vector = np.zeros(dimensions)
+    for name, weight in features.items():
+        digest = int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big")
+        vector[digest % dimensions] += weight if digest >> 63 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _shift_fields(record, keys, days):
+    if not isinstance(record, dict):
+        return
+    for key in keys:
+        value = _as_date(record.get(key)) if record.get(key) else None
+        if value is not None:
+            record[key] = (value + datetime.timedelta(days=days)).isoformat()
+
+
+def shift_itinerary_dates(itinerary, days):
+    """Move the flight, stop and hop dates of ``itinerary`` by ``days`` (activities are relative to the trip)"""
+    if not days:
+        return itinerary
+    _shift_fields(itinerary.get("flights"), ("departure_date", "return_date"), days)
+    for leg in itinerary.get("legs") or ():
+        _shift_fields(leg, ("start_date", "end_date"), days)
+    for hop in itinerary.get("transport") or ():
+        _shift_fields(hop, ("date",), days)
+    return itinerary
+
+
+class _Trip:
+    """The stored requests of one exact trip signature"""
+
+    def __init__(self, dimensions):
+        import numpy as np
+        self.vectors = np.zeros((0, dimensions))
+        self.entries = []
+
+
+class SemanticCache:
+    """In-memory nearest-neighbor index of generated itineraries.
+
+    Requests are grouped by ``trip_signature``; at most ``max_trips`` groups
+    (least recently used evicted first) of ``max_per_trip`` itineraries each
+    are kept. ``with_threshold`` returns a view sharing the same index, so
+    each caller can use its own threshold.
+    """
+
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD, dimensions=DEFAULT_DIMENSIONS,
+                 max_trips=DEFAULT_MAX_TRIPS, max_per_trip=DEFAULT_MAX_PER_TRIP):
+        self.threshold = threshold
+        self.dimensions = dimensions
+        self.max_trips = max_trips
+        self.max_per_trip = max_per_trip
+        self._trips = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stores": 0, "similarity_sum": 0.0,
+                       "min_hit_similarity": None}
+
+    def with_threshold(self, threshold):
+        """Return a view of this cache that matches with a different threshold"""
+        view = copy.copy(self)
+        view.threshold = threshold
+        return view
+
+    def add(self, preferences, model, temperature, itinerary):
+        """Index a complete, error-free itinerary generated for ``preferences``"""
+        import numpy as np
+        if "error" in itinerary or itinerary.get("section_errors") or itinerary.get("semantic_match"):
+            return
+        signature = trip_signature(preferences, model, temperature)
+        vector = embed_features(preference_features(preferences), self.dimensions)
+        entry = {
+            "destination": preferences.get('destination'),
+            "origin": preferences.get('origin'),
+            "start_date": _as_date(preferences.get('start_date')),
+            "gates": preference_gates(preferences),
+            "itinerary": copy.deepcopy(itinerary),
+        }
+        with self._lock:
+            trip = self._trips.get(signature)
+            if trip is None:
+                trip = self._trips[signature] = _Trip(self.dimensions)
+                while len(self._trips) > self.max_trips:
+                    self._trips.popitem(last=False)
+            self._trips.move_to_end(signature)
+            trip.vectors = np.vstack([trip.vectors, vector])[-self.max_per_trip:]
+            trip.entries = (trip.entries + [entry])[-self.max_per_trip:]
+            self._stats["stores"] += 1
+
+    def best_match(self, preferences, model, temperature):
+        """Return ``(similarity, entry)`` of the closest stored request, or ``(0.0, None)``.
+
+        Only requests passing ``gates_match`` (budgets and month close enough)
+        are compared, so many shared interests cannot outweigh a budget change.
+        """
+        signature = trip_signature(preferences, model, temperature)
+        vector = embed_features(preference_features(preferences), self.dimensions)
+        gates = preference_gates(preferences)
+        with self._lock:
+            trip = self._trips.get(signature)
+            if trip is None or not trip.entries:
+                return 0.0, None
+            self._trips.move_to_end(signature)
+            candidates = [position for position, entry in enumerate(trip.entries)
+                          if gates_match(gates, entry["gates"])]
+            if not candidates:
+                return 0.0, None
+            similarities = trip.vectors[candidates] @ vector
+            best = int(similarities.argmax())
+            return float(similarities[best]), trip.entries[candidates[best]]
+
+    def lookup(self, preferences, model, temperature):
+        """Return a copy of the itinerary of a near-identical prior request, adapted to ``preferences``.
+
+        Returns ``(itinerary_or_None, similarity_of_the_closest_request)``.
+        """
+        similarity, entry = self.best_match(preferences, model, temperature)
+        hit = entry is not None and similarity >= self.threshold
+        with self._lock:
+            self._stats["lookups"] += 1
+            if not hit:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats["similarity_sum"] += similarity
+                lowest = self._stats["min_hit_similarity"]
+                self._stats["min_hit_similarity"] = round(similarity if lowest is None else min(lowest, similarity), 4)
+        if not hit:
+            return None, similarity
+
+        itinerary = copy.deepcopy(entry["itinerary"])
+        itinerary.pop("token_usage", None)
+        start_date = _as_date(preferences.get('start_date'))
+        shift = (start_date - entry["start_date"]).days if start_date and entry["start_date"] else 0
+        shift_itinerary_dates(itinerary, shift)
+        apply_cost_breakdown(itinerary, preferences)
+        itinerary["semantic_match"] = {
+            "similarity": round(similarity, 4),
+            "destination": entry["destination"],
+            "origin": entry["origin"],
+            "start_date": entry["start_date"].isoformat() if entry["start_date"] else None,
+            "date_shift_days": shift,
+        }
+        return itinerary, similarity
+
+    def stats(self):
+        """Return lookup counters and the quality (cosine similarity) of the hits served"""
+        with self._lock:
+            stats = {key: value for key, value in self._stats.items() if key != "similarity_sum"}
+            stats["mean_hit_similarity"] = (
+                round(self._stats["similarity_sum"] / self._stats["hits"], 4) if self._stats["hits"] else None
+            )
+            stats["entries"] = sum(len(trip.entries) for trip in self._trips.values())
+        stats["threshold"] = self.threshold
+        return stats
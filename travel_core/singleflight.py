@@ -0,0 +1,81 @@
+"""Single-flight coalescing of identical concurrent generations.
+
+When several sessions ask for the same trip at the same time, only the first
+caller (the leader) runs the completion; the others wait for it and receive
+a copy of its result. Calls are keyed by the itinerary cache key (normalized
+preferences, model and temperature), so one ``SingleFlight`` shared by the
+whole process coalesces identical requests across sessions.
+"""
+import copy
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        """Wait for the leader and return a copy of its result (None if it gave up)"""
+        self.done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return copy.deepcopy(self.result)
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight calls, keyed by request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def begin(self, key):
+        """Join the in-flight call for ``key``; return ``(call, is_leader)``.
+
+        The leader must eventually call ``finish``; followers ``call.wait()``.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._stats["executions"] += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        """Publish the leader's result (or exception) to every waiter and retire the call"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` once for concurrent callers with the same ``key``.
+
+        Returns ``(result, shared)`` where ``shared`` is True for callers that
+        received another caller's result.
+        """
+        call, leader = self.begin(key)
+        if not leader:
+            return call.wait(), True
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result, False
+
+    def stats(self):
+        """Return call counters, including how many calls were coalesced"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,390 @@
+"""Durable store of saved itineraries, with fast search, reload and bulk export.
+
+Unlike the itinerary cache, which expires entries and is keyed by the exact
+request, the store keeps the plans a user chose to save until they are
+deleted. Each plan is indexed by destination (every stop of a multi-city
+trip), dates, total budget and interests, and its title, places and
+activities are full-text indexed (SQLite FTS5, with a ``LIKE`` fallback on
+builds without it). Listing returns summaries only; ``get`` reloads the full
+preferences and itinerary without calling the model::
+
+    python -m travel_core.store list --destination Paris --max-budget 2500
+    python -m travel_core.store search "museums food"
+    python -m travel_core.store export plans.csv --interest "Food & Dining"
+
+The store lives at ``TRAVEL_STORE_PATH`` (default
+``~/.cache/travel_assistant/saved_plans.sqlite3``).
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from travel_core.cache import itinerary_cache_key
+from travel_core.costs import parse_price
+from travel_core.semantic_cache import canonical_city
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "TRAVEL_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "travel_assistant", "saved_plans.sqlite3"),
+)
+
+# Columns returned by ``search`` and written by CSV exports
+SUMMARY_FIELDS = ("id", "title", "destination", "origin", "start_date", "end_date", "duration", "travelers",
+                  "flight_budget", "hotel_budget", "total_budget", "total_estimated", "interests", "model",
+                  "saved_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    origin TEXT,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    travelers INTEGER NOT NULL,
+    flight_budget INTEGER,
+    hotel_budget INTEGER,
+    total_budget INTEGER,
+    total_estimated REAL,
+    interests TEXT NOT NULL DEFAULT '[]',
+    model TEXT,
+    saved_at REAL NOT NULL,
+    preferences TEXT NOT NULL,
+    itinerary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_plans_saved ON plans (saved_at);
+CREATE INDEX IF NOT EXISTS idx_plans_start ON plans (start_date);
+CREATE INDEX IF NOT EXISTS idx_plans_budget ON plans (total_budget);
+CREATE TABLE IF NOT EXISTS plan_destinations (
+    destination_key TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    PRIMARY KEY (destination_key, plan_id)
+);
+CREATE TABLE IF NOT EXISTS plan_interests (
+    interest TEXT NOT NULL,
+    plan_id TEXT NOT NULL,
+    PRIMARY KEY (interest, plan_id)
+);
+"""
+_FTS_SCHEMA = ("CREATE VIRTUAL TABLE IF NOT EXISTS plans_fts USING fts5("
+               "id UNINDEXED, title, places, interests, activities)")
+_DATE_FIELDS = ("start_date", "end_date")
+# Bumped when existing rows need migrating; stored in the database as ``PRAGMA user_version``
+_SCHEMA_VERSION = 1
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else str(value or "")[:10]
+
+
+def plan_title(preferences):
+    """Default title of a saved plan ("Paris from New York, 2026-05-01 (5 nights)")"""
+    return (f"{preferences.get('destination')} from {preferences.get('origin')}, "
+            f"{_iso(preferences.get('start_date'))} ({int(preferences.get('duration') or 0)} nights)")
+
+
+def total_budget(preferences):
+    """The traveler's overall budget: the flight budget (already for every traveler) plus the hotel budget for the stay"""
+    return (int(preferences.get('flight_budget') or 0)
+            + int(preferences.get('hotel_budget') or 0) * int(preferences.get('duration') or 0))
+
+
+def _stops(preferences):
+    return [leg['destination'] for leg in preferences.get('legs') or ()] or [preferences.get('destination')]
+
+
+def _activity_text(itinerary):
+    """Searchable text of the activities, hotels and transport of an itinerary"""
+    parts = []
+    for activity in itinerary.get("activities") or ():
+        if isinstance(activity, dict):
+            parts += [str(activity.get(key) or "") for key in ("activity", "location")]
+    hotels = [itinerary.get("hotel")] + [leg.get("hotel") for leg in itinerary.get("legs") or ()]
+    parts += [str(hotel.get("name") or "") for hotel in hotels if isinstance(hotel, dict)]
+    flights = itinerary.get("flights")
+    if isinstance(flights, dict):
+        parts.append(str(flights.get("airline") or ""))
+    parts += [str(hop.get("carrier") or "") for hop in itinerary.get("transport") or () if isinstance(hop, dict)]
+    return " ".join(part for part in parts if part)
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query matching every word as a prefix"""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _restore_dates(preferences):
+    for key in _DATE_FIELDS:
+        if isinstance(preferences.get(key), str):
+            try:
+                preferences[key] = datetime.date.fromisoformat(preferences[key][:10])
+            except ValueError:
+                pass
+    return preferences
+
+
+class ItineraryStore:
+    """SQLite-backed collection of saved plans"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.executescript(_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            # Plans saved before the flight budget was counted once still carry a per-traveler total
+            self._conn.execute("UPDATE plans SET total_budget = COALESCE(flight_budget, 0)"
+                               " + COALESCE(hotel_budget, 0) * duration")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        try:
+            self._conn.execute(_FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: text search falls back to LIKE over the plan columns
+            self.full_text = False
+        self._conn.commit()
+
+    def save(self, preferences, itinerary, model=None, temperature=None, title=None):
+        """Save a generated plan and return its id; saving the same request again replaces it"""
+        if not itinerary or "error" in itinerary:
+            raise ValueError("Only successfully generated plans can be saved")
+        model = model or preferences.get('model_choice')
+        temperature = preferences.get('creativity_level', 0.7) if temperature is None else temperature
+        plan_id = itinerary_cache_key(preferences, model, temperature)[:16]
+        interests = list(preferences.get('interests') or ())
+        estimated = parse_price((itinerary.get("cost_breakdown") or {}).get("total_estimated"))
+        title = title or plan_title(preferences)
+        row = {
+            "id": plan_id,
+            "title": title,
+            "destination": preferences.get('destination') or "",
+            "origin": preferences.get('origin'),
+            "start_date": _iso(preferences.get('start_date')),
+            "end_date": _iso(preferences.get('end_date')),
+            "duration": int(preferences.get('duration') or 0),
+            "travelers": int(preferences.get('travelers') or 1),
+            "flight_budget": preferences.get('flight_budget'),
+            "hotel_budget": preferences.get('hotel_budget'),
+            "total_budget": total_budget(preferences),
+            "total_estimated": float(estimated) if estimated is not None else None,
+            "interests": json.dumps(interests),
+            "model": model,
+            "saved_at": time.time(),
+            "preferences": json.dumps(preferences, default=str),
+            "itinerary": json.dumps(itinerary, default=str),
+        }
+        stops = _stops(preferences)
+        with self._lock:
+            conn = self._conn
+            self._delete_locked(plan_id)
+            conn.execute(f"INSERT INTO plans ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                         tuple(row.values()))
+            conn.executemany("INSERT OR IGNORE INTO plan_destinations (destination_key, plan_id) VALUES (?, ?)",
+                             [(canonical_city(stop), plan_id) for stop in stops])
+            conn.executemany("INSERT OR IGNORE INTO plan_interests (interest, plan_id) VALUES (?, ?)",
+                             [(interest, plan_id) for interest in interests])
+            if self.full_text:
+                conn.execute(
+                    "INSERT INTO plans_fts (id, title, places, interests, activities) VALUES (?, ?, ?, ?, ?)",
+                    (plan_id, title, " ".join(stops + [row["origin"] or ""]), " ".join(interests),
+                     _activity_text(itinerary)),
+                )
+            conn.commit()
+        return plan_id
+
+    def _delete_locked(self, plan_id):
+        for table, column in (("plans", "id"), ("plan_destinations", "plan_id"), ("plan_interests", "plan_id")):
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (plan_id,))
+        if self.full_text:
+            self._conn.execute("DELETE FROM plans_fts WHERE id = ?", (plan_id,))
+
+    def delete(self, plan_id):
+        """Remove a saved plan"""
+        with self._lock:
+            self._delete_locked(plan_id)
+            self._conn.commit()
+
+    def get(self, plan_id):
+        """Return ``{"id", "title", "model", "preferences", "itinerary"}`` of a saved plan, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, model, preferences, itinerary FROM plans WHERE id = ?", (plan_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "model": row["model"],
+            "preferences": _restore_dates(json.loads(row["preferences"])),
+            "itinerary": json.loads(row["itinerary"]),
+        }
+
+    def _where(self, query=None, destination=None, start_from=None, start_to=None, max_budget=None,
+               interests=()):
+        """Build the WHERE clause and parameters shared by ``search``, ``count`` and ``export``"""
+        clauses, params = [], []
+        if destination:
+            clauses.append("id IN (SELECT plan_id FROM plan_destinations WHERE destination_key = ?)")
+            params.append(canonical_city(destination))
+        if start_from:
+            clauses.append("start_date >= ?")
+            params.append(_iso(start_from))
+        if start_to:
+            clauses.append("start_date <= ?")
+            params.append(_iso(start_to))
+        if max_budget:
+            clauses.append("total_budget <= ?")
+            params.append(int(max_budget))
+        interests = list(interests or ())
+        if interests:
+            clauses.append(f"id IN (SELECT plan_id FROM plan_interests WHERE interest IN "
+                           f"({', '.join('?' for _ in interests)}) GROUP BY plan_id HAVING COUNT(*) = ?)")
+            params += interests + [len(interests)]
+        if query and self.full_text and _fts_query(query):
+            clauses.append("id IN (SELECT id FROM plans_fts WHERE plans_fts MATCH ?)")
+            params.append(_fts_query(query))
+        elif query:
+            for word in re.findall(r"\w+", query):
+                clauses.append("(title LIKE ? OR destination LIKE ? OR origin LIKE ? OR interests LIKE ?)")
+                params += [f"%{word}%"] * 4
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def search(self, query=None, destination=None, start_from=None, start_to=None, max_budget=None,
+               interests=(), limit=50, offset=0):
+        """Return summaries (``SUMMARY_FIELDS``) of the matching plans, most recently saved first"""
+        where, params = self._where(query, destination, start_from, start_to, max_budget, interests)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_FIELDS)} FROM plans{where} ORDER BY saved_at DESC LIMIT ? OFFSET ?",
+                params + [int(limit), int(offset)],
+            ).fetchall()
+        plans = []
+        for row in rows:
+            plan = dict(row)
+            plan["interests"] = json.loads(plan["interests"])
+            plans.append(plan)
+        return plans
+
+    def count(self, **filters):
+        """Return the number of plans matching ``filters`` (the ``search`` keywords)"""
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM plans{where}", params).fetchone()[0]
+
+    def export(self, fmt="json", plan_ids=None, **filters):
+        """Return the matching plans (or ``plan_ids``) as JSON or CSV text.
+
+        JSON holds every plan in full; CSV has one row of ``SUMMARY_FIELDS``
+        per plan plus the preferences and itinerary as JSON columns.
+        """
+        if plan_ids is not None:
+            plan_ids = list(plan_ids)
+            where = f" WHERE id IN ({', '.join('?' for _ in plan_ids)})" if plan_ids else " WHERE 0"
+            params = plan_ids
+        else:
+            where, params = self._where(**filters)
+        columns = SUMMARY_FIELDS + ("preferences", "itinerary")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM plans{where} ORDER BY saved_at DESC", params
+            ).fetchall()
+
+        if fmt == "csv":
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            writer.writerows(tuple(row) for row in rows)
+            return output.getvalue()
+        if fmt != "json":
+            raise ValueError(f"Unknown export format '{fmt}' (use json or csv)")
+        plans = []
+        for row in rows:
+            plan = dict(row)
+            for key in ("interests", "preferences", "itinerary"):
+                plan[key] = json.loads(plan[key])
+            plans.append(plan)
+        return json.dumps(plans, indent=2, ensure_ascii=False)
+
+    def stats(self):
+        """Return the number of saved plans and distinct destinations"""
+        with self._lock:
+            plans = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            destinations = self._conn.execute(
+                "SELECT COUNT(DISTINCT destination_key) FROM plan_destinations"
+            ).fetchone()[0]
+        return {"plans": plans, "destinations": destinations}
+
+
+def _add_filters(parser):
+    parser.add_argument("--destination")
+    parser.add_argument("--from", dest="start_from", help="Earliest start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="start_to", help="Latest start date (YYYY-MM-DD)")
+    parser.add_argument("--max-budget", type=int)
+    parser.add_argument("--interest", action="append", dest="interests", default=[])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m travel_core.store",
+                                     description="List, search and export saved itineraries.")
+    parser.add_argument("--db", default=DEFAULT_STORE_PATH, help="Store database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="List saved plans, most recent first")
+    _add_filters(listing)
+    listing.add_argument("--limit", type=int, default=50)
+    search = commands.add_parser("search", help="Full-text search over titles, places, interests and activities")
+    search.add_argument("query")
+    _add_filters(search)
+    search.add_argument("--limit", type=int, default=50)
+    show = commands.add_parser("show", help="Print one saved plan as JSON")
+    show.add_argument("id")
+    export = commands.add_parser("export", help="Write the matching plans to a .json or .csv file (- for stdout)")
+    export.add_argument("output")
+    export.add_argument("--format", choices=["json", "csv"])
+    export.add_argument("--query")
+    _add_filters(export)
+    args = parser.parse_args(argv)
+
+    store = ItineraryStore(args.db)
+    if args.command == "show":
+        plan = store.get(args.id)
+        if plan is None:
+            print(f"No saved plan {args.id}", file=sys.stderr)
+            return 1
+        print(json.dumps(plan, indent=2, default=str, ensure_ascii=False))
+        return 0
+
+    filters = {"destination": args.destination, "start_from": args.start_from, "start_to": args.start_to,
+               "max_budget": args.max_budget, "interests": args.interests}
+    if args.command == "export":
+        fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "json")
+        text = store.export(fmt, query=args.query, **filters)
+        if args.output == "-":
+            sys.stdout.write(text)
+        else:
+            with open(args.output, "w", newline="", encoding="utf-8") as f:
+                f.write(text)
+            print(f"Exported {store.count(query=args.query, **filters)} plans to {args.output}", file=sys.stderr)
+        return 0
+
+    query = args.query if args.command == "search" else None
+    for plan in store.search(query, limit=args.limit, **filters):
+        print(f"{plan['id']}  {plan['start_date']}  {plan['title']}  (budget ${plan['total_budget']:,})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
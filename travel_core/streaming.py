@@ -0,0 +1,128 @@
+"""Incremental JSON parsing for streamed itinerary completions.
+
+The parser is fed raw text deltas as they arrive from a ``stream=True``
+completion and emits each top-level section of the itinerary (``flights``,
+``hotel``, ...) as soon as its value is complete. Items of top-level arrays
+such as ``activities`` are emitted one by one, so the UI can render a card per
+activity without waiting for the rest of the document.
+"""
+import json
+from collections import namedtuple
+
+# ``item`` is True for a single element of a top-level array (e.g. one activity)
+StreamEvent = namedtuple("StreamEvent", ["key", "value", "item"])
+
+# Key of the final event carrying the fully parsed recommendations dict
+ITINERARY_COMPLETE = "__complete__"
+
+
+class IncrementalJSONParser:
+    """Emit completed top-level values and array items of a streamed JSON object"""
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = True
+        self._current_key = None
+        self._value_start = None
+        self._item_start = None
+        self._finished = False
+
+    def feed(self, chunk):
+        """Append a text delta and return the list of newly completed StreamEvents"""
+        self.text += chunk
+        events = []
+        text = self.text
+        while self._pos < len(text) and not self._finished:
+            char = text[self._pos]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append("{")
+                    self._expect_key = True
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(events)
+                self._pos += 1
+                continue
+
+            depth = len(self._stack)
+            if char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+                if depth == 1 and not self._expect_key and self._value_start is None:
+                    self._value_start = self._pos
+            elif char in "{[":
+                if depth == 1 and self._value_start is None:
+                    self._value_start = self._pos
+                elif depth == 2 and self._stack[-1] == "[":
+                    self._item_start = self._pos
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 0:
+                    self._emit_value(events, self._pos)
+                    self._finished = True
+                elif depth == 1 and self._value_start is not None:
+                    self._emit_value(events, self._pos + 1)
+                elif depth == 2 and self._stack[-1] == "[" and self._item_start is not None:
+                    self._emit_item(events, text[self._item_start:self._pos + 1])
+            elif depth == 1:
+                if char == ":":
+                    self._expect_key = False
+                elif char == ",":
+                    self._emit_value(events, self._pos)
+                    self._expect_key = True
+                elif not char.isspace() and self._value_start is None and not self._expect_key:
+                    # Start of a bare scalar (number, true, false, null)
+                    self._value_start = self._pos
+            self._pos += 1
+        return events
+
+    def _close_string(self, events):
+        """Handle the end of a string token at the current position"""
+        depth = len(self._stack)
+        literal = self.text[self._string_start:self._pos + 1]
+        if depth == 1 and self._expect_key:
+            try:
+                self._current_key = json.loads(literal)
+            except ValueError:
+                self._current_key = None
+        elif depth == 2 and self._stack[-1] == "[":
+            self._emit_item(events, literal)
+
+    def _emit_value(self, events, end):
+        """Emit the pending top-level value ending just before ``end``"""
+        if self._value_start is None or self._current_key is None:
+            self._value_start = None
+            return
+        fragment = self.text[self._value_start:end].strip()
+        self._value_start = None
+        try:
+            events.append(StreamEvent(self._current_key, json.loads(fragment), False))
+        except ValueError:
+            pass
+
+    def _emit_item(self, events, fragment):
+        """Emit a single completed element of a top-level array"""
+        self._item_start = None
+        if self._current_key is None:
+            return
+        try:
+            events.append(StreamEvent(self._current_key, json.loads(fragment), True))
+        except ValueError:
+            pass
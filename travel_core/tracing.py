@@ -0,0 +1,361 @@
+"""Per-request tracing: stage spans, token usage and pluggable export sinks.
+
+A ``Tracer`` opens one trace per itinerary request. Library code marks its
+stages with ``span(name)`` (prompt building, rate-limit waits, completions,
+time to first token, generation, parsing, repair, cost computation, ...);
+spans are no-ops when no trace is active, so callers that do not trace pay
+nothing. Completion spans carry the token counts from ``response.usage``.
+
+Finished traces are handed to sinks: ``JsonlSink`` (one JSON line per
+trace), ``PrometheusSink`` (stage latency histograms and token counters as
+Prometheus text, written to a file and/or served over HTTP) and
+``MemorySink`` (the last N traces, for the app's debug panel).
+"""
+import contextvars
+import datetime
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar("travel_trace", default=None)
+_current_span = contextvars.ContextVar("travel_span", default=None)
+_span_ids = itertools.count(1)
+
+TOKEN_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "cached_prompt_tokens")
+
+
+class Span:
+    """One timed stage of a trace"""
+
+    def __init__(self, name, parent_id=None, attributes=None):
+        self.id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_usage(self, usage):
+        """Copy token counts from an API ``usage`` block onto the span"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.set(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_prompt_tokens=(getattr(details, "cached_tokens", 0) or 0) if details is not None else 0,
+        )
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def as_dict(self, origin):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            "thread": self.thread,
+            **self.attributes,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def record_usage(self, usage):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded for one request"""
+
+    def __init__(self, name, attributes=None):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def as_dict(self):
+        """Return the trace with per-stage totals and summed token usage"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        stages = {}
+        tokens = dict.fromkeys(TOKEN_ATTRIBUTES, 0)
+        for span in spans:
+            stages[span.name] = round(stages.get(span.name, 0.0) + span.duration * 1000, 2)
+            for key in TOKEN_ATTRIBUTES:
+                tokens[key] += span.attributes.get(key, 0) or 0
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(((self.end or time.perf_counter()) - self.start) * 1000, 2),
+            "status": self.attributes.get("status", "ok"),
+            "attributes": self.attributes,
+            "stages_ms": stages,
+            "tokens": tokens,
+            "spans": [span.as_dict(self.start) for span in spans],
+        }
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a stage of the active trace; a no-op when nothing is being traced"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current.id)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.end = time.perf_counter()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Generator spans may be closed from another context
+            pass
+        trace.add(current)
+
+
+def add_span(name, start, end, usage=None, **attributes):
+    """Record a stage timed by the caller (``time.perf_counter`` values) on the active trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    recorded = Span(name, _current_span.get(), attributes)
+    recorded.start, recorded.end = start, end
+    recorded.record_usage(usage)
+    trace.add(recorded)
+
+
+def current_trace():
+    """Return the active ``Trace`` or None"""
+    return _current_trace.get()
+
+
+class Tracer:
+    """Creates traces and exports finished ones to its sinks"""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @classmethod
+    def from_env(cls, *sinks):
+        """Build a tracer with ``sinks`` plus those configured by environment variables.
+
+        ``TRAVEL_TRACE_LOG`` enables a JSONL log, ``TRAVEL_METRICS_PATH`` a
+        Prometheus text file and ``TRAVEL_METRICS_PORT`` a ``/metrics`` endpoint.
+        """
+        sinks = list(sinks)
+        if os.environ.get("TRAVEL_TRACE_LOG"):
+            sinks.append(JsonlSink(os.environ["TRAVEL_TRACE_LOG"]))
+        metrics_path = os.environ.get("TRAVEL_METRICS_PATH")
+        metrics_port = os.environ.get("TRAVEL_METRICS_PORT")
+        if metrics_path or metrics_port:
+            prometheus = PrometheusSink(metrics_path)
+            if metrics_port:
+                prometheus.serve(int(metrics_port))
+            sinks.append(prometheus)
+        return cls(sinks)
+
+    def start(self, name, **attributes):
+        """Start a trace and make it the active one for this context"""
+        trace = Trace(name, attributes)
+        trace._token = _current_trace.set(trace)
+        return trace
+
+    def finish(self, trace):
+        """End ``trace``, deactivate it and export it to every sink"""
+        trace.end = time.perf_counter()
+        try:
+            _current_trace.reset(trace._token)
+        except ValueError:
+            _current_trace.set(None)
+        record = trace.as_dict()
+        for sink in self.sinks:
+            try:
+                sink.export(record)
+            except Exception:
+                # Telemetry must never break generation
+                pass
+        return record
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Context manager around ``start``/``finish``; exceptions mark the trace as failed"""
+        trace = self.start(name, **attributes)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.set(status="error", error=type(e).__name__)
+            raise
+        finally:
+            self.finish(trace)
+
+    def recent(self):
+        """Return the traces kept by the first ``MemorySink``, newest first"""
+        for sink in self.sinks:
+            if isinstance(sink, MemorySink):
+                return sink.records()
+        return []
+
+
+class MemorySink:
+    """Keeps the last ``keep`` traces in memory"""
+
+    def __init__(self, keep=20):
+        self._records = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def export(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self):
+        with self._lock:
+            return list(reversed(self._records))
+
+
+class JsonlSink:
+    """Appends one JSON line per trace to ``path``"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class PrometheusSink:
+    """Aggregates traces into Prometheus metrics (text exposition format).
+
+    Exposes a ``<prefix>_stage_duration_seconds`` histogram per trace name and
+    stage (``total`` is the whole trace), ``<prefix>_traces_total`` by status
+    and ``<prefix>_tokens_total`` by kind. With ``path``, the metrics file is
+    rewritten after every trace (node-exporter textfile style).
+    """
+
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+    def __init__(self, path=None, prefix="travel"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._traces = {}
+        self._tokens = {}
+        self._server = None
+
+    def _observe(self, labels, seconds):
+        counts, total = self._histograms.get(labels, ([0] * (len(self.BUCKETS) + 1), 0.0))
+        for position, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                counts[position] += 1
+        counts[-1] += 1
+        self._histograms[labels] = (counts, total + seconds)
+
+    def export(self, record):
+        with self._lock:
+            name = record["name"]
+            self._observe((name, "total"), record["duration_ms"] / 1000)
+            for stage, milliseconds in record["stages_ms"].items():
+                self._observe((name, stage), milliseconds / 1000)
+            key = (name, record["status"])
+            self._traces[key] = self._traces.get(key, 0) + 1
+            for kind, count in record["tokens"].items():
+                self._tokens[kind] = self._tokens.get(kind, 0) + count
+            text = self._render_locked() if self.path else None
+        if text is not None:
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temporary, self.path)
+
+    def render(self):
+        """Return the current metrics in Prometheus text format"""
+        with self._lock:
+            return self._render_locked()
+
+    def _render_locked(self):
+        prefix = self.prefix
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Time spent per request stage",
+            f"# TYPE {prefix}_stage_duration_seconds histogram",
+        ]
+        for (name, stage), (counts, total) in sorted(self._histograms.items()):
+            labels = f'trace="{name}",stage="{stage}"'
+            for bound, count in zip(self.BUCKETS, counts):
+                lines.append(f'{prefix}_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {counts[-1]}')
+            lines.append(f"{prefix}_stage_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{prefix}_stage_duration_seconds_count{{{labels}}} {counts[-1]}")
+        lines += [f"# HELP {prefix}_traces_total Finished traces", f"# TYPE {prefix}_traces_total counter"]
+        for (name, status), count in sorted(self._traces.items()):
+            lines.append(f'{prefix}_traces_total{{trace="{name}",status="{status}"}} {count}')
+        lines += [f"# HELP {prefix}_tokens_total Tokens reported by the API", f"# TYPE {prefix}_tokens_total counter"]
+        for kind, count in sorted(self._tokens.items()):
+            lines.append(f'{prefix}_tokens_total{{kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve the metrics at ``http://host:port/metrics`` from a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
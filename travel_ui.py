@@ -0,0 +1,548 @@
+"""Streamlit components of the AI Travel Assistant page.
+
+The page script (``travel_assistant_openai.py``) only lays out the sidebar
+and dispatches; the cached process-wide resources, the rendering helpers and
+the fragments live here, so they are defined once per process instead of on
+every rerun. The static CSS and HTML are module constants, compacted once at
+import. The Streamlit-free generation modules (``travel_core.router`` and the
+generator it uses) are imported with this module, but the heavy dependencies
+(``pandas``, ``numpy``, ``openai``) are only imported by the first generation,
+in a background job.
+"""
+from functools import partial
+
+import streamlit as st
+
+from travel_core.cache import ItineraryCache
+from travel_core.client import LLMClient
+from travel_core.destination_index import INTEREST_CATEGORIES, DestinationIndex
+from travel_core.jobs import CANCELLED, DONE, FINISHED_STATES, QUEUED, JobQueue
+from travel_core.render import (
+    DEFAULT_DAYS_PER_PAGE,
+    activity_html,
+    analysis_card_html,
+    flight_card_html,
+    hotel_card_html,
+    itinerary_cards,
+)
+from travel_core.router import ModelRouter
+from travel_core.semantic_cache import SemanticCache
+from travel_core.singleflight import SingleFlight
+from travel_core.store import ItineraryStore
+from travel_core.tracing import MemorySink, Tracer
+
+PAGE_CONFIG = {
+    "page_title": "AI Travel Assistant",
+    "page_icon": "✈️",
+    "layout": "wide",
+    "initial_sidebar_state": "expanded",
+}
+
+def _compact(markup):
+    """Collapse the indentation and line breaks of static markup"""
+    return " ".join(markup.split())
+
+# Custom CSS for elegant styling
+PAGE_STYLE = _compact("""
+<style>
+    .main-header {
+        font-size: 3rem;
+        font-weight: 700;
+        color: #2E4057;
+        text-align: center;
+        margin-bottom: 0.5rem;
+    }
+    .sub-header {
+        font-size: 1.2rem;
+        color: #5A6C7D;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .section-header {
+        font-size: 1.5rem;
+        font-weight: 600;
+        color: #2E4057;
+        margin-top: 2rem;
+        margin-bottom: 1rem;
+        border-bottom: 2px solid #E8F4FD;
+        padding-bottom: 0.5rem;
+    }
+    .preference-card {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        padding: 1.5rem;
+        border-radius: 15px;
+        color: white;
+        margin: 1rem 0;
+    }
+    .result-card {
+        background: #F8FFFE;
+        border: 1px solid #E1F5FE;
+        border-radius: 10px;
+        padding: 1.5rem;
+        margin: 1rem 0;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .recommendation-header {
+        font-size: 1.3rem;
+        font-weight: 600;
+        color: #1976D2;
+        margin-bottom: 1rem;
+    }
+    .stButton > button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+        border-radius: 25px;
+        padding: 0.5rem 2rem;
+        font-size: 1.1rem;
+        font-weight: 600;
+        transition: all 0.3s ease;
+    }
+    .stButton > button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+    }
+    .activity-item {
+        background: #E3F2FD;
+        padding: 0.8rem;
+        border-radius: 8px;
+        margin: 0.5rem 0;
+        border-left: 4px solid #1976D2;
+    }
+    .booking-tip {
+        background: #E8F4FD;
+        color: #0D47A1;
+        padding: 0.75rem 1rem;
+        border-radius: 8px;
+        margin-top: 0.5rem;
+    }
+</style>
+""")
+
+WELCOME_HTML = _compact("""
+<div style="text-align: center; padding: 3rem;">
+    <h2>🌟 Welcome to Your AI-Powered Travel Assistant!</h2>
+    <p style="font-size: 1.1rem; color: #5A6C7D; margin: 2rem 0;">
+        Get personalized travel recommendations powered by OpenAI's GPT! Fill in your preferences to get started.
+    </p>
+    <div style="background: linear-gradient(135deg, #E3F2FD 0%, #F3E5F5 100%); 
+                border-radius: 15px; padding: 2rem; margin: 2rem auto; max-width: 600px;">
+        <h3>✨ AI-Powered Features:</h3>
+        <div style="text-align: left; display: inline-block;">
+            • 🤖 Real AI analysis of your travel preferences<br>
+            • 🔍 Intelligent flight and hotel recommendations<br>
+            • 🗺️ Personalized day-by-day activity planning<br>
+            • 💡 Smart money-saving tips and insider advice<br>
+            • 🎯 Optimized itineraries based on your interests<br>
+            • 📊 Detailed cost breakdowns and budgeting
+        </div>
+    </div>
+    <div style="background: #FFF3E0; border-radius: 10px; padding: 1.5rem; margin: 1rem auto; max-width: 500px;">
+        <p style="color: #F57C00; font-weight: 600;">🔑 API Key Required</p>
+        <p style="font-size: 0.9rem; color: #BF360C;">
+            You'll need an OpenAI API key to use the AI features. 
+            Get one at <a href="https://platform.openai.com/api-keys" target="_blank">platform.openai.com</a>
+        </p>
+    </div>
+    <p style="font-style: italic; color: #7B1FA2;">
+        👈 Start by entering your API key and travel preferences in the sidebar!
+    </p>
+</div>
+""")
+
+FOOTER_HTML = ('<p style="text-align: center; color: #5A6C7D; font-size: 0.9rem;">'
+               '🤖 Powered by AI • Made for travelers who love great deals</p>')
+
+def configure_page():
+    """Page configuration and styling; Streamlit needs both in every run, as one prebuilt element"""
+    st.set_page_config(**PAGE_CONFIG)
+    st.markdown(PAGE_STYLE, unsafe_allow_html=True)
+
+def setup_openai():
+    """Setup OpenAI API key from user input or environment"""
+    openai_api_key = st.sidebar.text_input(
+        "🔑 OpenAI API Key", 
+        type="password",
+        help="Enter your OpenAI API key to generate AI-powered recommendations"
+    )
+    
+    if openai_api_key:
+        return openai_api_key
+    else:
+        st.sidebar.warning("⚠️ Please enter your OpenAI API key to use AI recommendations")
+        return None
+
+@st.cache_resource
+def get_llm_client(api_key):
+    """Pooled, rate-limited OpenAI client shared across reruns and sessions for an API key"""
+    return LLMClient.from_env(api_key)
+
+@st.cache_resource
+def get_itinerary_cache():
+    """Process-wide itinerary cache shared by every session"""
+    return ItineraryCache()
+
+@st.cache_resource
+def get_model_router():
+    """Process-wide model cascade with its routing statistics"""
+    return ModelRouter()
+
+@st.cache_resource
+def get_semantic_cache():
+    """Process-wide index of generated itineraries for reusing near-identical trips"""
+    return SemanticCache()
+
+@st.cache_resource
+def get_tracer():
+    """Process-wide tracer: the last 20 traces for the debug panel plus sinks configured by environment"""
+    return Tracer.from_env(MemorySink(keep=20))
+
+@st.cache_resource
+def get_single_flight():
+    """Process-wide coalescing of identical in-flight generations across sessions"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_job_queue():
+    """Process-wide background generation queue (TRAVEL_JOB_WORKERS workers, TRAVEL_JOB_QUEUE_DEPTH waiting)"""
+    return JobQueue()
+
+@st.cache_resource
+def get_itinerary_store():
+    """Durable store of the plans users saved, shared by every session"""
+    return ItineraryStore()
+
+@st.cache_resource
+def get_destination_index():
+    """Precomputed destination knowledge index, or None if it has not been built"""
+    return DestinationIndex.open_existing()
+
+def render_card(card_html):
+    """Render a prebuilt card (see ``travel_core.render``) as a single element"""
+    st.markdown(card_html, unsafe_allow_html=True)
+
+def render_analysis_card(analysis):
+    """Render the AI analysis and reasoning card"""
+    render_card(analysis_card_html(analysis))
+
+def render_flight_card(flight_info):
+    """Render the recommended flight card"""
+    render_card(flight_card_html(flight_info))
+
+def render_hotel_card(hotel_info):
+    """Render the recommended hotel card"""
+    render_card(hotel_card_html(hotel_info))
+
+def render_activity_item(activity):
+    """Render a single day's activity"""
+    render_card(activity_html(activity))
+
+def render_multi_city_stops(cards):
+    """Render each stop of a multi-city trip (the journey there and its hotel) and the way home"""
+    for header, transport_html, hotel_html in cards.stops:
+        st.markdown(f"### {header}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if transport_html:
+                render_card(transport_html)
+        with col2:
+            render_card(hotel_html)
+    
+    if cards.journey_home:
+        st.markdown("### 🏠 Journey Home")
+        render_card(cards.journey_home)
+
+def render_daily_activities(cards, days_per_page=DEFAULT_DAYS_PER_PAGE):
+    """Render the activities one page of days at a time, each day in its own expander"""
+    pages = cards.pages(days_per_page)
+    if not pages:
+        return
+    st.markdown('<div class="recommendation-header">🎨 AI-Recommended Daily Activities</div>', unsafe_allow_html=True)
+    labels = [label for label, _ in pages]
+    # Only the selected page is rendered; switching pages reruns just the results fragment.
+    # Pages are picked by position because labels repeat (several "More ideas" pages, revisited days)
+    selected = st.radio("Days", range(len(pages)), format_func=labels.__getitem__, horizontal=True,
+                        label_visibility="collapsed") if len(pages) > 1 else 0
+    for position, (day, title, day_html) in enumerate(pages[selected][1]):
+        with st.expander(title, expanded=position == 0):
+            render_card(day_html)
+
+def render_saved_plans(store):
+    """Sidebar browser of saved plans: filters, reopen without the AI, and bulk export"""
+    if not store.stats()['plans']:
+        return
+    with st.expander("📚 Saved Plans"):
+        query = st.text_input("Search", placeholder="e.g., Paris museums", key="saved_query")
+        max_budget = st.number_input("Max total budget (USD, 0 = any)", min_value=0, value=0, step=500,
+                                     key="saved_max_budget")
+        interests = st.multiselect("Interests", INTEREST_CATEGORIES, key="saved_interests")
+        filters = {"query": query, "max_budget": max_budget or None, "interests": interests}
+        
+        plans = store.search(limit=20, **filters)
+        for plan in plans:
+            if st.button(f"📂 {plan['title']}", key=f"open_plan_{plan['id']}",
+                         help=f"Budget ${plan['total_budget']:,} · {', '.join(plan['interests']) or 'no interests'}"):
+                saved = store.get(plan['id'])
+                st.session_state.user_preferences = saved['preferences']
+                st.session_state.ai_recommendations = saved['itinerary']
+                st.session_state.preferences_collected = True
+                st.rerun()
+        total = store.count(**filters)
+        st.caption(f"{len(plans)} of {total} matching plan(s)")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            # Exports are built only when the button is clicked
+            st.download_button("⬇️ JSON", partial(store.export, "json", **filters), file_name="travel_plans.json",
+                               mime="application/json", on_click="ignore", disabled=not total)
+        with col2:
+            st.download_button("⬇️ CSV", partial(store.export, "csv", **filters), file_name="travel_plans.csv",
+                               mime="text/csv", on_click="ignore", disabled=not total)
+
+def render_cost_breakdown(cost_breakdown):
+    """Render the cost breakdown metrics"""
+    st.markdown('<div class="preference-card">', unsafe_allow_html=True)
+    st.markdown("### 💰 Cost Breakdown")
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Flights", cost_breakdown.get('flights_total', 'N/A'))
+    with col2:
+        st.metric("Hotels", cost_breakdown.get('accommodation_total', 'N/A'))
+    with col3:
+        st.metric("Activities", cost_breakdown.get('activities_estimated', 'N/A'))
+    with col4:
+        st.metric("Food & Transport", f"{cost_breakdown.get('daily_food_budget', 'N/A')}/day + {cost_breakdown.get('transportation_local', 'N/A')}")
+    with col5:
+        st.metric("**Total Estimate**", f"**{cost_breakdown.get('total_estimated', 'N/A')}**")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_trace_panel(traces):
+    """Render the debug panel with the stage timings of the most recent requests"""
+    with st.expander("🩺 Recent request traces", expanded=True):
+        if not traces:
+            st.caption("No traced requests yet.")
+            return
+        st.dataframe([
+            {
+                "started (UTC)": trace['started_at'][11:23],
+                "trace": trace['name'],
+                "status": trace['status'],
+                "total ms": trace['duration_ms'],
+                **{f"{stage} ms": milliseconds for stage, milliseconds in trace['stages_ms'].items()},
+                "prompt tokens": trace['tokens']['prompt_tokens'],
+                "completion tokens": trace['tokens']['completion_tokens'],
+            }
+            for trace in traces
+        ])
+        latest = traces[0]
+        st.caption(f"Spans of the latest trace ({latest['name']}, {latest['trace_id']})")
+        st.json(latest['spans'], expanded=False)
+
+def render_semantic_note(match):
+    """Tell the user their plan was reused from a near-identical trip"""
+    shift = match['date_shift_days']
+    shifted = f", with flights moved by {abs(shift)} day{'s' if abs(shift) != 1 else ''}" if shift else ""
+    st.info(f"🧭 Reused the plan for a near-identical trip ({match['origin']} → {match['destination']}, "
+            f"{match['similarity']:.0%} similar){shifted}.")
+
+def render_routing_note(routing):
+    """Show which parts of the plan had to be escalated to a stronger model"""
+    first, *escalations = routing['steps']
+    parts = [f"{', '.join(step['sections'])} re-planned with {step['model']}" for step in escalations]
+    st.caption(f"🪜 Planned with {first['model']}" + (f"; {'; '.join(parts)}" if parts else ""))
+
+def render_schedule_note(schedule):
+    """Tell the user how much daily travel regrouping the activities saved"""
+    if schedule['optimized']:
+        st.caption(f"📍 Activities regrouped by area: about {schedule['distance_km_before']:g} km → "
+                   f"{schedule['distance_km_after']:g} km of travel between them "
+                   f"({schedule['located']} of {schedule['activities']} places located)")
+
+def render_model_stats(stats):
+    """Sidebar summary of the model cascade's latency, cost and escalations"""
+    if not stats['requests']:
+        return
+    st.caption(f"🪜 Routing: {stats['requests']} plan(s), {stats['escalation_rate']:.0%} escalated")
+    for model, model_stats in stats['models'].items():
+        latency = f" · p50 {model_stats['p50_seconds']}s" if model_stats['p50_seconds'] is not None else ""
+        cost = f" · ${model_stats['cost_usd']:.4f}" if model_stats['cost_usd'] is not None else ""
+        st.caption(f"{model}: {model_stats['runs']} runs, {model_stats['pass_rate']:.0%} passed{latency}{cost}")
+
+def render_replan_note(replanned):
+    """Tell the user which parts of the plan were regenerated after their edits"""
+    labels = {"flights": "flights", "hotel": "hotel", "overview": "summary and tips"}
+    parts = [labels[section] for section in replanned['sections'] if section in labels]
+    days = replanned['activity_days']
+    if days:
+        parts.append(f"activities for day {days[0]}" if len(days) == 1 else
+                     f"activities for days {', '.join(str(day) for day in days)}")
+    if parts:
+        st.info(f"♻️ Updated {', '.join(parts)}; everything else is kept from your previous plan.")
+    else:
+        st.info("♻️ Your plan already matches these preferences.")
+
+def collect_generation_job(queue):
+    """Move a finished background job's itinerary into the session; return True once nothing is pending"""
+    pending = st.session_state.generation_job
+    if pending is None:
+        return True
+    status = queue.status(pending['id'])
+    if status is not None and status['state'] not in FINISHED_STATES:
+        return False
+    st.session_state.generation_job = None
+    if status is None or status['state'] == CANCELLED:
+        return True
+    if status['state'] == DONE:
+        st.session_state.ai_recommendations = queue.result(pending['id'])
+    else:
+        st.session_state.ai_recommendations = {"error": f"Error generating recommendations: {status['error']}"}
+    st.session_state.user_preferences = pending['preferences']
+    st.session_state.preferences_collected = True
+    return True
+
+@st.fragment(run_every=1.0)
+def render_generation_job(job_id):
+    """Progress of the background generation job, polled every second; reruns the page once it finishes"""
+    queue = get_job_queue()
+    status = queue.status(job_id)
+    if status is None or status['state'] in FINISHED_STATES:
+        st.rerun(scope="app")
+    
+    st.markdown('<h2 class="section-header">🎯 AI Travel Recommendations</h2>', unsafe_allow_html=True)
+    if status['state'] == QUEUED:
+        st.info(f"⏳ All planners are busy; your trip is number {status['position']} in line...")
+    else:
+        message = status['progress'].get('message', "AI is crafting your perfect travel itinerary...")
+        st.info(f"🤖 {message} ({status['elapsed_seconds']:.0f}s)")
+    if st.button("✖️ Cancel", help="Stop generating this plan"):
+        queue.cancel(job_id)
+        # A running job stops at its next checkpoint; the session stops waiting for it now
+        st.session_state.generation_job = None
+        st.rerun(scope="app")
+    
+    # Cards streamed so far
+    partial = status['progress'].get('partial') or {}
+    if partial.get('analysis_reasoning'):
+        render_analysis_card(partial['analysis_reasoning'])
+    col1, col2 = st.columns(2)
+    with col1:
+        if isinstance(partial.get('flights'), dict):
+            render_flight_card(partial['flights'])
+    with col2:
+        if isinstance(partial.get('hotel'), dict):
+            render_hotel_card(partial['hotel'])
+    for activity in partial.get('activities', []):
+        if isinstance(activity, dict):
+            render_activity_item(activity)
+    for suggestion in partial.get('additional_suggestions', []):
+        st.write(f"• {suggestion}")
+
+@st.fragment
+def render_results_view(prefs, recommendations):
+    """The results view, isolated so its own interactions (e.g. paging through days) rerun only this part"""
+    render_trace = get_tracer().start("render_results", activities=len(recommendations.get('activities', [])))
+    
+    # Check if there was an error
+    if "error" in recommendations:
+        st.error(f"❌ {recommendations['error']}")
+        if "raw_response" in recommendations:
+            st.code(recommendations['raw_response'])
+        get_tracer().finish(render_trace)
+        return
+    
+    # Card HTML is built once per itinerary and reused on every rerun
+    cards = itinerary_cards(recommendations)
+    
+    if recommendations.get("section_errors"):
+        st.warning("⚠️ Some parts of the itinerary could not be generated: " + "; ".join(recommendations["section_errors"]))
+    
+    if recommendations.get("semantic_match"):
+        render_semantic_note(recommendations["semantic_match"])
+    if recommendations.get("replanned"):
+        render_replan_note(recommendations["replanned"])
+    if recommendations.get("routing"):
+        render_routing_note(recommendations["routing"])
+    if recommendations.get("schedule"):
+        render_schedule_note(recommendations["schedule"])
+    
+    # Display user preferences summary
+    st.markdown('<div class="preference-card">', unsafe_allow_html=True)
+    st.markdown("### 📋 Your Travel Preferences Summary")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.write(f"**🌍 Destination:** {prefs['destination']}")
+        st.write(f"**🏠 From:** {prefs['origin']}")
+        st.write(f"**📅 Duration:** {prefs['duration']} days")
+    
+    with col2:
+        st.write(f"**💰 Flight Budget:** ${prefs['flight_budget']}")
+        st.write(f"**🏨 Hotel Budget:** ${prefs['hotel_budget']}/night")
+        st.write(f"**👥 Travelers:** {prefs['travelers']}")
+    
+    with col3:
+        st.write(f"**🏨 Accommodation:** {prefs['accommodation_type']}")
+        if prefs['location_preference']:
+            st.write(f"**📍 Location:** {prefs['location_preference']}")
+        if prefs['interests']:
+            st.write(f"**🎨 Interests:** {', '.join(prefs['interests'])}")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Generate and display recommendations
+    st.markdown('<h2 class="section-header">🎯 AI Travel Recommendations</h2>', unsafe_allow_html=True)
+    
+    # Analysis and Reasoning
+    render_card(cards.analysis)
+    
+    # Recommended Itinerary
+    if cards.stops:
+        render_multi_city_stops(cards)
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            render_card(cards.flight)
+        
+        with col2:
+            render_card(cards.hotel)
+    
+    # Activities
+    render_daily_activities(cards)
+    
+    # Additional Suggestions
+    if cards.suggestions:
+        render_card(cards.suggestions)
+    
+    # Total estimated cost
+    cost_breakdown = recommendations.get('cost_breakdown', {})
+    if cost_breakdown:
+        render_cost_breakdown(cost_breakdown)
+    
+    for overrun in recommendations.get('budget_overruns', []):
+        st.warning(
+            f"⚠️ {overrun['item'][:1].upper() + overrun['item'][1:]}: estimated {overrun['estimate']} is "
+            f"{overrun['over_by']} over your {overrun['budget']} budget"
+        )
+    
+    token_usage = recommendations.get('token_usage')
+    if token_usage:
+        st.caption(
+            f"🔢 Tokens: {token_usage['prompt_tokens']} prompt "
+            f"({token_usage['cached_prompt_tokens']} cached, ~{token_usage['prompt_tokens_estimated']} measured locally) "
+            f"+ {token_usage['completion_tokens']} completion of {token_usage['max_tokens_requested']} budgeted "
+            f"across {token_usage['requests']} request(s)"
+        )
+    
+    get_tracer().finish(render_trace)
+
+def render_welcome():
+    """Welcome message shown before any preferences are entered"""
+    st.markdown(WELCOME_HTML, unsafe_allow_html=True)
+
+def render_footer():
+    """Footer line under every page"""
+    st.markdown("---")
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)